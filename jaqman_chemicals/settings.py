@@ -6,6 +6,8 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+from . import sqlite
+
 # Load environment variables
 load_dotenv()
 
@@ -55,18 +57,25 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'website.context_processors.contact_info',
+                'website.context_processors.portable_urls',
             ],
         },
     },
 ]
 
-# Database (SQLite for local development)
+# Database (SQLite). Connection profiles are in jaqman_chemicals/sqlite.py:
+# SQLITE_PROFILE for this process, BUILD_SQLITE_PROFILE for build workers.
+# Stock Django behaviour unless a deployment opts in, e.g. SQLITE_PROFILE=serve
+# for the live site (WAL, persistent connections, BEGIN IMMEDIATE)
+DATABASE_PATH = BASE_DIR / 'db.sqlite3'
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'default')
+BUILD_SQLITE_PROFILE = os.environ.get('BUILD_SQLITE_PROFILE', 'build')
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': sqlite.database(DATABASE_PATH, SQLITE_PROFILE),
 }
+# Seconds to keep connections open between requests (0 = close after each)
+if 'CONN_MAX_AGE' in os.environ:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ['CONN_MAX_AGE'])
 
 # Password Validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -83,23 +92,67 @@ USE_TZ = True
 # For GitHub Pages, the site is already served from the repo subdirectory,
 # so static files should be at /static/, not /jaqman-chemicals/static/
 SITE_BASE_URL = os.environ.get('SITE_BASE_URL', '')  # Only used for internal links
+# Scheme and host the site is published at (e.g. https://example.github.io),
+# for absolute URLs in the sitemap and structured data
+SITE_ORIGIN = os.environ.get('SITE_ORIGIN', '')
+# Render internal, static and media links relative to each page, so the
+# distilled site works from any directory without make_portable.py
+PORTABLE_URLS = os.environ.get('PORTABLE_URLS', 'False') == 'True'
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'website' / 'static']
+# The last finder builds the script bundles (see website/assets.py)
+STATICFILES_FINDERS = [
+    'django.contrib.staticfiles.finders.FileSystemFinder',
+    'django.contrib.staticfiles.finders.AppDirectoriesFinder',
+    'website.assets.BundleFinder',
+]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 # Static Site Generation
 DISTILL_DIR = BASE_DIR / '_site'
+# Build manifests and caches kept between builds (never deployed)
+BUILD_CACHE_DIR = BASE_DIR / '.build'
+# Build-time cache of {% fragment %} blocks (see website/build/fragments.py):
+# maximum entries per process, and whether to keep them between builds
+FRAGMENT_CACHE_SIZE = 4096
+FRAGMENT_CACHE_PERSIST = os.environ.get('FRAGMENT_CACHE_PERSIST', 'False') == 'True'
+# Products per page of the product, industry and application listings
+PRODUCTS_PER_PAGE = 48
+# Elements at the top of <body> counted as a page's first screen when the
+# build inlines critical CSS (build_site --optimize, website/build/optimize.py)
+CRITICAL_CSS_ELEMENTS = 200
+
+# Live serving (running the app instead of the static build): cache
+# rendered pages until the catalogue changes (see website/serving.py). The
+# file cache is shared by every worker process on the host.
+PAGE_CACHE = os.environ.get('PAGE_CACHE', 'False') == 'True'
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BUILD_CACHE_DIR / 'pages',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
 
 # File Storage
 STORAGES = {
     "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
-    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedStaticFilesStorage"},
+    # Content-hashed names (recorded in staticfiles.json) plus .gz/.br siblings
+    "staticfiles": {"BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage"},
 }
 
 # Media Files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Responsive image variants of Product/Industry uploads (see website/images.py)
+IMAGE_DERIVATIVE_WIDTHS = [320, 640, 960, 1280]
+IMAGE_DERIVATIVE_FORMATS = ['avif', 'webp']
+# Encode variants when an image is saved (otherwise run manage.py build_images)
+IMAGE_DERIVATIVES_ON_SAVE = os.environ.get('IMAGE_DERIVATIVES_ON_SAVE', 'True') == 'True'
+
 # Contact Information (from .env)
 CONTACT_PHONE = os.environ.get('CONTACT_PHONE')
 WHATSAPP_NUMBER = os.environ.get('WHATSAPP_NUMBER')
@@ -0,0 +1,63 @@
+"""
+Jaqman Chemicals - Build Settings
+Lean settings for building the static site, e.g.
+
+    DJANGO_SETTINGS_MODULE=jaqman_chemicals.settings_build python manage.py build _site
+
+The build renders public pages only, so it leaves out the admin,
+sessions, messages and auth, and the middleware and context processors
+that come with them. Pages come out the same as with the full settings;
+every process of the build (including render workers) starts faster.
+Use the full settings for anything else, e.g. migrate or runserver.
+"""
+from pathlib import Path
+
+import django
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, STATICFILES_DIRS, TEMPLATES
+
+SITE_ONLY_APPS = (
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+)
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in SITE_ONLY_APPS]
+
+# Rendering a page needs none of these: no page reads the session, the
+# user or messages, or has a form to protect, and the build requests
+# pages directly rather than static files
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if middleware not in (
+        'whitenoise.middleware.WhiteNoiseMiddleware',
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.middleware.csrf.CsrfViewMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+    )
+]
+
+TEMPLATES = [
+    {
+        **TEMPLATES[0],
+        'OPTIONS': {
+            **TEMPLATES[0]['OPTIONS'],
+            'context_processors': [
+                processor for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+                if processor not in (
+                    'django.contrib.auth.context_processors.auth',
+                    'django.contrib.messages.context_processors.messages',
+                )
+            ],
+        },
+    },
+]
+
+# Public URLs only: jaqman_chemicals.urls also mounts the admin
+ROOT_URLCONF = 'website.urls'
+
+# collectstatic still collects the admin's files, so the static manifest
+# the live site serves from stays complete
+STATICFILES_DIRS = [*STATICFILES_DIRS, ('admin', Path(django.__file__).parent / 'contrib' / 'admin' / 'static' / 'admin')]
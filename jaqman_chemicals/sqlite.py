@@ -0,0 +1,102 @@
+"""
+SQLite Connection Profiles
+
+Builds the settings for an SQLite database tuned for one workload:
+
+    default    stock Django settings
+    serve      the live site and the admin: WAL journal, so readers and the
+               writer don't block each other; synchronous=NORMAL (safe with
+               WAL, without an fsync on every commit); write transactions
+               that take the lock up front (BEGIN IMMEDIATE) and wait up to
+               the busy timeout rather than fail with "database is locked";
+               persistent connections
+    build      site builds and their workers: read-only, with a larger page
+               cache and memory map, and one connection for the whole build
+               (pages render through the WSGI handler, which otherwise
+               reconnects for every page)
+    immutable  as build, but opened with immutable=1, which skips locking
+               altogether. Only safe while nothing writes to the database,
+               and only sees changes in the WAL once they are checkpointed
+               (render_pages() does that before starting workers)
+
+Every profile sets its pragmas on connect, through Django's init_command.
+Processes use 'default' unless settings.SQLITE_PROFILE names another, so
+a live deployment opts into 'serve' with SQLITE_PROFILE=serve.
+"""
+from pathlib import Path
+
+MB = 1 << 20
+
+PROFILES = {
+    'default': {},
+    'serve': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * MB,
+            'cache_size': -32 * 1024,  # KiB
+            'temp_store': 'MEMORY',
+        },
+        'options': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
+        'conn_max_age': 600,
+    },
+    'build': {
+        'pragmas': {
+            'mmap_size': 1024 * MB,
+            'cache_size': -128 * 1024,
+            'temp_store': 'MEMORY',
+        },
+        'mode': 'ro',
+        'conn_max_age': None,
+    },
+    'immutable': {
+        'pragmas': {
+            'mmap_size': 1024 * MB,
+            'cache_size': -128 * 1024,
+            'temp_store': 'MEMORY',
+        },
+        'mode': 'ro',
+        'immutable': True,
+        'conn_max_age': None,
+    },
+}
+
+
+def init_command(pragmas):
+    """PRAGMA statements for Django's init_command option, which runs them on connect."""
+    return ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items())
+
+
+def database(path, profile='default'):
+    """DATABASES entry for the SQLite database at path, using the named profile."""
+    if profile not in PROFILES:
+        raise ValueError(f'Unknown SQLite profile {profile!r}, expected one of {", ".join(PROFILES)}')
+    config = PROFILES[profile]
+    options = dict(config.get('options', {}))
+    if config.get('pragmas'):
+        options['init_command'] = init_command(config['pragmas'])
+
+    name = path
+    if config.get('mode'):
+        query = f"mode={config['mode']}" + ('&immutable=1' if config.get('immutable') else '')
+        name = f'{Path(path).resolve().as_uri()}?{query}'
+        options['uri'] = True
+
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'OPTIONS': options,
+        'CONN_MAX_AGE': config.get('conn_max_age', 0),
+        'CONN_HEALTH_CHECKS': config.get('conn_max_age', 0) != 0,
+    }
+
+
+def checkpoint(connection):
+    """
+    Move everything in the WAL into the database file, where immutable
+    connections will see it. Does nothing on a read-only connection,
+    which can't.
+    """
+    if connection.vendor == 'sqlite' and not connection.settings_dict['OPTIONS'].get('uri'):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
@@ -0,0 +1,423 @@
+"""
+Benchmark for the static site build.
+
+Fills a temporary database with a synthetic catalogue (products with
+realistic specifications, industries, applications and FAQs), then
+times each stage of a build on its own: loading the data, collectstatic,
+the change snapshot, listing pages, rendering (per view), make_portable
+and the deploy copy into a fresh and an unchanged checkout. Each size
+runs in its own process, so peak RSS is measured per size.
+
+Results are written as JSON (stage seconds, query counts, pages/sec and
+peak RSS). With --baseline, the run fails if pages/sec dropped by more
+than --tolerance or any stage issues more queries than in the baseline.
+
+Usage: python scripts/bench_build.py [--sizes 1000 10000 100000] [--output bench.json]
+       python scripts/bench_build.py --baseline bench.json --tolerance 0.2
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_ROOT = Path(__file__).parent.parent
+FIXTURE = PROJECT_ROOT / 'website' / 'fixtures' / 'initial_data.json'
+
+# Names, applications and specifications the synthetic catalogue is drawn from
+GRADES = ('Industrial', 'Technical', 'Pharma', 'Electronic', 'Reagent', 'Food', 'Cosmetic', 'Fuel')
+COMPOUNDS = (
+    'Acetone', 'Methanol', 'Ethanol', 'Toluene', 'Xylene', 'Isopropyl Alcohol', 'Butyl Acetate',
+    'Ethyl Acetate', 'Methyl Ethyl Ketone', 'Glycerine', 'Propylene Glycol', 'Monoethylene Glycol',
+    'White Spirit', 'Hexane', 'Heptane', 'Cyclohexanone', 'Dichloromethane', 'Acetic Acid',
+    'Caustic Soda', 'Phosphoric Acid', 'Citric Acid', 'Base Oil SN150', 'Base Oil SN500',
+    'Paraffin Wax', 'Styrene Monomer', 'Butanol', 'Diacetone Alcohol', 'Dipropylene Glycol',
+)
+APPLICATION_WORDS = (
+    'Solvent', 'Cleaning', 'Degreasing', 'Extraction', 'Formulation', 'Thinning', 'Blending',
+    'Coating', 'Adhesive', 'Ink', 'Resin', 'Lubricant', 'Coolant', 'Intermediate', 'Carrier',
+    'Disinfection', 'Plasticiser', 'Antifreeze', 'Polishing', 'Dyeing',
+)
+APPLICATION_KINDS = ('manufacturing', 'production', 'processing', 'applications', 'agent', 'base')
+INDUSTRY_WORDS = (
+    'Paints', 'Coatings', 'Pharmaceuticals', 'Automotive', 'Plastics', 'Polymers', 'Printing',
+    'Inks', 'Agrochemicals', 'Adhesives', 'Sealants', 'Cosmetics', 'Electronics', 'Marine',
+    'Aviation', 'Mining', 'Textiles', 'Construction', 'Rubber', 'Cleaning', 'Food', 'Beverage',
+)
+PACKAGING = ('Drums (200L)', 'IBC (1000L)', 'ISO Tank', 'Flexibags', 'Bulk vessels', 'Jerry cans (25L)')
+SENTENCES = (
+    'Supplied to manufacturers across the Gulf, Africa and South Asia.',
+    'Consistent quality from batch to batch, with a certificate of analysis for every shipment.',
+    'Widely used as a solvent in manufacturing, cleaning and chemical synthesis.',
+    'Low water content and a narrow distillation range make it suitable for sensitive formulations.',
+    'Available in drums, IBCs and bulk, with flexible payment terms for regular buyers.',
+    'Meets the relevant ASTM and BS specifications.',
+    'Stored and shipped in dedicated, nitrogen-blanketed tanks to prevent contamination.',
+    'A key feedstock for resins, coatings and specialty chemicals.',
+    'Technical support is available for trials and new applications.',
+    'Free from heavy metals and suitable for export to regulated markets.',
+)
+SPECIFICATIONS = (
+    ('Appearance', lambda r: r.choice(('Clear, colourless liquid', 'White crystalline powder', 'Pale yellow liquid'))),
+    ('Purity', lambda r: f'{r.uniform(95, 99.99):.2f}% min'),
+    ('Density', lambda r: f'{r.uniform(0.6, 1.6):.3f} g/ml at 20°C'),
+    ('Boiling Point', lambda r: f'{r.randint(30, 300)}°C'),
+    ('Flash Point', lambda r: f'{r.randint(-40, 220)}°C'),
+    ('Melting Point', lambda r: f'{r.randint(-120, 80)}°C'),
+    ('Water Content', lambda r: f'{r.uniform(0.01, 0.5):.2f}% max'),
+    ('Acidity', lambda r: f'{r.uniform(0.001, 0.05):.3f}% max (as acetic acid)'),
+    ('Colour', lambda r: f'{r.randint(5, 30)} APHA max'),
+    ('Viscosity', lambda r: f'{r.uniform(0.3, 150):.1f} cSt at 40°C'),
+    ('Refractive Index', lambda r: f'{r.uniform(1.33, 1.55):.4f}'),
+    ('Molecular Weight', lambda r: f'{r.uniform(30, 400):.2f} g/mol'),
+    ('pH', lambda r: f'{r.uniform(2, 12):.1f}'),
+    ('Non-volatile Matter', lambda r: f'{r.randint(1, 50)} mg/100ml max'),
+)
+
+
+def sample_images():
+    """Product and industry image names from the fixture, reused for synthetic rows."""
+    with open(FIXTURE, encoding='utf-8') as f:
+        objects = json.load(f)
+    images = {'website.product': [], 'website.industry': []}
+    for obj in objects:
+        if obj['model'] in images and obj['fields'].get('image'):
+            images[obj['model']].append(obj['fields']['image'])
+    return images['website.product'] or [''], images['website.industry'] or ['']
+
+
+def generate_catalogue(size, industries, faqs, seed):
+    """Insert the synthetic catalogue. Returns {model label: rows inserted}."""
+    from django.db import transaction
+
+    from website.models import (
+        FAQ, Application, Industry, Product, ProductApplication, ProductIndustry,
+    )
+
+    rng = random.Random(seed)
+    product_images, industry_images = sample_images()
+    batch_size = 2000
+
+    with transaction.atomic():
+        industry_rows = []
+        for i in range(industries):
+            name = ' & '.join(rng.sample(INDUSTRY_WORDS, 2)) + f' {i + 1}'
+            industry_rows.append(Industry(
+                name=name, slug=f'industry-{i + 1}', description=' '.join(rng.sample(SENTENCES, 2)), icon='🧪',
+                image=rng.choice(industry_images), order=i, active=rng.random() < 0.8,
+            ))
+        Industry.objects.bulk_create(industry_rows, batch_size=batch_size)
+        industry_ids = list(Industry.objects.values_list('pk', flat=True))
+
+        application_rows = [
+            Application(
+                name=f'{rng.choice(APPLICATION_WORDS)} {rng.choice(APPLICATION_KINDS)} {i + 1}',
+                slug=f'application-{i + 1}',
+            )
+            for i in range(max(20, size // 20))
+        ]
+        Application.objects.bulk_create(application_rows, batch_size=batch_size)
+        application_ids = list(Application.objects.values_list('pk', flat=True))
+
+        product_rows = []
+        for i in range(size):
+            compound = rng.choice(COMPOUNDS)
+            name = f'{rng.choice(GRADES)} {compound} {i + 1}'
+            specifications = {key: value(rng) for key, value in rng.sample(SPECIFICATIONS, rng.randint(3, 9))}
+            product_rows.append(Product(
+                name=name,
+                slug=f'product-{i + 1}',
+                description=' '.join(rng.sample(SENTENCES, rng.randint(2, 6))),
+                purity=specifications.get('Purity', 'Industrial Grade'),
+                specifications=specifications,
+                packaging=', '.join(rng.sample(PACKAGING, rng.randint(1, 4))),
+                hs_code=f'{rng.randint(2800, 3899)}.{rng.randint(10, 99)}.00',
+                image=rng.choice(product_images),
+                featured=rng.random() < 0.01,
+            ))
+        Product.objects.bulk_create(product_rows, batch_size=batch_size)
+        product_ids = list(Product.objects.values_list('pk', flat=True))
+
+        application_links = []
+        industry_links = []
+        for product_id in product_ids:
+            for position, application_id in enumerate(rng.sample(application_ids, rng.randint(1, 5))):
+                application_links.append(ProductApplication(
+                    product_id=product_id, application_id=application_id, position=position,
+                ))
+            for position, industry_id in enumerate(rng.sample(industry_ids, min(len(industry_ids), rng.randint(1, 3)))):
+                industry_links.append(ProductIndustry(
+                    product_id=product_id, industry_id=industry_id, position=position,
+                ))
+        ProductApplication.objects.bulk_create(application_links, batch_size=batch_size)
+        ProductIndustry.objects.bulk_create(industry_links, batch_size=batch_size)
+
+        FAQ.objects.bulk_create([
+            FAQ(question=f'{rng.choice(SENTENCES)[:-1]}? ({i + 1})', answer=' '.join(rng.sample(SENTENCES, 3)), order=i)
+            for i in range(faqs)
+        ], batch_size=batch_size)
+
+    return {
+        'products': len(product_rows),
+        'industries': len(industry_rows),
+        'applications': len(application_rows),
+        'product_applications': len(application_links),
+        'product_industries': len(industry_links),
+        'faqs': faqs,
+    }
+
+
+def peak_rss_mb(who=None):
+    """Peak resident set size of this process (or its children) so far, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1 << 20 if sys.platform == 'darwin' else 1 << 10), 1)
+
+
+class QueryCounter:
+    """Database execute wrapper that counts queries."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextlib.contextmanager
+def stage(stages, name):
+    """Time a build stage and count the queries it makes."""
+    from django.db import connection
+
+    counter = QueryCounter()
+    started = time.perf_counter()
+    with connection.execute_wrapper(counter):
+        yield stages.setdefault(name, {})
+    stages[name].update(
+        seconds=round(time.perf_counter() - started, 4),
+        queries=counter.count,
+        peak_rss_mb=peak_rss_mb(),
+    )
+
+
+def render_by_view(output_dir, pages):
+    """Render pages serially, as build_site --jobs 1 does. Returns per-view stats."""
+    from django.db import connection
+    from django_distill.renderer import DistillRenderer
+
+    from website.build.deps import DependencyRecorder
+    from website.build.render import render_page
+
+    views = {}
+    with DistillRenderer():
+        for page in pages:
+            view = views.setdefault(page[0], {'pages': 0, 'bytes': 0, 'seconds': 0.0, 'queries': 0})
+            counter = QueryCounter()
+            started = time.perf_counter()
+            with connection.execute_wrapper(counter), DependencyRecorder():
+                written, _files = render_page(output_dir, page)
+            view['seconds'] += time.perf_counter() - started
+            view['pages'] += 1
+            view['bytes'] += written
+            view['queries'] += counter.count
+    for view in views.values():
+        view['pages_per_sec'] = round(view['pages'] / view['seconds'], 1) if view['seconds'] else None
+        view['queries_per_page'] = round(view['queries'] / view['pages'], 2)
+        view['seconds'] = round(view['seconds'], 4)
+    return views
+
+
+def run_size(size, industries, faqs, seed, jobs):
+    """Benchmark one catalogue size in this process. Returns the result dict."""
+    tmp = Path(tempfile.mkdtemp(prefix='bench-build-'))
+    # Build the way deploy.py does, except for links: rendering absolute
+    # links leaves make_portable.py real work to do
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'jaqman_chemicals.settings'
+    os.environ['DEBUG'] = 'False'
+    os.environ['SITE_BASE_URL'] = '/jaqman-chemicals'
+    os.environ['PORTABLE_URLS'] = 'False'
+    os.environ['IMAGE_DERIVATIVES_ON_SAVE'] = 'False'
+    sys.path.insert(0, str(PROJECT_ROOT))
+    sys.path.insert(0, str(Path(__file__).parent))
+
+    import django
+    from django.conf import settings
+
+    from jaqman_chemicals import sqlite
+
+    settings.DATABASE_PATH = tmp / 'db.sqlite3'
+    settings.DATABASES['default'] = sqlite.database(settings.DATABASE_PATH, settings.SQLITE_PROFILE)
+    settings.STATIC_ROOT = tmp / 'staticfiles'
+    settings.BUILD_CACHE_DIR = tmp / '.build'
+    django.setup()
+
+    from django.core.management import call_command
+
+    import deploy
+    import make_portable
+    from website.build import incremental
+    from website.build.render import get_pages
+
+    site_dir = tmp / '_site'
+    site_dir.mkdir()
+    stages = {}
+    try:
+        call_command('migrate', verbosity=0, interactive=False)
+        with stage(stages, 'db_load'):
+            rows = generate_catalogue(size, industries, faqs, seed)
+        with stage(stages, 'collectstatic'):
+            call_command('collectstatic', verbosity=0, interactive=False)
+        with stage(stages, 'snapshot'):
+            incremental.snapshot()
+        with stage(stages, 'page_list') as result:
+            pages = get_pages()
+            result['pages'] = len(pages)
+        with stage(stages, 'render') as result:
+            views = render_by_view(site_dir, pages)
+            result['pages'] = len(pages)
+            result['bytes'] = sum(view['bytes'] for view in views.values())
+        with stage(stages, 'make_portable') as result:
+            result['rewritten'], _skipped, _cache = make_portable.make_portable(site_dir, jobs=jobs)
+
+        # deploy.py syncs _site into the project root; point it at a scratch root
+        deploy.PROJECT_ROOT = tmp / 'checkout'
+        deploy.SITE_DIR = site_dir
+        deploy.PROJECT_ROOT.mkdir()
+        for name in ('deploy_copy', 'deploy_copy_unchanged'):
+            with stage(stages, name), contextlib.redirect_stdout(io.StringIO()):
+                deploy.sync_site_to_root()
+    finally:
+        from django.db import connections
+        connections.close_all()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    build_seconds = sum(stages[name]['seconds'] for name in ('snapshot', 'page_list', 'render'))
+    return {
+        'size': size,
+        'rows': rows,
+        'pages': len(pages),
+        'pages_per_sec': round(len(pages) / build_seconds, 1),
+        'queries': sum(stage['queries'] for stage in stages.values()),
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_rss_children_mb': peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+        'stages': stages,
+        'views': views,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Regressions against a previous run, as messages."""
+    previous = {result['size']: result for result in baseline['results']}
+    problems = []
+    for result in results:
+        old = previous.get(result['size'])
+        if old is None:
+            continue
+        if result['pages_per_sec'] < old['pages_per_sec'] * (1 - tolerance):
+            problems.append(
+                f"{result['size']} products: {result['pages_per_sec']} pages/s, was {old['pages_per_sec']}"
+            )
+        for name, stats in result['stages'].items():
+            old_queries = old['stages'].get(name, {}).get('queries')
+            if old_queries is not None and stats['queries'] > old_queries:
+                problems.append(f"{result['size']} products: {name} made {stats['queries']} queries, was {old_queries}")
+    return problems
+
+
+def print_summary(result):
+    print(f"{result['size']} products: {result['pages']} pages, {result['pages_per_sec']} pages/s, "
+          f"{result['queries']} queries, peak RSS {result['peak_rss_mb']} MB", file=sys.stderr)
+    for name, stats in result['stages'].items():
+        print(f"  {name:<22} {stats['seconds']:8.2f}s  {stats['queries']:>7} queries", file=sys.stderr)
+    for name, stats in result['views'].items():
+        print(f"    {name:<20} {stats['pages']:>7} pages  {stats['seconds']:8.2f}s  "
+              f"{stats['queries_per_page']:>6} queries/page", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the static site build on a synthetic catalogue')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000],
+                        help='Number of products per run (e.g. 1000 10000 100000)')
+    parser.add_argument('--industries', type=int, default=None,
+                        help='Industries per run (default: 1 per 100 products, at least 10)')
+    parser.add_argument('--faqs', type=int, default=None,
+                        help='FAQs per run (default: 1 per 100 products, at least 10)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--jobs', type=int, default=0, help='Worker processes for make_portable (0 = one per CPU)')
+    parser.add_argument('--output', help='Write the JSON results here instead of stdout')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed drop in pages/sec against the baseline (default: 0.2)')
+    parser.add_argument('--run-size', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_size:
+        size = args.run_size
+        # Keep stdout for the JSON result
+        with contextlib.redirect_stdout(sys.stderr):
+            result = run_size(
+                size,
+                args.industries if args.industries is not None else max(10, size // 100),
+                args.faqs if args.faqs is not None else max(10, size // 100),
+                args.seed, args.jobs,
+            )
+        json.dump(result, sys.stdout)
+        return 0
+
+    results = []
+    for size in args.sizes:
+        command = [sys.executable, __file__, '--run-size', str(size), '--seed', str(args.seed), '--jobs', str(args.jobs)]
+        if args.industries is not None:
+            command += ['--industries', str(args.industries)]
+        if args.faqs is not None:
+            command += ['--faqs', str(args.faqs)]
+        completed = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+        if completed.returncode:
+            print(f'Benchmark for {size} products failed', file=sys.stderr)
+            return completed.returncode
+        results.append(json.loads(completed.stdout))
+        print_summary(results[-1])
+
+    import django
+    report = {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            problems = compare(results, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f'REGRESSION: {problem}', file=sys.stderr)
+        if problems:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Benchmark for scripts/make_portable.py.
+
+Builds a synthetic _site of N pages (default 10,000) in a temporary
+directory, then times the previous regex-cascade implementation against
+the single-pass rewriter, checks both produce identical files, and times
+a second run of the rewriter where every file is skipped by its hash.
+
+Usage: python scripts/bench_make_portable.py [--pages 10000] [--jobs N]
+"""
+import argparse
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import make_portable  # noqa: E402
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <link rel="icon" type="image/webp" href="/static/images/jaqman-logo.webp">
+    <link rel="stylesheet" href="/static/css/main.css?v=2">
+    <link rel="stylesheet" href="/static/css/components.css?v=6">
+    <link rel="stylesheet" href="/static/css/hero-modern.css?v=19">
+    <style>.hero {{ background-image: url('/static/images/hero.webp'); }}</style>
+</head>
+<body>
+    <nav class="navbar">
+        <a href="/jaqman-chemicals/" class="navbar-logo">JAQMAN CHEMICALS</a>
+        <ul class="navbar-menu">
+            <li><a href="/jaqman-chemicals/about/">About</a></li>
+            <li><a href="/jaqman-chemicals/products/">Products</a></li>
+            <li><a href="/industries/">Industries</a></li>
+            <li><a href="/resources/">Resources</a></li>
+            <li><a href="/contact/">Contact</a></li>
+        </ul>
+    </nav>
+    <main>
+        <h1>{title}</h1>
+        <img src="/media/products/{slug}.webp" alt="{title}">
+        <div style="background: url(&quot;x&quot;)"></div>
+        <div style='background-image: url("/media/industries/{slug}.webp")'></div>
+        <p>{body}</p>
+        <a href="/contact/?product={slug}">Request a Quote</a>
+        <a href="/products/{slug}/">Permalink</a>
+        <a href="/">Home</a>
+        <a href="https://wa.me/?text={slug}">Share</a>
+    </main>
+    <script src="/static/js/main.js?v=3" defer></script>
+</body>
+</html>
+'''
+
+
+def legacy_process_html_file(file_path, site_dir):
+    """The regex cascade make_portable.py used before the single-pass rewriter."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    prefix = make_portable.get_relative_prefix(file_path, site_dir)
+
+    content = re.sub(r'(href|src)="/static/', rf'\1="{prefix}static/', content)
+    content = re.sub(r'(href|src)="/media/', rf'\1="{prefix}media/', content)
+    content = re.sub(r'href="/jaqman-chemicals/([^"]*)"', rf'href="{prefix}\1"', content)
+    pages = ['about', 'products', 'industries', 'resources', 'contact']
+    for page in pages:
+        content = re.sub(rf'href="/{page}(/[^"]*)?"', rf'href="{prefix}{page}\1"' if page else rf'href="{prefix}{page}/"', content)
+    content = re.sub(r'href="/"', f'href="{prefix}"', content)
+    content = re.sub(r'href="/([^"?]+)\?([^"]*)"', rf'href="{prefix}\1?\2"', content)
+    content = re.sub(r"url\('/static/", f"url('{prefix}static/", content)
+    content = re.sub(r'url\("/static/', f'url("{prefix}static/', content)
+    content = re.sub(r"url\('/media/", f"url('{prefix}media/", content)
+    content = re.sub(r'url\("/media/', f'url("{prefix}media/', content)
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def generate_site(site_dir, pages):
+    """Write a synthetic _site: top-level pages plus one detail page per product."""
+    # Roughly the size of a rendered product page (~19 KB)
+    body = 'Industrial grade solvent for coatings, adhesives and inks. ' * 300
+    for name in ('', 'about', 'products', 'industries', 'resources', 'contact'):
+        page_dir = site_dir / name if name else site_dir
+        page_dir.mkdir(parents=True, exist_ok=True)
+        (page_dir / 'index.html').write_text(
+            PAGE_TEMPLATE.format(title=name or 'Home', slug=name or 'home', body=body), encoding='utf-8')
+    for i in range(max(0, pages - 6)):
+        slug = f'product-{i}'
+        page_dir = site_dir / 'products' / slug
+        page_dir.mkdir(parents=True)
+        (page_dir / 'index.html').write_text(
+            PAGE_TEMPLATE.format(title=f'Product {i}', slug=slug, body=body), encoding='utf-8')
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark make_portable.py on a synthetic site')
+    parser.add_argument('--pages', type=int, default=10000)
+    parser.add_argument('--jobs', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_dir = Path(tmp) / 'legacy'
+        new_dir = Path(tmp) / 'single_pass'
+        generate_site(legacy_dir, args.pages)
+        shutil.copytree(legacy_dir, new_dir)
+        files = sorted(legacy_dir.rglob('*.html'))
+        print(f'Synthetic site: {len(files)} pages')
+
+        legacy_time, _ = timed(lambda: [legacy_process_html_file(f, legacy_dir) for f in files])
+        new_time, (processed, _, cache) = timed(make_portable.make_portable, new_dir, jobs=args.jobs)
+        serial_dir = Path(tmp) / 'serial'
+        generate_site(serial_dir, args.pages)
+        serial_time, _ = timed(make_portable.make_portable, serial_dir, jobs=1)
+        cached_time, (_, skipped, _) = timed(make_portable.make_portable, new_dir, jobs=args.jobs, cache=cache)
+
+        mismatches = [
+            f for f in files
+            if f.read_bytes() != (new_dir / f.relative_to(legacy_dir)).read_bytes()
+        ]
+
+    print(f'  regex cascade (serial):     {legacy_time:7.2f}s')
+    print(f'  single pass (1 job):        {serial_time:7.2f}s  ({legacy_time / serial_time:.1f}x)')
+    print(f'  single pass (parallel):     {new_time:7.2f}s  ({legacy_time / new_time:.1f}x), {processed} rewritten')
+    print(f'  single pass (unchanged):    {cached_time:7.2f}s  ({legacy_time / cached_time:.1f}x), {skipped} skipped')
+    if mismatches:
+        print(f'  OUTPUT MISMATCH in {len(mismatches)} files, e.g. {mismatches[0].relative_to(legacy_dir)}')
+        return 1
+    print('  Output identical to the regex cascade.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
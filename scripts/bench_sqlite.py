@@ -0,0 +1,307 @@
+"""
+Benchmark for the SQLite connection profiles (jaqman_chemicals/sqlite.py).
+
+Fills a temporary database with the synthetic catalogue from
+bench_build.py, then runs the same workloads against a fresh copy of it
+under each profile, each in its own process:
+
+    build    render every page serially, as build_site --jobs 1 does
+    reads    product pages requested one after another through the WSGI
+             handler, as the live site serves them
+    writes   product edits committed one after another, as from the admin
+    mixed    --readers processes requesting pages while --writers
+             processes edit products, all at once; counts the requests
+             and edits that failed (e.g. "database is locked")
+
+The write workloads are skipped for the read-only profiles.
+
+Usage: python scripts/bench_sqlite.py [--size 1000] [--profiles default serve build immutable]
+       python scripts/bench_sqlite.py --seconds 10 --readers 4 --writers 2 --output sqlite.json
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+READ_ONLY_PROFILES = ('build', 'immutable')
+
+
+def setup(database_path, profile, tmp):
+    """Set up Django in this process against database_path, using the named profile."""
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'jaqman_chemicals.settings'
+    os.environ['DEBUG'] = 'False'
+    os.environ['PORTABLE_URLS'] = 'False'
+    os.environ['PAGE_CACHE'] = 'False'
+    os.environ['IMAGE_DERIVATIVES_ON_SAVE'] = 'False'
+    sys.path.insert(0, str(PROJECT_ROOT))
+    sys.path.insert(0, str(Path(__file__).parent))
+
+    import django
+    from django.conf import settings
+
+    from jaqman_chemicals import sqlite
+
+    settings.DATABASE_PATH = Path(database_path)
+    settings.DATABASES['default'] = sqlite.database(database_path, profile)
+    settings.STATIC_ROOT = Path(tmp) / 'staticfiles'
+    settings.BUILD_CACHE_DIR = Path(tmp) / f'.build-{profile}'
+    settings.ALLOWED_HOSTS = ['*']
+    django.setup()
+
+
+def prepare(tmp, size, seed):
+    """Create the template database and collect static files into tmp."""
+    from django.core.management import call_command
+    from django.db import connection
+
+    from bench_build import generate_catalogue
+
+    call_command('migrate', verbosity=0, interactive=False)
+    generate_catalogue(size, max(10, size // 100), max(10, size // 100), seed)
+    call_command('collectstatic', verbosity=0, interactive=False)
+    connection.close()
+
+
+def latency_stats(latencies):
+    """Median, 95th percentile and worst of a list of seconds, in ms."""
+    if not latencies:
+        return {'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+    latencies = sorted(latencies)
+    return {
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p95_ms': round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2),
+    }
+
+
+def product_slugs():
+    from website.models import Product
+    return list(Product.objects.values_list('slug', flat=True))
+
+
+def read_loop(seconds, seed):
+    """Request product pages until `seconds` are up. Returns (requests, failures, latencies)."""
+    from django_distill.errors import DistillRenderError
+
+    from website.build.render import render_uri
+
+    rng = random.Random(seed)
+    slugs = product_slugs()
+    requests = failures = 0
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            render_uri(f'/products/{rng.choice(slugs)}/', (200,))
+        except DistillRenderError:
+            failures += 1
+        latencies.append(time.perf_counter() - started)
+        requests += 1
+    return requests, failures, latencies
+
+
+def write_loop(seconds, seed):
+    """Edit products until `seconds` are up. Returns (edits, failures, latencies)."""
+    from django.db import OperationalError, close_old_connections, transaction
+
+    from website.models import Product
+
+    rng = random.Random(seed)
+    pks = list(Product.objects.values_list('pk', flat=True))
+    edits = failures = 0
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        # Each edit is a request of its own, as in the admin
+        close_old_connections()
+        started = time.perf_counter()
+        try:
+            with transaction.atomic():
+                product = Product.objects.get(pk=rng.choice(pks))
+                product.hs_code = f'{rng.randint(2800, 3899)}.{rng.randint(10, 99)}.00'
+                product.save()
+        except OperationalError:
+            failures += 1
+        latencies.append(time.perf_counter() - started)
+        edits += 1
+    close_old_connections()
+    return edits, failures, latencies
+
+
+def loop_result(count, failures, latencies, seconds):
+    return {'per_sec': round(count / seconds, 1), 'count': count, 'failures': failures, **latency_stats(latencies)}
+
+
+def mixed_worker(role, database_path, profile, tmp, seconds, seed, barrier, results):
+    """One process of the mixed workload: a reader or a writer."""
+    with contextlib.redirect_stdout(sys.stderr):
+        setup(database_path, profile, tmp)
+        barrier.wait()
+        loop = read_loop if role == 'reader' else write_loop
+        results.put((role, loop(seconds, seed)))
+
+
+def run_mixed(database_path, profile, tmp, seconds, readers, writers):
+    """Readers and writers in separate processes, started together."""
+    context = multiprocessing.get_context('spawn')
+    roles = ['reader'] * readers + ['writer'] * writers
+    barrier = context.Barrier(len(roles))
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=mixed_worker,
+            args=(role, str(database_path), profile, str(tmp), seconds, seed, barrier, results),
+        )
+        for seed, role in enumerate(roles)
+    ]
+    for process in processes:
+        process.start()
+    totals = {role: {'count': 0, 'failures': 0, 'latencies': []} for role in ('reader', 'writer')}
+    for _ in processes:
+        role, (count, failures, latencies) = results.get()
+        totals[role]['count'] += count
+        totals[role]['failures'] += failures
+        totals[role]['latencies'] += latencies
+    for process in processes:
+        process.join()
+    return {
+        f'{role}s': loop_result(total['count'], total['failures'], total['latencies'], seconds)
+        for role, total in totals.items()
+    }
+
+
+def run_profile(profile, tmp, seconds, readers, writers, seed):
+    """Benchmark one profile in this process. Returns the result dict."""
+    database_path = Path(tmp) / f'{profile}.sqlite3'
+    setup(database_path, profile, tmp)
+
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+
+    from website.build import incremental
+    from website.build.render import get_pages, render_pages
+
+    connections_opened = []
+    connection_created.connect(lambda sender, connection, **kwargs: connections_opened.append(1), weak=False)
+
+    result = {'profile': profile}
+    site_dir = Path(tmp) / f'_site-{profile}'
+    started = time.perf_counter()
+    incremental.snapshot()
+    pages = get_pages()
+    render_pages(site_dir, pages)
+    build_seconds = time.perf_counter() - started
+    result['build'] = {
+        'pages': len(pages),
+        'seconds': round(build_seconds, 3),
+        'pages_per_sec': round(len(pages) / build_seconds, 1),
+        'connections': len(connections_opened),
+    }
+    shutil.rmtree(site_dir, ignore_errors=True)
+
+    del connections_opened[:]
+    result['reads'] = loop_result(*read_loop(seconds, seed), seconds)
+    result['reads']['connections'] = len(connections_opened)
+
+    if profile not in READ_ONLY_PROFILES:
+        result['writes'] = loop_result(*write_loop(seconds, seed), seconds)
+        connection.close()
+        result['mixed'] = run_mixed(database_path, profile, tmp, seconds, readers, writers)
+    connection.close()
+    return result
+
+
+def print_summary(result):
+    build = result['build']
+    print(f"{result['profile']}: build {build['pages']} pages in {build['seconds']:.2f}s "
+          f"({build['pages_per_sec']} pages/s, {build['connections']} connections)", file=sys.stderr)
+    rows = [('reads', result['reads'])]
+    if 'writes' in result:
+        rows += [('writes', result['writes'])]
+        rows += [(f'mixed {name}', stats) for name, stats in result['mixed'].items()]
+    for name, stats in rows:
+        print(f"  {name:<14} {stats['per_sec']:>8}/s  p50 {stats['p50_ms']} ms  p95 {stats['p95_ms']} ms  "
+              f"max {stats['max_ms']} ms  {stats['failures']} failed", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the SQLite connection profiles')
+    parser.add_argument('--size', type=int, default=1000, help='Products in the synthetic catalogue')
+    parser.add_argument('--profiles', nargs='+', default=['default', 'serve', 'build', 'immutable'])
+    parser.add_argument('--seconds', type=float, default=5, help='Duration of each read/write workload')
+    parser.add_argument('--readers', type=int, default=3, help='Reader processes in the mixed workload')
+    parser.add_argument('--writers', type=int, default=2, help='Writer processes in the mixed workload')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the JSON results here instead of stdout')
+    parser.add_argument('--prepare', help=argparse.SUPPRESS)
+    parser.add_argument('--run-profile', help=argparse.SUPPRESS)
+    parser.add_argument('--tmp', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Keep stdout for the JSON result
+    if args.prepare:
+        with contextlib.redirect_stdout(sys.stderr):
+            setup(Path(args.prepare) / 'template.sqlite3', 'default', args.prepare)
+            prepare(args.prepare, args.size, args.seed)
+        return 0
+    if args.run_profile:
+        with contextlib.redirect_stdout(sys.stderr):
+            result = run_profile(args.run_profile, args.tmp, args.seconds, args.readers, args.writers, args.seed)
+        json.dump(result, sys.stdout)
+        return 0
+
+    tmp = Path(tempfile.mkdtemp(prefix='bench-sqlite-'))
+    results = []
+    try:
+        command = [sys.executable, __file__, '--prepare', str(tmp), '--size', str(args.size), '--seed', str(args.seed)]
+        if subprocess.run(command).returncode:
+            print('Creating the benchmark database failed', file=sys.stderr)
+            return 1
+        for profile in args.profiles:
+            shutil.copyfile(tmp / 'template.sqlite3', tmp / f'{profile}.sqlite3')
+            command = [
+                sys.executable, __file__, '--run-profile', profile, '--tmp', str(tmp),
+                '--seconds', str(args.seconds), '--readers', str(args.readers),
+                '--writers', str(args.writers), '--seed', str(args.seed),
+            ]
+            completed = subprocess.run(command, stdout=subprocess.PIPE, text=True)
+            if completed.returncode:
+                print(f'Benchmark for the {profile} profile failed', file=sys.stderr)
+                return completed.returncode
+            results.append(json.loads(completed.stdout))
+            print_summary(results[-1])
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    import sqlite3
+    report = {
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'size': args.size,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,8 +2,10 @@
 Deploy script for GitHub Pages.
 This script automates the complete build and deployment process.
 
-Usage: python scripts/deploy.py
+Usage: python scripts/deploy.py [--full-copy]
 """
+import argparse
+import hashlib
 import os
 import shutil
 import subprocess
@@ -22,6 +24,8 @@ PROTECTED_ITEMS = {
     '.env',
     'venv',
     'db.sqlite3',
+    'db.sqlite3-wal',
+    'db.sqlite3-shm',
     'manage.py',
     'requirements.txt',
     'jaqman_chemicals',
@@ -30,6 +34,7 @@ PROTECTED_ITEMS = {
     'scripts',
     'staticfiles',
     '_site',
+    '.build',
     '.agent',
 }
 
@@ -84,7 +89,115 @@ def copy_site_to_root():
     
     return True
 
+def iter_deployable_files(root):
+    """Yield paths (relative to root) of every file outside PROTECTED_ITEMS."""
+    for item in root.iterdir():
+        if item.name in PROTECTED_ITEMS:
+            continue
+        if item.is_dir() and not item.is_symlink():
+            for dirpath, _dirnames, filenames in os.walk(item):
+                for filename in filenames:
+                    yield (Path(dirpath) / filename).relative_to(root)
+        else:
+            yield item.relative_to(root)
+
+def file_digest(path):
+    """Content hash of a file, read in 1 MB blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def same_content(source, dest):
+    """True if dest already holds source's content."""
+    source_size, dest_size = source.stat().st_size, dest.stat().st_size
+    if source_size != dest_size:
+        return False
+    return file_digest(source) == file_digest(dest)
+
+def is_hardlink(source, dest):
+    """True if dest and source are the same file (left by older deploys, which hardlinked)."""
+    source_stat, dest_stat = source.stat(), dest.stat()
+    return (source_stat.st_dev, source_stat.st_ino) == (dest_stat.st_dev, dest_stat.st_ino)
+
+def place_file(source, dest):
+    """
+    Copy source to dest. Not a hardlink: builds write into _site in
+    place, which would silently change the deployed file too.
+    """
+    for parent in reversed(dest.relative_to(PROJECT_ROOT).parents):
+        path = PROJECT_ROOT / parent
+        if path.is_file() or path.is_symlink():
+            path.unlink()
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.is_dir() and not dest.is_symlink():
+        shutil.rmtree(dest)
+    tmp = dest.with_name(dest.name + '.deploy-tmp')
+    shutil.copy2(source, tmp)
+    os.replace(tmp, dest)
+
+def remove_empty_dirs(root):
+    """Remove directories left empty by the sync, outside PROTECTED_ITEMS."""
+    for item in root.iterdir():
+        if item.name in PROTECTED_ITEMS or not item.is_dir() or item.is_symlink():
+            continue
+        for dirpath, _dirnames, _filenames in sorted(os.walk(item), reverse=True):
+            if not os.listdir(dirpath):
+                os.rmdir(dirpath)
+
+def sync_site_to_root():
+    """
+    Make the project root match _site by content: add new files, replace
+    changed ones and remove stale ones, leaving unchanged files untouched
+    so their mtimes (and git's index) stay valid.
+    """
+    print("\n🔄 Syncing _site contents to root...")
+
+    if not SITE_DIR.exists():
+        print(f"❌ Error: {SITE_DIR} does not exist!")
+        return False
+
+    source_files = set(iter_deployable_files(SITE_DIR))
+    deployed_files = set(iter_deployable_files(PROJECT_ROOT))
+    summary = {'added': [0, 0], 'changed': [0, 0], 'removed': [0, 0], 'unchanged': [0, 0]}
+
+    for relative in sorted(deployed_files - source_files):
+        dest = PROJECT_ROOT / relative
+        if dest.is_file() or dest.is_symlink():
+            summary['removed'][0] += 1
+            summary['removed'][1] += dest.lstat().st_size
+            dest.unlink()
+
+    for relative in sorted(source_files):
+        source = SITE_DIR / relative
+        dest = PROJECT_ROOT / relative
+        size = source.stat().st_size
+        if relative not in deployed_files:
+            kind = 'added'
+        elif same_content(source, dest):
+            kind = 'unchanged'
+        else:
+            kind = 'changed'
+        if kind != 'unchanged' or is_hardlink(source, dest):
+            place_file(source, dest)
+        summary[kind][0] += 1
+        summary[kind][1] += size
+
+    remove_empty_dirs(PROJECT_ROOT)
+
+    for kind, (count, size) in summary.items():
+        print(f"  {kind.capitalize():<10} {count:>6} files  {size / 1024:>10.1f} KB")
+    return True
+
 def main():
+    parser = argparse.ArgumentParser(description="Build and deploy the site to GitHub Pages")
+    parser.add_argument('--full-copy', action='store_true',
+                        help="Delete the old deployment and copy all of _site instead of syncing changes")
+    parser.add_argument('--skip-check', action='store_true',
+                        help="Deploy even if check_site finds broken links or missing assets")
+    args = parser.parse_args()
+
     print("""
 ╔══════════════════════════════════════════════════════════════╗
 ║           JAQMAN CHEMICALS DEPLOYMENT SCRIPT                  ║
@@ -98,26 +211,39 @@ def main():
     os.environ['SITE_BASE_URL'] = '/jaqman-chemicals'
     # Force DEBUG to False for production security/behavior
     os.environ['DEBUG'] = 'False'
+    # Write relative links at render time (replaces scripts/make_portable.py)
+    os.environ['PORTABLE_URLS'] = 'True'
+    # Absolute URLs for the sitemap and product structured data
+    os.environ.setdefault('SITE_ORIGIN', 'https://mohamdashiq.github.io')
+    # The build only reads the database (see jaqman_chemicals/sqlite.py)
+    os.environ['SQLITE_PROFILE'] = 'build'
+    # Lean settings without the admin (see jaqman_chemicals/settings_build.py)
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'jaqman_chemicals.settings_build'
     print(f"   Set SITE_BASE_URL = {os.environ['SITE_BASE_URL']}")
     print(f"   Set DEBUG = {os.environ['DEBUG']}")
+    print(f"   Set PORTABLE_URLS = {os.environ['PORTABLE_URLS']}")
+    print(f"   Set SITE_ORIGIN = {os.environ['SITE_ORIGIN']}")
+    print(f"   Set SQLITE_PROFILE = {os.environ['SQLITE_PROFILE']}")
+    print(f"   Set DJANGO_SETTINGS_MODULE = {os.environ['DJANGO_SETTINGS_MODULE']}")
     
-    # Step 1: Collect static files
-    if not run_command("python manage.py collectstatic --noinput", "Collecting static files"):
-        return 1
-    
-    # Step 2: Generate static site with django-distill
-    if not run_command("python manage.py distill-local _site --force", "Generating static site"):
+    # Steps 1-3: Collect static files, encode responsive variants of uploaded
+    # images (unchanged ones are skipped) and generate the static site (one
+    # worker per CPU) with minified pages and inlined critical CSS, all in
+    # one process
+    if not run_command("python manage.py build _site --force --jobs 0 --optimize", "Building the static site"):
         return 1
-    
-    # Step 3: Run make_portable to fix paths
-    if not run_command("python scripts/make_portable.py", "Making paths portable"):
+
+    # Don't deploy a site with broken links or missing images
+    if not args.skip_check and not run_command("python manage.py check_site _site --jobs 0", "Checking links and assets"):
+        print("   Fix the problems above, or deploy anyway with --skip-check")
         return 1
     
-    # Step 4: Clean old deployment files from root
-    clean_old_deployment()
-    
-    # Step 5: Copy _site contents to root
-    if not copy_site_to_root():
+    # Steps 4-5: Replace the old deployment in root with _site contents
+    if args.full_copy:
+        clean_old_deployment()
+        if not copy_site_to_root():
+            return 1
+    elif not sync_site_to_root():
         return 1
     
     # Step 6: Git add, commit and push
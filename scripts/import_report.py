@@ -0,0 +1,159 @@
+"""
+Import-time report for Django startup.
+
+Runs Django setup (or a manage.py command) under `python -X importtime`
+and summarises where the time went: total import time, time per package
+and the slowest modules, counting each module's own import time once.
+Run it with two settings modules to see what a settings change saves.
+
+Results can be written as JSON. With --baseline, the run fails if total
+import time grew by more than --tolerance.
+
+Usage: python scripts/import_report.py
+       python scripts/import_report.py --settings jaqman_chemicals.settings_build
+       python scripts/import_report.py --settings jaqman_chemicals.settings_build -- build_site --help
+       python scripts/import_report.py --output imports.json --baseline imports-main.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# -X importtime only reports the import statement, so route
+# importlib.import_module (which Django loads settings, apps and URLconfs
+# with) through it
+BOOTSTRAP = '''
+import importlib.util
+import sys
+
+def import_module(name, package=None):
+    name = importlib.util.resolve_name(name, package)
+    __import__(name)
+    return sys.modules[name]
+
+importlib.import_module = import_module
+'''
+
+# Django setup plus loading the URLconf, which imports every view
+SETUP = BOOTSTRAP + 'import django; django.setup(); from django.urls import get_resolver; get_resolver().url_patterns'
+
+MANAGE = BOOTSTRAP + 'import runpy; sys.argv[0] = "manage.py"; runpy.run_path("manage.py", run_name="__main__")'
+
+LINE_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(output):
+    """[(module, self µs, cumulative µs, depth)] from -X importtime output, in import order."""
+    imports = []
+    for line in output.splitlines():
+        match = LINE_PATTERN.match(line)
+        if match:
+            own, cumulative, indent, module = match.groups()
+            imports.append((module, int(own), int(cumulative), len(indent) // 2))
+    return imports
+
+
+def package_of(module, depth):
+    return '.'.join(module.split('.')[:depth])
+
+
+def summarise(imports, depth, top):
+    """Totals for a parsed run: overall, per package and the slowest modules."""
+    packages = defaultdict(lambda: {'modules': 0, 'self_ms': 0.0})
+    for module, own, _cumulative, _level in imports:
+        package = packages[package_of(module, depth)]
+        package['modules'] += 1
+        package['self_ms'] += own / 1000
+    by_cumulative = sorted(imports, key=lambda row: row[2], reverse=True)
+    return {
+        'modules': len(imports),
+        'total_ms': round(sum(own for _module, own, _cumulative, _level in imports) / 1000, 1),
+        'packages': sorted(
+            ({'package': name, 'modules': stats['modules'], 'self_ms': round(stats['self_ms'], 1)}
+             for name, stats in packages.items()),
+            key=lambda row: row['self_ms'], reverse=True,
+        )[:top],
+        'slowest': [
+            {'module': module, 'self_ms': round(own / 1000, 1), 'cumulative_ms': round(cumulative / 1000, 1)}
+            for module, own, cumulative, _level in by_cumulative[:top]
+        ],
+    }
+
+
+def run(settings_module, command):
+    """Run Django setup, or a manage.py command, with -X importtime. Returns its stderr."""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module)
+    if command:
+        args = [sys.executable, '-X', 'importtime', '-c', MANAGE, *command]
+    else:
+        args = [sys.executable, '-X', 'importtime', '-c', SETUP]
+    completed = subprocess.run(args, cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True)
+    if completed.returncode:
+        sys.stderr.write(completed.stderr[-2000:])
+        raise SystemExit(f'{" ".join(command) or "Django setup"} failed with exit code {completed.returncode}')
+    return completed.stderr
+
+
+def print_summary(settings_module, summary):
+    print(f"{settings_module}: {summary['modules']} modules imported in {summary['total_ms']} ms", file=sys.stderr)
+    print('  by package (own import time)', file=sys.stderr)
+    for row in summary['packages']:
+        print(f"    {row['package']:<40} {row['self_ms']:8.1f} ms  {row['modules']:>4} modules", file=sys.stderr)
+    print('  slowest imports (including what they import)', file=sys.stderr)
+    for row in summary['slowest']:
+        print(f"    {row['module']:<40} {row['cumulative_ms']:8.1f} ms", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarise the import time of Django startup')
+    parser.add_argument('--settings', nargs='+', default=[os.environ.get('DJANGO_SETTINGS_MODULE') or 'jaqman_chemicals.settings'],
+                        help='Settings modules to compare (default: DJANGO_SETTINGS_MODULE)')
+    parser.add_argument('--depth', type=int, default=3,
+                        help='Group modules by this many leading name parts (default: 3)')
+    parser.add_argument('--top', type=int, default=15, help='Rows per table (default: 15)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Runs per settings module; the fastest is reported (default: 3)')
+    parser.add_argument('--output', help='Write the JSON results here')
+    parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Allowed growth in total import time against the baseline (default: 0.2)')
+    parser.add_argument('command', nargs=argparse.REMAINDER,
+                        help='manage.py command to time instead of Django setup, after --')
+    args = parser.parse_args()
+    command = args.command[1:] if args.command[:1] == ['--'] else args.command
+
+    results = {}
+    for settings_module in args.settings:
+        runs = [summarise(parse_importtime(run(settings_module, command)), args.depth, args.top)
+                for _ in range(max(1, args.repeat))]
+        results[settings_module] = min(runs, key=lambda summary: summary['total_ms'])
+        print_summary(settings_module, results[settings_module])
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'command': command, 'results': results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        problems = [
+            f"{name}: {summary['total_ms']} ms, was {baseline[name]['total_ms']} ms"
+            for name, summary in results.items()
+            if name in baseline and summary['total_ms'] > baseline[name]['total_ms'] * (1 + args.tolerance)
+        ]
+        for problem in problems:
+            print(f'REGRESSION: {problem}', file=sys.stderr)
+        if problems:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
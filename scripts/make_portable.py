@@ -1,75 +1,171 @@
 """
 Post-process script for GitHub Pages deployment.
 Converts absolute URL paths to relative paths for portable deployment.
+
+All rewrites are done by one compiled pattern in a single pass per file,
+files are processed in parallel, and files whose content hash matches the
+output of the previous run are skipped.
+
+Usage: python scripts/make_portable.py [--jobs N] [--no-cache]
 """
+import argparse
+import hashlib
+import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-SITE_DIR = Path(__file__).parent.parent / '_site'
+PROJECT_ROOT = Path(__file__).parent.parent
+SITE_DIR = PROJECT_ROOT / '_site'
+CACHE_FILE = PROJECT_ROOT / '.build' / 'make_portable.json'
+
+# Top-level pages whose absolute links (href="/about/...") are made relative
+PAGES = ('about', 'products', 'industries', 'resources', 'contact')
+
+# Matches the quote and leading slash of href="/...", src="/...", url('/...)
+# and url("/...), or a whole srcset="..." value. Starting on the quote keeps
+# the scan fast; the lookbehinds then check which attribute or function it
+# belongs to.
+LINK_PATTERN = re.compile(
+    r"""(["'])/(?:(?<=href="/)|(?<=src="/)|(?<=url\("/)|(?<=url\('/))|(?<=srcset=)"(?P<srcset>[^"]*)(?=")""")
+# The leading slash of each /static/ or /media/ URL in a srcset candidate list
+SRCSET_URL = re.compile(r'(^|,)(\s*)/(?=(?:static|media)/)')
+PAGE_PATTERN = re.compile(r'(?:%s)(?:/|\Z)' % '|'.join(PAGES))
+BASE_PATH = 'jaqman-chemicals/'
 
-def get_relative_prefix(file_path):
+
+def get_relative_prefix(file_path, site_dir=SITE_DIR):
     """Calculate relative prefix based on directory depth from _site root."""
-    relative_path = file_path.relative_to(SITE_DIR)
+    relative_path = file_path.relative_to(site_dir)
     # Count directory levels (subtract 1 if it's an index.html file)
     depth = len(relative_path.parts) - 1  # -1 for the filename itself
     if depth == 0:
         return './'
     return '../' * depth
 
-def process_html_file(file_path):
-    """Convert absolute paths to relative paths in HTML file."""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    prefix = get_relative_prefix(file_path)
-    
-    # Replace absolute static/media paths with relative
-    # Pattern: href="/static/ or src="/static/
-    content = re.sub(r'(href|src)="/static/', rf'\1="{prefix}static/', content)
-    content = re.sub(r'(href|src)="/media/', rf'\1="{prefix}media/', content)
-    
-    # Replace internal page links that still use absolute paths
-    # Pattern: href="/jaqman-chemicals/path/"
-    content = re.sub(r'href="/jaqman-chemicals/([^"]*)"', rf'href="{prefix}\1"', content)
-    
-    # Also handle any remaining absolute page links like href="/about/"
-    # These would be internal links without the base prefix
-    pages = ['about', 'products', 'industries', 'resources', 'contact']
-    for page in pages:
-        # Match href="/page/" or href="/page" 
-        content = re.sub(rf'href="/{page}(/[^"]*)?"', rf'href="{prefix}{page}\1"' if page else rf'href="{prefix}{page}/"', content)
-    
-    # Handle home page links - convert href="/" to relative
-    content = re.sub(r'href="/"', f'href="{prefix}"', content)
-    
-    # Handle URL patterns with query strings like href="/contact/?product=..."
-    content = re.sub(r'href="/([^"?]+)\?([^"]*)"', rf'href="{prefix}\1?\2"', content)
-    
-    # Handle background-image urls in inline styles (both single and double quotes)
-    content = re.sub(r"url\('/static/", f"url('{prefix}static/", content)
-    content = re.sub(r'url\("/static/', f'url("{prefix}static/', content)
-    content = re.sub(r"url\('/media/", f"url('{prefix}media/", content)
-    content = re.sub(r'url\("/media/', f'url("{prefix}media/', content)
-    
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.write(content)
-    
-    print(f'Processed: {file_path.relative_to(SITE_DIR)}')
-
-def main():
+
+def rewrite_links(content, prefix):
+    """Rewrite every absolute static/media/page link in content to be relative to prefix."""
+    pieces = []
+    position = 0
+    for match in LINK_PATTERN.finditer(content):
+        if match.group('srcset') is not None:
+            # srcset="/media/a-320w.webp 320w, /media/a-640w.webp 640w"
+            start, end = match.span('srcset')
+            pieces.append(content[position:start])
+            pieces.append(SRCSET_URL.sub(lambda m: m.group(1) + m.group(2) + prefix, match.group('srcset')))
+            position = end
+            continue
+        start, end = match.span()
+        quote = match.group(1)
+        skip = 0
+        if content.startswith(('static/', 'media/'), end):
+            # href/src="/static/... and url('/media/... in inline styles
+            pass
+        elif content[start - 4:start] in ('url(', 'src='):
+            continue
+        else:
+            close = content.find('"', end)
+            if close == -1:
+                continue
+            path = content[end:close]
+            if path.startswith(BASE_PATH):
+                # href="/jaqman-chemicals/path/" (links rendered with SITE_BASE_URL)
+                skip = len(BASE_PATH)
+            elif not (not path                            # href="/"
+                      or PAGE_PATTERN.match(path)         # href="/about/..."
+                      or path.find('?') > 0):             # href="/page/?query"
+                continue
+        pieces.append(content[position:start])
+        pieces.append(quote + prefix)
+        position = end + skip
+    if not pieces:
+        return content
+    pieces.append(content[position:])
+    return ''.join(pieces)
+
+
+def process_html_file(file_path, known_hash=None, site_dir=SITE_DIR):
+    """
+    Convert absolute paths to relative paths in one HTML file.
+    Returns (relative path, hash of the portable content, whether it was rewritten).
+    """
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    relative = file_path.relative_to(site_dir).as_posix()
+    digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+    if digest == known_hash:
+        return relative, digest, False
+
+    content = rewrite_links(raw.decode('utf-8'), get_relative_prefix(file_path, site_dir))
+    data = content.encode('utf-8')
+    if data != raw:
+        with open(file_path, 'wb') as f:
+            f.write(data)
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    return relative, digest, True
+
+
+def _process_chunk(args):
+    site_dir, items = args
+    return [process_html_file(path, known_hash, site_dir) for path, known_hash in items]
+
+
+def load_cache():
+    try:
+        with open(CACHE_FILE, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache):
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, separators=(',', ':'))
+
+
+def make_portable(site_dir=SITE_DIR, jobs=None, cache=None):
+    """
+    Process every HTML file under site_dir.
+    Returns (processed count, skipped count, updated cache).
+    """
+    cache = cache or {}
+    html_files = sorted(site_dir.rglob('*.html'))
+    items = [(path, cache.get(path.relative_to(site_dir).as_posix())) for path in html_files]
+    jobs = jobs or os.cpu_count() or 1
+
+    if jobs == 1 or len(items) < 2:
+        results = _process_chunk((site_dir, items))
+    else:
+        size = max(1, min(256, -(-len(items) // (jobs * 4))))
+        chunks = [(site_dir, items[i:i + size]) for i in range(0, len(items), size)]
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = [result for chunk in executor.map(_process_chunk, chunks) for result in chunk]
+
+    new_cache = {relative: digest for relative, digest, _ in results}
+    processed = sum(1 for _, _, rewritten in results if rewritten)
+    return processed, len(results) - processed, new_cache
+
+
+def main(argv=None):
     """Process all HTML files in the _site directory."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=0, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--no-cache', action='store_true', help='Process every file, even if unchanged')
+    args = parser.parse_args(argv)
+
     if not SITE_DIR.exists():
         print(f'Error: {SITE_DIR} does not exist')
         return
-    
-    html_files = list(SITE_DIR.rglob('*.html'))
-    print(f'Found {len(html_files)} HTML files to process')
-    
-    for html_file in html_files:
-        process_html_file(html_file)
-    
-    print(f'\nDone! Processed {len(html_files)} files.')
+
+    cache = {} if args.no_cache else load_cache()
+    processed, skipped, cache = make_portable(SITE_DIR, jobs=args.jobs, cache=cache)
+    save_cache(cache)
+
+    print(f'\nDone! Processed {processed} files, skipped {skipped} unchanged.')
+
 
 if __name__ == '__main__':
     main()
@@ -1,32 +1,60 @@
 from django.contrib import admin
-from .models import Product, Industry, FAQ, ContactInquiry
+from django.contrib.admin.views.main import ORDER_VAR
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from . import inquiries
+from .models import (
+    Application, ContactInquiry, FAQ, Industry, Product, ProductApplication, ProductIndustry,
+)
+
+
+class ProductApplicationInline(admin.TabularInline):
+    model = ProductApplication
+    autocomplete_fields = ['application']
+    extra = 1
+
+
+class ProductIndustryInline(admin.TabularInline):
+    model = ProductIndustry
+    autocomplete_fields = ['industry']
+    extra = 1
 
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
     list_display = ['name', 'purity', 'featured', 'created_at']
-    list_filter = ['featured', 'created_at']
-    search_fields = ['name', 'description', 'applications']
+    list_filter = ['featured', 'industries', 'created_at']
+    search_fields = ['name', 'description', 'applications__name']
     prepopulated_fields = {'slug': ('name',)}
     list_editable = ['featured']
     fieldsets = (
         ('Basic Information', {'fields': ('name', 'slug', 'description', 'purity')}),
-        ('Specifications', {'fields': ('specifications', 'applications', 'industries', 'packaging', 'hs_code')}),
+        ('Specifications', {'fields': ('specifications', 'packaging', 'hs_code')}),
         ('Media', {'fields': ('image', 'featured')}),
     )
+    inlines = [ProductApplicationInline, ProductIndustryInline]
+
+
+@admin.register(Application)
+class ApplicationAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug']
+    search_fields = ['name']
+    prepopulated_fields = {'slug': ('name',)}
 
 
 @admin.register(Industry)
 class IndustryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'stat_products', 'stat_badge', 'order', 'active']
-    list_editable = ['order', 'active']
-    list_filter = ['active']
+    list_display = ['name', 'stat_products', 'stat_badge', 'order', 'active', 'listed']
+    list_editable = ['order', 'active', 'listed']
+    list_filter = ['active', 'listed']
     search_fields = ['name', 'description']
+    prepopulated_fields = {'slug': ('name',)}
     fieldsets = (
-        ('Basic Information', {'fields': ('name', 'description', 'icon')}),
+        ('Basic Information', {'fields': ('name', 'slug', 'description', 'icon')}),
         ('Media', {'fields': ('image',)}),
         ('Stats & Badges', {'fields': ('stat_products', 'stat_badge', 'stat_badge_icon')}),
-        ('Display', {'fields': ('order', 'active')}),
+        ('Display', {'fields': ('order', 'active', 'listed')}),
     )
 
 
@@ -43,8 +71,31 @@ class ContactInquiryAdmin(admin.ModelAdmin):
     list_display = ['name', 'company', 'country', 'product', 'created_at']
     list_filter = ['country', 'created_at']
     search_fields = ['name', 'company', 'product', 'message']
+    search_help_text = 'Matches words (or their beginnings) in the name, company, product and message'
     readonly_fields = ['created_at']
-    
+    actions = ['export_csv', 'export_jsonl']
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search the full-text index, best match first unless a column is sorted on."""
+        if not search_term or not inquiries.is_available(queryset.db):
+            return super().get_search_results(request, queryset, search_term)
+        return inquiries.search(queryset, search_term, rank=ORDER_VAR not in request.GET), False
+
+    def export(self, queryset, fmt):
+        """Stream the selected inquiries as a download."""
+        response = StreamingHttpResponse(inquiries.export_lines(queryset, fmt), content_type=inquiries.CONTENT_TYPES[fmt])
+        filename = f'inquiries-{timezone.localdate():%Y%m%d}.{fmt}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @admin.action(description='Export selected inquiries as CSV')
+    def export_csv(self, request, queryset):
+        return self.export(queryset, 'csv')
+
+    @admin.action(description='Export selected inquiries as JSON Lines')
+    def export_jsonl(self, request, queryset):
+        return self.export(queryset, 'jsonl')
+
     def has_add_permission(self, request):
         return False
     
@@ -0,0 +1,205 @@
+"""
+Front-end Assets
+
+Third-party libraries (three.js, AOS, Lenis, intl-tel-input, globe.gl)
+are loaded from their CDNs until they are vendored. `python manage.py
+vendor_assets` downloads the files listed in VENDOR (and the images
+their stylesheets refer to) into website/static/vendor, recording where
+each file came from, and its SHA-256, in website/vendor.lock.json. The
+commit that adds those files and the lock file is the one that points
+the templates (and BUNDLES) at them.
+
+Each template loads one script bundle (BUNDLES) with the site's own
+scripts its pages use, e.g. <script src="{% static 'bundles/home.js' %}" defer>.
+BundleFinder is a staticfiles finder that concatenates a bundle's
+sources when collectstatic (or the development server) asks for it.
+The static files storage then fingerprints bundles like any other
+static file (bundles/home.3f2a9c1b7d4e.js).
+"""
+import hashlib
+import json
+import posixpath
+import re
+from pathlib import Path
+from urllib.parse import urljoin
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.contrib.staticfiles import finders, utils
+from django.contrib.staticfiles.finders import BaseFinder
+from django.core.checks import Warning
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage
+
+VENDOR_DIR = Path(__file__).resolve().parent / 'static'
+LOCK_FILE = Path(__file__).resolve().parent / 'vendor.lock.json'
+
+# Vendored files (static path: URL). Unversioned URLs are pinned by the
+# URL they redirect to, which the lock file records.
+VENDOR = {
+    'vendor/three/three.min.js': 'https://cdnjs.cloudflare.com/ajax/libs/three.js/r128/three.min.js',
+    'vendor/aos/aos.js': 'https://unpkg.com/aos@2.3.1/dist/aos.js',
+    'vendor/aos/aos.css': 'https://unpkg.com/aos@2.3.1/dist/aos.css',
+    'vendor/lenis/lenis.min.js': 'https://unpkg.com/lenis@1.0.45/dist/lenis.min.js',
+    'vendor/intl-tel-input/js/intlTelInput.min.js':
+        'https://cdn.jsdelivr.net/npm/intl-tel-input@25.2.0/build/js/intlTelInput.min.js',
+    'vendor/intl-tel-input/js/utils.js': 'https://cdn.jsdelivr.net/npm/intl-tel-input@25.2.0/build/js/utils.js',
+    'vendor/intl-tel-input/css/intlTelInput.css':
+        'https://cdn.jsdelivr.net/npm/intl-tel-input@25.2.0/build/css/intlTelInput.css',
+    'vendor/globe.gl/globe.gl.min.js': 'https://unpkg.com/globe.gl',
+    'vendor/topojson-client/topojson-client.min.js': 'https://unpkg.com/topojson-client',
+    'vendor/three-globe/earth-day.jpg': 'https://unpkg.com/three-globe/example/img/earth-day.jpg',
+    'vendor/three-globe/earth-topology.png': 'https://unpkg.com/three-globe/example/img/earth-topology.png',
+}
+
+# Script bundles (name: static paths, in load order). A template loads
+# the bundle named after it; 'site' is loaded on every page by base.html.
+BUNDLES = {
+    'site': ['js/main.js'],
+    'home': ['js/three-scene.js', 'js/counter.js', 'js/hero-animation.js', 'js/testimonial-carousel.js'],
+    'about': ['js/hero-animation.js'],
+}
+
+BUNDLE_DIR = 'bundles'
+
+# Source map comments point at .map files that aren't vendored (and that
+# the manifest storage would fail to find)
+SOURCE_MAP = re.compile(rb'^[ \t]*(?://[#@] sourceMappingURL=[^\n]*|/\*[#@] sourceMappingURL=[^\n]*?\*/)[ \t]*\r?$', re.M)
+CSS_URL = re.compile(rb'url\(\s*(["\']?)([^)"\']+)\1\s*\)')
+
+
+# Vendoring
+
+def load_lock():
+    try:
+        return json.loads(LOCK_FILE.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {}
+
+
+def save_lock(lock):
+    LOCK_FILE.write_text(json.dumps(lock, indent=2, sort_keys=True) + '\n', encoding='utf-8')
+
+
+def digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def fetch(url):
+    """(content, final URL after redirects) of url."""
+    with urlopen(Request(url, headers={'User-Agent': 'vendor_assets'}), timeout=60) as response:
+        return response.read(), response.geturl()
+
+
+def css_dependencies(path, url, css):
+    """{static path: URL} of the files a vendored stylesheet's relative url()s refer to."""
+    dependencies = {}
+    for _quote, reference in CSS_URL.findall(css):
+        reference = reference.decode().strip().split('#')[0].split('?')[0]
+        if not reference or reference.startswith('/') or re.match(r'[a-z][a-z0-9+.-]*:', reference, re.I):
+            continue
+        static_path = posixpath.normpath(posixpath.join(posixpath.dirname(path), reference))
+        dependencies[static_path] = urljoin(url, reference)
+    return dependencies
+
+
+def vendor(upgrade=False, log=print):
+    """
+    Download every vendored file that is missing or doesn't match the
+    lock file. Locked files are fetched from their locked URL and must
+    match their locked digest; with upgrade, every file is fetched again
+    from VENDOR and the lock file rewritten. Returns the number of files
+    written.
+    """
+    lock = {} if upgrade else load_lock()
+    new_lock = {}
+    pending = list(VENDOR.items())
+    written = 0
+    while pending:
+        path, url = pending.pop(0)
+        if path in new_lock:
+            continue
+        target = VENDOR_DIR / path
+        locked = lock.get(path)
+        if locked and target.is_file() and digest(target.read_bytes()) == locked['sha256']:
+            data, final_url = target.read_bytes(), locked['url']
+        else:
+            data, final_url = fetch(locked['url'] if locked else url)
+            data = SOURCE_MAP.sub(b'', data)
+            if locked and digest(data) != locked['sha256']:
+                raise ImproperlyConfigured(
+                    f'{final_url} no longer matches vendor.lock.json; run vendor_assets --upgrade to accept it'
+                )
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+            written += 1
+            log(f'Vendored {path} from {final_url}')
+        new_lock[path] = {'url': final_url, 'sha256': digest(data)}
+        if path.endswith('.css'):
+            pending.extend(css_dependencies(path, final_url, data).items())
+    save_lock(new_lock)
+    return written
+
+
+def missing_vendored_files():
+    """Vendored files in the lock file that aren't on disk (none before anything is vendored)."""
+    return [path for path in load_lock() if not (VENDOR_DIR / path).is_file()]
+
+
+# Bundles
+
+def bundle_root():
+    return Path(settings.BUILD_CACHE_DIR) / 'assets'
+
+
+def build_bundle(name):
+    """Write bundles/<name>.js from its sources (only if it changed) and return its path."""
+    parts = []
+    for source in BUNDLES[name]:
+        path = finders.find(source)
+        if path is None:
+            raise ImproperlyConfigured(
+                f'Static file {source!r} of bundle {name!r} not found'
+                + (' (run "python manage.py vendor_assets")' if source.startswith('vendor/') else '')
+            )
+        content = SOURCE_MAP.sub(b'', Path(path).read_bytes()).rstrip()
+        # A semicolon keeps one file's last statement from running into the next
+        parts.append(b'/* ' + source.encode() + b' */\n' + content + b'\n;\n')
+    target = bundle_root() / BUNDLE_DIR / f'{name}.js'
+    data = b''.join(parts)
+    if not target.is_file() or target.read_bytes() != data:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+    return target
+
+
+class BundleFinder(BaseFinder):
+    """Staticfiles finder for bundles/<name>.js, built from BUNDLES on demand."""
+
+    def __init__(self, *args, **kwargs):
+        self.storage = FileSystemStorage(location=bundle_root())
+
+    def check(self, **kwargs):
+        missing = missing_vendored_files()
+        if not missing:
+            return []
+        return [Warning(
+            f'{len(missing)} vendored static files are missing, e.g. {missing[0]}',
+            hint='Run "python manage.py vendor_assets" (needs network access once).',
+            id='website.W001',
+        )]
+
+    def find(self, path, find_all=False, **kwargs):
+        find_all = kwargs.get('all', find_all)
+        match = re.fullmatch(rf'{BUNDLE_DIR}/([\w-]+)\.js', path)
+        if not match or match.group(1) not in BUNDLES:
+            return []
+        target = str(build_bundle(match.group(1)))
+        return [target] if find_all else target
+
+    def list(self, ignore_patterns):
+        for name in BUNDLES:
+            build_bundle(name)
+        for path in utils.get_files(self.storage, ignore_patterns):
+            if path.startswith(BUNDLE_DIR + '/') and path[len(BUNDLE_DIR) + 1:-3] in BUNDLES:
+                yield path, self.storage
@@ -0,0 +1,6 @@
+"""
+Static Site Build
+
+Helpers used by the build management commands to render the
+distill_path registrations in website/urls.py into a static site.
+"""
@@ -0,0 +1,58 @@
+"""
+Build Catalogue
+
+Per-build identity map of the product catalogue. During a build, product
+detail pages look their product and its applications up here instead of
+querying for them, so rendering every product page costs the same two
+queries however many products there are. Loaded on first use, and
+dropped at the start of every build (incremental.snapshot()) and
+whenever a product or one of its applications changes (see signals.py).
+Outside of builds the detail view queries as usual.
+"""
+from collections import defaultdict
+
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+
+from ..models import Application, Product, ProductApplication
+from .deps import is_recording, not_recording, record_rows
+
+# Rows fetched per round trip while loading
+CHUNK_SIZE = 2000
+
+_cache = {'products': None, 'applications': None}
+
+
+def load():
+    """Load every product and application link in two queries."""
+    # Rows loaded here belong to no page in particular; get_product()
+    # records the ones each page uses
+    with not_recording():
+        products = {product.slug: product for product in Product.objects.iterator(chunk_size=CHUNK_SIZE)}
+        applications = defaultdict(list)
+        links = ProductApplication.objects.select_related('application').order_by('product_id', 'position')
+        for link in links.iterator(chunk_size=CHUNK_SIZE):
+            applications[link.product_id].append(link)
+    _cache['products'], _cache['applications'] = products, applications
+
+
+def invalidate(**kwargs):
+    _cache['products'] = _cache['applications'] = None
+
+
+def get_product(slug):
+    """(product, its applications in order) for slug. Raises Http404 if there is none."""
+    if not is_recording():
+        product = get_object_or_404(Product.objects.prefetch_related('application_links__application'), slug=slug)
+        return product, [link.application for link in product.application_links.all()]
+
+    if _cache['products'] is None:
+        load()
+    product = _cache['products'].get(slug)
+    if product is None:
+        raise Http404(f'No product matches the slug {slug!r}')
+    links = _cache['applications'].get(product.pk, ())
+    record_rows(Product, [product.pk])
+    record_rows(ProductApplication, [link.pk for link in links])
+    record_rows(Application, {link.application_id for link in links})
+    return product, [link.application for link in links]
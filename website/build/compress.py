@@ -0,0 +1,46 @@
+"""
+Precompression
+
+Writes .gz (and .br, when the brotli package is installed) siblings for
+the HTML, CSS, JS and JSON files of a built site, using whitenoise's
+Compressor so the output matches what collectstatic produces for static
+files. Files whose compressed siblings are already up to date are skipped.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from whitenoise.compress import Compressor
+
+COMPRESS_EXTENSIONS = ('.html', '.css', '.js', '.json')
+
+
+def is_up_to_date(path, compressor):
+    """True if every sibling the compressor would write exists and is not older than path."""
+    mtime = os.stat(path).st_mtime
+    suffixes = ['.gz'] if compressor.use_gzip else []
+    if compressor.use_brotli:
+        suffixes.append('.br')
+    try:
+        return all(os.stat(path + suffix).st_mtime >= mtime for suffix in suffixes)
+    except FileNotFoundError:
+        return False
+
+
+def find_compressible(output_dir):
+    for dirpath, _dirnames, filenames in os.walk(output_dir):
+        for filename in filenames:
+            if filename.endswith(COMPRESS_EXTENSIONS):
+                yield os.path.join(dirpath, filename)
+
+
+def precompress(output_dir, jobs=None):
+    """
+    Compress every HTML/CSS/JS file under output_dir in a thread pool
+    (zlib and brotli release the GIL). Returns (compressed, skipped) counts.
+    """
+    compressor = Compressor(quiet=True)
+    paths = [path for path in find_compressible(output_dir)]
+    pending = [path for path in paths if not is_up_to_date(path, compressor)]
+    with ThreadPoolExecutor(max_workers=jobs or None) as executor:
+        list(executor.map(compressor.compress, pending))
+    return len(pending), len(paths) - len(pending)
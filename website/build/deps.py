@@ -0,0 +1,115 @@
+"""
+Dependency Recording
+
+Records which templates and model rows a page reads while it renders,
+so incremental builds know which pages an edit can affect.
+"""
+import contextlib
+
+from django.db.models.signals import post_init
+from django.template.base import Template
+
+from ..models import FAQ, Application, Industry, Product, ProductApplication, ProductIndustry
+
+# Models whose rows end up in rendered pages
+TRACKED_MODELS = (Product, Industry, FAQ, Application, ProductApplication, ProductIndustry)
+
+_active_recorders = []
+
+
+def row_key(model, pk):
+    """Manifest key for a single row, e.g. 'website.product:12'."""
+    return f'{model._meta.label_lower}:{pk}'
+
+
+def record_rows(model, pks):
+    """Record rows the page being rendered uses without loading them itself."""
+    for recorder in _active_recorders:
+        recorder.rows.update(row_key(model, pk) for pk in pks)
+
+
+def record_input(key):
+    """Record a non-model input (e.g. image variants) of the page being rendered."""
+    for recorder in _active_recorders:
+        recorder.inputs.add(key)
+
+
+def is_recording():
+    """True while a site build is rendering a page."""
+    return bool(_active_recorders)
+
+
+@contextlib.contextmanager
+def not_recording():
+    """Suspend recording, e.g. while loading data shared by every page."""
+    recorders = _active_recorders[:]
+    _active_recorders.clear()
+    try:
+        yield
+    finally:
+        _active_recorders[:] = recorders
+
+
+def _record_template(template):
+    if template.origin and template.origin.name:
+        for recorder in _active_recorders:
+            recorder.templates.add(str(template.origin.name))
+
+
+def _record_row(sender, instance, **kwargs):
+    if instance.pk is not None:
+        for recorder in _active_recorders:
+            recorder.rows.add(row_key(sender, instance.pk))
+
+
+class Dependencies:
+    """
+    Context manager that collects the templates rendered, the tracked
+    model rows instantiated and any inputs passed to record_input() while
+    it is active, alongside any recorders it is nested in.
+    """
+
+    def __init__(self, templates=(), rows=(), inputs=()):
+        self.templates = set(templates)
+        self.rows = set(rows)
+        self.inputs = set(inputs)
+
+    def __enter__(self):
+        _active_recorders.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _active_recorders.remove(self)
+
+    def replay(self):
+        """Record everything collected here into the active recorders."""
+        for recorder in _active_recorders:
+            recorder.templates |= self.templates
+            recorder.rows |= self.rows
+            recorder.inputs |= self.inputs
+
+
+class DependencyRecorder(Dependencies):
+    """Records the dependencies of one page by hooking template rendering and model loading."""
+
+    def __init__(self):
+        super().__init__()
+        self._original_render = None
+
+    def __enter__(self):
+        original_render = self._original_render = Template._render
+
+        def recording_render(template, context):
+            _record_template(template)
+            return original_render(template, context)
+
+        Template._render = recording_render
+        for model in TRACKED_MODELS:
+            post_init.connect(_record_row, sender=model, weak=False)
+        return super().__enter__()
+
+    def __exit__(self, *exc_info):
+        super().__exit__(*exc_info)
+        Template._render = self._original_render
+        for model in TRACKED_MODELS:
+            post_init.disconnect(_record_row, sender=model)
@@ -0,0 +1,148 @@
+"""
+Fragment Cache
+
+Build-time cache for template fragments marked with {% fragment %} (see
+templatetags/fragments.py), so markup shared between pages (site chrome,
+product cards) is rendered once per build rather than once per page.
+
+Entries are keyed on the fragment name, the enclosing template and its
+mtime, the page's link prefix and the vary-on values (model instances
+by pk and updated_at). Each entry remembers the dependencies recorded
+while it rendered, which are replayed into the page's manifest entry on
+a hit, and the mtimes of any templates it included, which are checked
+on every hit. The cache is per process with LRU eviction, and can be
+saved to BUILD_CACHE_DIR between builds (settings.FRAGMENT_CACHE_PERSIST).
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Model
+from django_distill.utils import Path
+
+from .deps import Dependencies
+
+CACHE_VERSION = 1
+
+_cache = OrderedDict()
+_new_keys = set()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def cache_path():
+    return Path(settings.BUILD_CACHE_DIR) / 'fragments.json'
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def vary_key(value):
+    """Stable identity of a vary-on value: model rows by pk and last change."""
+    if isinstance(value, Model):
+        # Read loaded values only, so deferred fields don't cost a query
+        updated_at = value.__dict__.get('updated_at')
+        if updated_at is None:
+            updated_at = hashlib.sha1(repr([
+                value.__dict__.get(field.attname) for field in value._meta.concrete_fields
+            ]).encode()).hexdigest()
+        return f'{value._meta.label_lower}:{value.pk}:{updated_at}'
+    return repr(value)
+
+
+def fragment_key(name, template_name, prefix, vary_on):
+    parts = [name, template_name, str(_mtime(template_name)), prefix]
+    parts.extend(vary_key(value) for value in vary_on)
+    return hashlib.blake2b('\x1f'.join(parts).encode(), digest_size=16).hexdigest()
+
+
+def get(key):
+    """Cached HTML for key, or None if it is missing or an included template changed."""
+    entry = _cache.get(key)
+    if entry is None or any(_mtime(path) != mtime for path, mtime in entry['templates'].items()):
+        _stats['misses'] += 1
+        return None
+    _cache.move_to_end(key)
+    _stats['hits'] += 1
+    Dependencies(entry['templates'], entry['rows'], entry['inputs']).replay()
+    return entry['html']
+
+
+def put(key, html, dependencies):
+    _store(key, {
+        'html': html,
+        'templates': {path: _mtime(path) for path in dependencies.templates},
+        'rows': sorted(dependencies.rows),
+        'inputs': sorted(dependencies.inputs),
+    })
+
+
+def _store(key, entry):
+    _cache[key] = entry
+    _cache.move_to_end(key)
+    _new_keys.add(key)
+    while len(_cache) > settings.FRAGMENT_CACHE_SIZE:
+        evicted, _entry = _cache.popitem(last=False)
+        _new_keys.discard(evicted)
+
+
+def take_new_entries():
+    """Entries added since the last call, to send back from a worker process."""
+    entries = {key: _cache[key] for key in _new_keys if key in _cache}
+    _new_keys.clear()
+    return entries
+
+
+def merge(entries):
+    for key, entry in entries.items():
+        _store(key, entry)
+
+
+def take_stats():
+    stats = dict(_stats)
+    _stats.update(hits=0, misses=0)
+    return stats
+
+
+def signature():
+    """Everything a cached fragment may depend on that its key doesn't cover."""
+    from .. import images
+    from .incremental import build_signature
+    return hashlib.sha1(repr((
+        CACHE_VERSION,
+        build_signature(),
+        sorted(images.input_fingerprints().items()),
+    )).encode()).hexdigest()
+
+
+def load():
+    """Load the entries saved by the last build, unless anything they rely on changed."""
+    try:
+        with open(cache_path(), encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return
+    if data.get('signature') == signature():
+        # Saved entries count as older than anything rendered in this process
+        for key, entry in reversed(list(data['entries'].items())):
+            if key not in _cache:
+                _cache[key] = entry
+                _cache.move_to_end(key, last=False)
+        while len(_cache) > settings.FRAGMENT_CACHE_SIZE:
+            _cache.popitem(last=False)
+    _new_keys.clear()
+
+
+def save():
+    path = cache_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'signature': signature(), 'entries': _cache}, f, separators=(',', ':'))
+    tmp_path.replace(path)
+    _new_keys.clear()
@@ -0,0 +1,241 @@
+"""
+Incremental Builds
+
+Keeps a manifest of what every output page read during the last build
+(templates, catalogue rows) together with a snapshot of those
+inputs, and works out which pages need re-rendering after an edit.
+"""
+import hashlib
+import json
+import os
+from shutil import copy2
+
+from django.conf import settings
+from django_distill.static import filter_static_dirs
+from django_distill.utils import Path
+
+from . import catalogue
+from .deps import TRACKED_MODELS, row_key
+from .. import images, listings, related
+from ..context_processors import contact_info
+from ..models import FAQ, Application, Industry, Product, ProductApplication, ProductIndustry
+
+MANIFEST_VERSION = 4
+
+# Pages that list a whole model: any insert, update or delete of a row of
+# these models re-renders the page, whether or not it read that row before.
+LISTED_MODELS = {
+    'home': (Product, Industry),
+    'products': (Product, Industry),
+    'products_page': (Product, Industry),
+    'industry_products': (Product, Industry, ProductIndustry),
+    'industry_products_page': (Product, Industry, ProductIndustry),
+    'application_products': (Product, Industry, Application, ProductApplication),
+    'application_products_page': (Product, Industry, Application, ProductApplication),
+    'industries': (Industry,),
+    'resources': (FAQ,),
+    'search_index': (Product, Application, ProductApplication, ProductIndustry),
+}
+
+
+def manifest_path(output_dir):
+    """One manifest per output directory, so builds to other dirs don't clash."""
+    key = hashlib.sha1(str(output_dir).encode('utf-8')).hexdigest()[:12]
+    return settings.BUILD_CACHE_DIR / f'manifest-{key}.json'
+
+
+def load_manifest(output_dir):
+    """Return the last build's manifest, or None if there is no usable one."""
+    try:
+        with open(manifest_path(output_dir), encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(manifest):
+    path = manifest_path(manifest['output_dir'])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+    tmp_path.replace(path)
+
+
+def _digest(value):
+    return hashlib.sha1(repr(value).encode('utf-8')).hexdigest()
+
+
+def row_fingerprints(model):
+    """
+    Map every row of a model to a fingerprint that changes when the row does.
+    Uses updated_at where the model has one, otherwise hashes the row.
+    """
+    fields = [f.attname for f in model._meta.concrete_fields if not f.primary_key]
+    if 'updated_at' in fields:
+        rows = model.objects.order_by().values_list('pk', 'updated_at')
+        return {row_key(model, pk): updated.isoformat() for pk, updated in rows.iterator()}
+    rows = model.objects.order_by().values_list('pk', *fields)
+    return {row_key(model, row[0]): _digest(row[1:]) for row in rows.iterator()}
+
+
+def template_fingerprints(paths):
+    fingerprints = {}
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                fingerprints[path] = hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            fingerprints[path] = None
+    return fingerprints
+
+
+def static_manifest_fingerprint():
+    """Hash of collectstatic's staticfiles.json; hashed asset names change with it."""
+    try:
+        with open(Path(settings.STATIC_ROOT) / 'staticfiles.json', 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def build_signature():
+    """
+    Fingerprint of settings that every page depends on. A change here
+    invalidates the whole manifest.
+    """
+    return _digest((
+        sorted(contact_info(None).items()),
+        static_manifest_fingerprint(),
+        settings.PORTABLE_URLS,
+        settings.SITE_ORIGIN,
+        settings.STATIC_URL,
+        settings.MEDIA_URL,
+        settings.LANGUAGE_CODE,
+    ))
+
+
+def snapshot():
+    """Capture the current state of every tracked model and other page inputs."""
+    # Another process (e.g. the admin) may have changed the catalogue
+    catalogue.invalidate()
+    listings.invalidate()
+    related.invalidate()
+    rows, tables = {}, {}
+    for model in TRACKED_MODELS:
+        label = model._meta.label_lower
+        model_rows = row_fingerprints(model)
+        rows.update(model_rows)
+        tables[label] = _digest(sorted(model_rows.items()))
+    inputs = {**images.input_fingerprints(), **related.input_fingerprints()}
+    return {'rows': rows, 'tables': tables, 'inputs': inputs}
+
+
+def new_manifest(output_dir, state):
+    return {
+        'version': MANIFEST_VERSION,
+        'output_dir': str(output_dir),
+        'signature': build_signature(),
+        'state': state,
+        'templates': {},
+        'pages': {},
+    }
+
+
+def _labels(models):
+    return [model._meta.label_lower for model in models]
+
+
+def is_page_dirty(name, entry, manifest, state, templates):
+    """True if anything the page read has changed since the manifest was written."""
+    old = manifest['state']
+    if any(templates.get(path) != manifest['templates'].get(path) for path in entry['templates']):
+        return True
+    if any(state['rows'].get(key) != old['rows'].get(key) for key in entry['rows']):
+        return True
+    if any(state['inputs'].get(key) != old['inputs'].get(key) for key in entry['inputs']):
+        return True
+    if any(state['tables'][label] != old['tables'].get(label) for label in _labels(LISTED_MODELS.get(name, ()))):
+        return True
+    return False
+
+
+def plan(pages, output_dir, manifest, state):
+    """
+    Decide what an incremental build has to do.
+    Returns (pages_to_render, stale_uris), where stale_uris are pages from
+    the last build that no longer exist (e.g. deleted products).
+    """
+    if manifest is None or manifest['output_dir'] != str(output_dir):
+        return list(pages), []
+
+    current = {page[3] for page in pages}
+    stale = [uri for uri in manifest['pages'] if uri not in current]
+    if manifest['signature'] != build_signature():
+        return list(pages), stale
+
+    templates = template_fingerprints({
+        path for entry in manifest['pages'].values() for path in entry['templates']
+    })
+    dirty = []
+    for page in pages:
+        name, _namespace, _param_set, uri = page
+        entry = manifest['pages'].get(uri)
+        if (entry is None or not all((output_dir / path).exists() for path in entry['files'])
+                or is_page_dirty(name, entry, manifest, state, templates)):
+            dirty.append(page)
+    return dirty, stale
+
+
+def remove_stale_pages(manifest, output_dir, stale_uris):
+    """Delete the output files of pages that are no longer generated."""
+    for uri in stale_uris:
+        for path in manifest['pages'][uri]['files']:
+            full_path = output_dir / path
+            full_path.unlink(missing_ok=True)
+            parent = full_path.parent
+            if parent != output_dir and parent.is_dir() and not any(parent.iterdir()):
+                parent.rmdir()
+
+
+def update_manifest(manifest, output_dir, state, page_deps, stale_uris=()):
+    """Return a manifest with freshly rendered pages merged in."""
+    if manifest is None or manifest['output_dir'] != str(output_dir):
+        manifest = new_manifest(output_dir, state)
+    manifest['signature'] = build_signature()
+    manifest['state'] = state
+    for uri in stale_uris:
+        manifest['pages'].pop(uri, None)
+    manifest['pages'].update(page_deps)
+    manifest['templates'] = template_fingerprints({
+        path for entry in manifest['pages'].values() for path in entry['templates']
+    })
+    return manifest
+
+
+def sync_static_and_media_files(output_dir):
+    """
+    Incremental counterpart of distill's copy_static_and_media_files: only
+    copies files whose size or modification time differ from the output.
+    """
+    for root, url in ((settings.STATIC_ROOT, settings.STATIC_URL), (settings.MEDIA_ROOT, settings.MEDIA_URL)):
+        source_dir = Path(root)
+        target_dir = output_dir / url.strip('/')
+        for dirpath, dirnames, filenames in os.walk(source_dir):
+            dirnames[:] = filter_static_dirs(dirnames)
+            for filename in filenames:
+                from_path = Path(dirpath) / filename
+                to_path = target_dir / from_path.relative_to(source_dir)
+                source = from_path.stat()
+                try:
+                    target = to_path.stat()
+                except FileNotFoundError:
+                    pass
+                else:
+                    if target.st_size == source.st_size and int(target.st_mtime) == int(source.st_mtime):
+                        continue
+                to_path.parent.mkdir(parents=True, exist_ok=True)
+                copy2(from_path, to_path)
@@ -0,0 +1,263 @@
+"""
+Link Checking
+
+Verifies a built site without a server. Every HTML page is scanned for
+href, src, srcset and poster attributes and for url()s in inline
+styles, and every stylesheet a page loads for its url()s. Each
+reference is resolved the way a browser would from the page's location
+in the output tree, so both relative (portable) and site-absolute links
+are checked. The report lists:
+
+- broken links: <a>/<area> links to pages or files that don't exist
+- missing assets: images, scripts, stylesheets, fonts etc. that don't
+  exist
+- orphan pages: pages no chain of links from the home page reaches
+
+External URLs (other hosts, mailto:, tel:, data: ...) are not checked.
+
+Scanning is the expensive part, so pages are scanned across worker
+processes, and the references found in a file are cached under
+BUILD_CACHE_DIR/linkcheck by a hash of its path and content. An
+unchanged page is only looked up again. Like optimize.py, this module
+runs in spawned workers without Django, so it must not use settings or
+models.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import posixpath
+import re
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import unquote
+
+from .optimize import CSS_URL, HTML_TOKEN, TAG_NAME, parse_attributes
+
+# Bump to invalidate cached scans when the references collected change
+VERSION = '1'
+
+# Files per task sent to a worker
+CHUNK_SIZE = 200
+
+# Reference kinds
+LINK = 'link'
+ASSET = 'asset'
+
+# Attributes holding one URL, and the kind of reference they make
+URL_ATTRIBUTES = ('href', 'src', 'poster')
+LINK_TAGS = {'a', 'area'}
+
+EXTERNAL_URL = re.compile(r'^(?:[a-z][a-z0-9+.-]*:|//)', re.I)
+
+# Pages nothing needs to link to
+ENTRY_PAGES = ('index.html',)
+UNLINKED_PAGES = ('404.html', '500.html')
+
+
+def _reference(tag, attribute):
+    return LINK if tag in LINK_TAGS and attribute == 'href' else ASSET
+
+
+def css_references(css):
+    """URLs of the url()s in css."""
+    return [url.strip() for _quote, url in CSS_URL.findall(css)]
+
+
+def html_references(page):
+    """(kind, URL) of every reference in an HTML page."""
+    references = []
+    for match in HTML_TOKEN.finditer(page):
+        if match.group('comment'):
+            continue
+        if match.group('raw'):
+            tag = match.group('raw')
+            if match.group('raw_tag').lower() == 'style':
+                references.extend((ASSET, url) for url in css_references(match.group('raw_body')))
+        else:
+            tag = match.group('tag')
+        if tag.startswith(('</', '<!')):
+            continue
+        name = TAG_NAME.match(tag).group(1).lower()
+        attributes = parse_attributes(tag)
+        for attribute in URL_ATTRIBUTES:
+            if attribute in attributes:
+                if name == 'link' and attributes.get('rel', '').lower() in ('preconnect', 'dns-prefetch'):
+                    continue
+                references.append((_reference(name, attribute), attributes[attribute].strip()))
+        if 'srcset' in attributes:
+            references.extend(
+                (ASSET, candidate.split()[0]) for candidate in attributes['srcset'].split(',') if candidate.strip()
+            )
+        if 'style' in attributes:
+            references.extend((ASSET, url) for url in css_references(attributes['style']))
+    return references
+
+
+def resolve(url, source, base_url=''):
+    """
+    The output-relative path url points to from the file at source (also
+    output-relative). Directory URLs end in '/'. Returns None for
+    external URLs and links within the page, and '..' for URLs outside
+    the site.
+    """
+    if not url or url.startswith('#') or EXTERNAL_URL.match(url):
+        return None
+    path = unquote(url.split('#')[0].split('?')[0])
+    if not path:
+        return source
+    if path.startswith('/'):
+        if base_url and (path == base_url or path.startswith(base_url + '/')):
+            path = path[len(base_url):] or '/'
+        target = path.lstrip('/')
+    else:
+        target = posixpath.join(posixpath.dirname(source), path)
+    directory = path.endswith('/') or posixpath.basename(path) in ('.', '..')
+    target = posixpath.normpath(target) if target else '.'
+    if target == '..' or target.startswith('../'):
+        return '..'
+    if target == '.':
+        return ''
+    return target + '/' if directory else target
+
+
+def target_file(target, files):
+    """The file a resolved target is served from (a directory serves its index.html), or None."""
+    if target == '..':
+        return None
+    if target == '' or target.endswith('/'):
+        index = target + 'index.html'
+        return index if index in files else None
+    if target in files:
+        return target
+    index = target + '/index.html'
+    return index if index in files else None
+
+
+# Scanning
+
+def _cache_path(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], key + '.json')
+
+
+def scan_file(output_dir, relative_path, cache_dir, salt):
+    """(kind, URL) references of one HTML or CSS file, from the cache if the file hasn't changed."""
+    with open(os.path.join(output_dir, relative_path), 'rb') as f:
+        data = f.read()
+    key = hashlib.sha256(f'{salt}\0{relative_path}\0'.encode() + data).hexdigest()
+    path = _cache_path(cache_dir, key)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f), True
+    except FileNotFoundError:
+        pass
+    text = data.decode('utf-8', errors='replace')
+    if relative_path.endswith('.css'):
+        references = [(ASSET, url) for url in css_references(text)]
+    else:
+        references = html_references(text)
+    references = sorted(set(references))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(references, f, separators=(',', ':'))
+    os.replace(temporary, path)
+    return references, False
+
+
+def scan_chunk(output_dir, relative_paths, cache_dir, salt):
+    """{path: references} for relative_paths, and how many came from the cache."""
+    results = {}
+    cached = 0
+    for relative_path in relative_paths:
+        results[relative_path], hit = scan_file(output_dir, relative_path, cache_dir, salt)
+        cached += hit
+    return results, cached
+
+
+def scan(output_dir, relative_paths, cache_dir, jobs=1):
+    """scan_chunk() over relative_paths using up to `jobs` worker processes."""
+    salt = VERSION
+    if jobs <= 1 or len(relative_paths) <= CHUNK_SIZE:
+        return scan_chunk(output_dir, relative_paths, cache_dir, salt)
+    results = {}
+    cached = 0
+    chunks = [relative_paths[start:start + CHUNK_SIZE] for start in range(0, len(relative_paths), CHUNK_SIZE)]
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+        futures = [executor.submit(scan_chunk, output_dir, chunk, cache_dir, salt) for chunk in chunks]
+        for future in futures:
+            chunk_results, chunk_cached = future.result()
+            results.update(chunk_results)
+            cached += chunk_cached
+    return results, cached
+
+
+def list_files(output_dir):
+    """Output-relative paths of every file under output_dir."""
+    files = set()
+    for dirpath, _dirnames, filenames in os.walk(output_dir):
+        relative_dir = os.path.relpath(dirpath, output_dir)
+        for filename in filenames:
+            path = filename if relative_dir == '.' else os.path.join(relative_dir, filename)
+            files.add(path.replace(os.sep, '/'))
+    return files
+
+
+def check_site(output_dir, cache_dir, base_url='', jobs=1):
+    """
+    Check every page of the site in output_dir. Returns a dict with
+    'broken_links' and 'missing_assets' ([(source file, URL, resolved
+    target)]), 'orphans' ([page]), 'pages', 'stylesheets', 'references'
+    and 'cached' (files whose scan came from the cache).
+    """
+    output_dir = os.path.abspath(output_dir)
+    cache_dir = os.path.abspath(cache_dir)
+    files = list_files(output_dir)
+    pages = sorted(path for path in files if path.endswith('.html'))
+    scanned, cached = scan(output_dir, pages, cache_dir, jobs)
+
+    broken_links = []
+    missing_assets = []
+    stylesheets = set()
+    linked_pages = {}
+    for page, references in scanned.items():
+        linked_pages[page] = set()
+        for kind, url in references:
+            target = resolve(url, page, base_url)
+            if target is None:
+                continue
+            found = target_file(target, files)
+            if found is None:
+                (broken_links if kind == LINK else missing_assets).append((page, url, target))
+            elif found.endswith('.html'):
+                linked_pages[page].add(found)
+            elif found.endswith('.css'):
+                stylesheets.add(found)
+
+    # Stylesheets are few; their url()s resolve from the stylesheet itself
+    css_scanned, css_cached = scan(output_dir, sorted(stylesheets), cache_dir, jobs)
+    cached += css_cached
+    for stylesheet, references in css_scanned.items():
+        for _kind, url in references:
+            target = resolve(url, stylesheet, base_url)
+            if target is not None and target_file(target, files) is None:
+                missing_assets.append((stylesheet, url, target))
+
+    reached = {page for page in ENTRY_PAGES if page in linked_pages}
+    queue = list(reached)
+    while queue:
+        for linked in linked_pages.get(queue.pop(), ()):
+            if linked not in reached:
+                reached.add(linked)
+                queue.append(linked)
+    orphans = [page for page in pages if page not in reached and posixpath.basename(page) not in UNLINKED_PAGES]
+
+    return {
+        'broken_links': sorted(broken_links),
+        'missing_assets': sorted(missing_assets),
+        'orphans': orphans,
+        'pages': len(pages),
+        'stylesheets': len(stylesheets),
+        'references': sum(len(references) for references in scanned.values()),
+        'cached': cached,
+    }
@@ -0,0 +1,570 @@
+"""
+Page Optimization
+
+Post-render stage that rewrites the HTML pages of a built site:
+
+- HTML is minified. Comments go, whitespace next to block-level tags
+  goes, and other runs of whitespace become one space. <pre> and
+  <textarea> are left exactly as they are.
+- Inline <style> is minified. Inline JavaScript loses its comments,
+  indentation and blank lines but keeps its line breaks, so automatic
+  semicolon insertion works as before.
+- Critical CSS: the rules of the page's local stylesheets that apply to
+  the first screen of the page (the first settings.CRITICAL_CSS_ELEMENTS
+  elements of <body>) are inlined in a <style> in <head>. The stylesheets
+  themselves are then loaded without blocking rendering (rel="preload",
+  with a <noscript> fallback). Pages of one template share their first
+  screen, so the critical CSS is worked out once per template rather than
+  once per page.
+
+Pages are optimized across worker processes. Results are cached under
+BUILD_CACHE_DIR/optimize by a hash of the page's content (with the
+site's stylesheets and the stage's settings), so unchanged pages, such
+as those an incremental build didn't re-render, are not optimized again.
+
+A spawned worker runs optimize_chunk() without setting Django up, so
+this module must not use settings or models.
+"""
+import hashlib
+import html
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from html.parser import HTMLParser
+from pathlib import Path
+
+# Bump to invalidate cached results when this module changes what it writes
+VERSION = '1'
+
+# Pages per task sent to a worker
+CHUNK_SIZE = 200
+
+# Whitespace in HTML (not \s, which would also match non-breaking spaces)
+HTML_SPACE = re.compile(r'[ \t\n\r\f]+')
+
+HTML_TOKEN = re.compile(
+    r'(?P<comment><!--.*?-->)'
+    r'|(?P<raw><(?P<raw_tag>script|style|pre|textarea)\b(?:"[^"]*"|\'[^\']*\'|[^\'">])*>)(?P<raw_body>.*?)'
+    r'(?P<raw_end></(?P=raw_tag)\s*>)'
+    r'|(?P<tag></?[a-zA-Z!][^\s>/]*(?:"[^"]*"|\'[^\']*\'|[^\'">])*>)',
+    re.S | re.I,
+)
+TAG_NAME = re.compile(r'</?([a-zA-Z!][^\s>/]*)')
+TAG_SPACE = re.compile(r'("[^"]*"|\'[^\']*\')|[ \t\n\r\f]+')
+ATTRIBUTE = re.compile(r'([^\s=/>"\']+)(?:\s*=\s*("[^"]*"|\'[^\']*\'|[^\s>]+))?')
+
+# Whitespace next to these tags doesn't render
+BLOCK_TAGS = {
+    '!doctype', 'html', 'head', 'body', 'meta', 'link', 'title', 'base', 'script', 'style', 'noscript',
+    'main', 'nav', 'header', 'footer', 'section', 'article', 'aside', 'div', 'p', 'blockquote', 'figure',
+    'figcaption', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'br', 'ul', 'ol', 'li', 'dl', 'dt', 'dd',
+    'table', 'thead', 'tbody', 'tfoot', 'tr', 'th', 'td', 'caption', 'form', 'fieldset', 'legend',
+    'option', 'details', 'summary',
+}
+
+# Script types that hold JavaScript (others, e.g. JSON-LD, are left alone)
+JS_TYPES = {'', 'text/javascript', 'application/javascript', 'module'}
+
+JS_STRING = re.compile(r'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|`(?:[^`\\]|\\.)*`', re.S)
+JS_BLOCK_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+JS_LINE_COMMENT = re.compile(r'//[^\n]*')
+JS_REGEX = re.compile(r'/(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[a-z]*')
+# A / after these starts a regular expression rather than dividing
+REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^')
+REGEX_AFTER_WORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'delete', 'throw', 'new', 'yield',
+                     'await'}
+
+CSS_TOKEN = re.compile(
+    r'(?P<string>"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\')'
+    r'|(?P<comment>/\*.*?\*/)'
+    r'|(?P<url>url\(\s*[^)"\'\s]*\s*\))',
+    re.S | re.I,
+)
+CSS_SPACE_AROUND = re.compile(r'\s*([{};,>])\s*')
+CSS_URL = re.compile(r'url\(\s*(["\']?)([^)"\']*)\1\s*\)', re.I)
+
+# At-rules whose block holds more rules, filtered rule by rule
+GROUPING_AT_RULES = {'@media', '@supports', '@layer', '@container', '@document'}
+PSEUDO = re.compile(r'(?<!\\)::?[\w-]+(\((?:[^()]|\([^()]*\))*\))?')
+SELECTOR_TAG = re.compile(r'^(?:[\w-]+|\*)')
+SELECTOR_CLASS = re.compile(r'\.((?:[\w-]|\\.)+)')
+SELECTOR_ID = re.compile(r'#((?:[\w-]|\\.)+)')
+SELECTOR_ATTRIBUTE = re.compile(r'\[\s*([\w-]+)')
+CSS_ESCAPE = re.compile(r'\\(.)')
+
+EXTERNAL_URL = re.compile(r'^(?:[a-z][a-z0-9+.-]*:|//|#)', re.I)
+
+PRELOAD = 'rel="preload" as="style" onload="this.onload=null;this.rel=\'stylesheet\'"'
+
+
+def stylesheet_digest(output_dir):
+    """Digest of every stylesheet under output_dir, so cached pages follow CSS changes."""
+    digest = hashlib.sha256()
+    for dirpath, dirnames, filenames in os.walk(output_dir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith('.css'):
+                path = os.path.join(dirpath, filename)
+                digest.update(os.path.relpath(path, output_dir).encode())
+                with open(path, 'rb') as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+# Minification
+
+def minify_css(css):
+    """CSS without comments and needless whitespace. Strings and url()s are kept as they are."""
+    parts = []
+    code = ''
+    position = 0
+    for match in CSS_TOKEN.finditer(css):
+        code += css[position:match.start()]
+        position = match.end()
+        if not match.group('comment'):
+            parts.extend((_squeeze_css(code), match.group()))
+            code = ''
+    parts.append(_squeeze_css(code + css[position:]))
+    return ''.join(parts).replace(';}', '}').strip()
+
+
+def _squeeze_css(css):
+    css = CSS_SPACE_AROUND.sub(r'\1', re.sub(r'\s+', ' ', css))
+    return re.sub(r':\s+', ':', css)
+
+
+def minify_js(script):
+    """
+    JavaScript without comments, indentation, trailing spaces or blank
+    lines. Line breaks are kept, so the code means the same without a
+    full parse; strings, template literals and regular expressions are
+    copied as they are.
+    """
+    output = []
+    previous = ''
+    index = code_start = 0
+    while index < len(script):
+        char = script[index]
+        match = None
+        if char in '"\'`':
+            match = JS_STRING.match(script, index)
+        elif char == '/':
+            code = script[code_start:index].rstrip()
+            if script.startswith('/*', index):
+                match = JS_BLOCK_COMMENT.match(script, index)
+            elif script.startswith('//', index):
+                match = JS_LINE_COMMENT.match(script, index)
+            elif _starts_regex(code or previous):
+                match = JS_REGEX.match(script, index)
+        if match is None:
+            index += 1
+            continue
+        code = script[code_start:index]
+        _append_code(output, code)
+        if code.strip():
+            previous = code.rstrip()
+        token = match.group()
+        if token.startswith('/*') and '\n' in token:
+            output[-1] = output[-1].rstrip(' ')
+            output.append('\n')
+        elif token.startswith('/*'):
+            output.append(' ')
+        elif token.startswith('//'):
+            output[-1] = output[-1].rstrip(' ')
+        else:
+            output.append(token)
+            previous = token
+        index = code_start = match.end()
+    _append_code(output, script[code_start:])
+    return ''.join(output).strip()
+
+
+def _append_code(output, code):
+    code = re.sub(r'[ \t]+', ' ', re.sub(r'[ \t]*\n\s*', '\n', code))
+    if output and output[-1].endswith('\n'):
+        # After a comment that ended a line
+        code = code.lstrip(' \n')
+    output.append(code)
+
+
+def _starts_regex(previous):
+    if not previous:
+        return True
+    if previous[-1] in REGEX_AFTER:
+        return True
+    word = re.search(r'[\w$]+$', previous)
+    return bool(word) and word.group() in REGEX_AFTER_WORDS
+
+
+def _is_block(part):
+    return part is not None and part[0] == 'tag' and part[2] in BLOCK_TAGS
+
+
+def minify_html(page, replace_tag=None):
+    """
+    page minified as described in the module docstring. replace_tag, if
+    given, is called with (tag name, tag) for every start or end tag and
+    returns the HTML to write in its place.
+    """
+    # (kind, html, tag name) for each piece of the page
+    parts = []
+    position = 0
+    for match in HTML_TOKEN.finditer(page):
+        if match.start() > position:
+            parts.append(('text', HTML_SPACE.sub(' ', page[position:match.start()]), None))
+        position = match.end()
+        if match.group('comment'):
+            if match.group().startswith('<!--[if'):
+                parts.append(('raw', match.group(), None))
+        elif match.group('raw'):
+            name = match.group('raw_tag').lower()
+            start, body = match.group('raw'), match.group('raw_body')
+            if name == 'script':
+                attributes = parse_attributes(start)
+                if 'src' not in attributes and attributes.get('type', '').strip().lower() in JS_TYPES:
+                    body = minify_js(body)
+                else:
+                    body = body.strip()
+                start = _squeeze_tag(start)
+            elif name == 'style':
+                body = minify_css(body)
+                start = _squeeze_tag(start)
+            parts.append(('tag', start + body + match.group('raw_end'), name))
+        else:
+            tag = _squeeze_tag(match.group())
+            name = TAG_NAME.match(tag).group(1).lower()
+            if replace_tag:
+                tag = replace_tag(name, tag)
+            parts.append(('tag', tag, name))
+    if position < len(page):
+        parts.append(('text', HTML_SPACE.sub(' ', page[position:]), None))
+
+    output = []
+    for index, (kind, text, _name) in enumerate(parts):
+        if kind == 'text':
+            before = parts[index - 1] if index else None
+            after = parts[index + 1] if index + 1 < len(parts) else None
+            if before is None or _is_block(before):
+                text = text.lstrip(' ')
+            if after is None or _is_block(after):
+                text = text.rstrip(' ')
+        output.append(text)
+    return ''.join(output)
+
+
+def _squeeze_tag(tag):
+    tag = TAG_SPACE.sub(lambda match: match.group(1) or ' ', tag)
+    return re.sub(r' ?(/?>)$', r'\1', tag)
+
+
+def parse_attributes(tag):
+    """{name: value} of a start tag's attributes, with entities decoded."""
+    attributes = {}
+    for name, value in ATTRIBUTE.findall(tag[len(TAG_NAME.match(tag).group()):].rstrip('/>')):
+        if value[:1] in ('"', "'"):
+            value = value[1:-1]
+        attributes.setdefault(name.lower(), html.unescape(value))
+    return attributes
+
+
+# Critical CSS
+
+class FirstScreen(HTMLParser):
+    """Collects the tags, classes, ids and attribute names of a page's first screen."""
+
+    class Done(Exception):
+        pass
+
+    def __init__(self, limit):
+        super().__init__(convert_charrefs=False)
+        self.limit = limit
+        self.count = 0
+        self.in_body = False
+        self.tags = {'html', 'body'}
+        self.classes = set()
+        self.ids = set()
+        self.attributes = set()
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'body':
+            self.in_body = True
+        elif not self.in_body and tag != 'html':
+            return
+        elif self.in_body:
+            if self.count >= self.limit:
+                raise self.Done
+            self.count += 1
+        self.tags.add(tag)
+        for name, value in attrs:
+            self.attributes.add(name)
+            if name == 'class' and value:
+                self.classes.update(value.split())
+            elif name == 'id' and value:
+                self.ids.add(value)
+
+
+def first_screen(page, limit):
+    """(tags, classes, ids, attribute names) in the first `limit` elements of page's <body>."""
+    parser = FirstScreen(limit)
+    try:
+        parser.feed(page)
+        parser.close()
+    except FirstScreen.Done:
+        pass
+    return (frozenset(parser.tags), frozenset(parser.classes), frozenset(parser.ids),
+            frozenset(parser.attributes))
+
+
+def _skip_string(css, index):
+    quote = css[index]
+    index += 1
+    while index < len(css) and css[index] != quote:
+        index += 2 if css[index] == '\\' else 1
+    return index + 1
+
+
+def css_blocks(css):
+    """(prelude, body) of each top-level statement in css; body is None for e.g. @import."""
+    blocks = []
+    index = start = depth = 0
+    while index < len(css):
+        char = css[index]
+        if char in '"\'':
+            index = _skip_string(css, index)
+            continue
+        if char == '{':
+            if depth == 0:
+                body_start = index + 1
+            depth += 1
+        elif char == '}' and depth:
+            depth -= 1
+            if depth == 0:
+                blocks.append((css[start:body_start - 1].strip(), css[body_start:index]))
+                start = index + 1
+        elif char == ';' and depth == 0:
+            blocks.append((css[start:index].strip(), None))
+            start = index + 1
+        index += 1
+    return blocks
+
+
+def _split_top_level(text, separators):
+    """Split text at separators that aren't inside (), [] or quotes."""
+    pieces = []
+    depth = 0
+    start = index = 0
+    while index < len(text):
+        char = text[index]
+        if char in '"\'':
+            index = _skip_string(text, index)
+            continue
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char in separators and depth == 0:
+            pieces.append(text[start:index])
+            start = index + 1
+        index += 1
+    pieces.append(text[start:])
+    return pieces
+
+
+def selector_matches(selector, features):
+    """
+    True if the element selector targets could be on the first screen:
+    everything its subject (last compound selector) asks for is there.
+    Pseudo-classes and ancestors are ignored, which errs towards keeping
+    a rule.
+    """
+    tags, classes, ids, attributes = features
+    subject = PSEUDO.sub('', _split_top_level(selector.strip(), ' >+~')[-1])
+    tag = SELECTOR_TAG.match(subject)
+    if tag and tag.group() != '*' and tag.group().lower() not in tags:
+        return False
+    return (all(css_unescape(name) in classes for name in SELECTOR_CLASS.findall(subject))
+            and all(css_unescape(name) in ids for name in SELECTOR_ID.findall(subject))
+            and all(name.lower() in attributes for name in SELECTOR_ATTRIBUTE.findall(subject)))
+
+
+def css_unescape(name):
+    return CSS_ESCAPE.sub(r'\1', name)
+
+
+def critical_blocks(blocks, features, keyframes):
+    """The CSS of blocks that apply to features; @keyframes are collected into keyframes."""
+    critical = []
+    for prelude, body in blocks:
+        if body is None:
+            continue
+        if prelude.startswith('@'):
+            name = re.match(r'@[\w-]+', prelude).group().lower()
+            if name in GROUPING_AT_RULES:
+                inner = critical_blocks(css_blocks(body), features, keyframes)
+                if inner:
+                    critical.append(f'{prelude}{{{inner}}}')
+            elif name == '@font-face':
+                critical.append(f'{prelude}{{{body}}}')
+            elif name.endswith('keyframes'):
+                keyframes[prelude.split(None, 1)[-1].strip()] = f'{prelude}{{{body}}}'
+        elif any(selector_matches(selector, features) for selector in _split_top_level(prelude, ',')):
+            critical.append(f'{prelude}{{{body}}}')
+    return ''.join(critical)
+
+
+@lru_cache(maxsize=64)
+def load_stylesheet(path):
+    """A stylesheet's top-level blocks, minified."""
+    return css_blocks(minify_css(Path(path).read_text(encoding='utf-8')))
+
+
+@lru_cache(maxsize=1024)
+def critical_css(path, features):
+    """The rules of the stylesheet at path that apply to features, with the @keyframes they use."""
+    keyframes = {}
+    css = critical_blocks(load_stylesheet(path), features, keyframes)
+    used = [rule for name, rule in keyframes.items() if re.search(rf'(?<![\w-]){re.escape(name)}(?![\w-])', css)]
+    return css + ''.join(used)
+
+
+def rebase_urls(css, css_dir, page_dir):
+    """Point the relative url()s of a stylesheet in css_dir at the same files from page_dir."""
+    def rebase(match):
+        url = match.group(2).strip()
+        if not url or EXTERNAL_URL.match(url) or url.startswith(('/', 'data:')):
+            return match.group()
+        path, _, rest = url.partition('?')
+        target = os.path.relpath(os.path.join(css_dir, path), page_dir).replace(os.sep, '/')
+        return f'url({target}{"?" + rest if rest else ""})'
+    return CSS_URL.sub(rebase, css)
+
+
+def resolve_href(href, page_dir, output_dir, base_url):
+    """The file under output_dir a link's href points to, or None (e.g. for another site)."""
+    href = href.split('#')[0].split('?')[0]
+    if not href or EXTERNAL_URL.match(href):
+        return None
+    if href.startswith('/'):
+        if base_url and href.startswith(base_url + '/'):
+            href = href[len(base_url):]
+        path = os.path.join(output_dir, href.lstrip('/'))
+    else:
+        path = os.path.join(page_dir, href)
+    path = os.path.normpath(path)
+    if not path.startswith(os.path.join(output_dir, '')) or not os.path.isfile(path):
+        return None
+    return path
+
+
+def optimize_page(page, page_path, output_dir, base_url, critical_elements):
+    """page (the HTML of the file at page_path) minified, with critical CSS inlined."""
+    page_dir = os.path.dirname(page_path)
+    features = first_screen(page, critical_elements)
+    inlined = []
+
+    def defer_stylesheet(name, tag):
+        if name != 'link':
+            return tag
+        attributes = parse_attributes(tag)
+        if attributes.get('rel', '').lower() != 'stylesheet' or 'href' not in attributes:
+            return tag
+        path = resolve_href(attributes['href'], page_dir, output_dir, base_url)
+        if path is None:
+            return tag
+        css = rebase_urls(critical_css(path, features), os.path.dirname(path), page_dir)
+        media = attributes.get('media', '').strip()
+        if css and media and media != 'all':
+            css = f'@media {media}{{{css}}}'
+        # The critical rules of every stylesheet go in one <style>, where the first one was
+        style = '' if inlined else '<style data-critical></style>'
+        inlined.append(css)
+        preload = re.sub(r'\brel=(["\']?)stylesheet\1', PRELOAD, tag, count=1, flags=re.I)
+        return f'{style}{preload}<noscript>{tag}</noscript>'
+
+    page = minify_html(page, defer_stylesheet)
+    if inlined:
+        css = ''.join(inlined)
+        page = page.replace('<style data-critical></style>', f'<style data-critical>{css}</style>' if css else '', 1)
+    return page
+
+
+# Running the stage
+
+def _cache_path(cache_dir, key):
+    return os.path.join(cache_dir, key[:2], key)
+
+
+def _store(cache_dir, key, data):
+    path = _cache_path(cache_dir, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+def _key(salt, relative_path, data):
+    return hashlib.sha256(salt.encode() + b'\0' + relative_path.encode() + b'\0' + data).hexdigest()
+
+
+def optimize_file(output_dir, relative_path, cache_dir, salt, base_url, critical_elements):
+    """
+    Optimize one page in place. Returns (cached, bytes before, bytes
+    after); a cached entry that is empty means the page is already optimal.
+    """
+    path = os.path.join(output_dir, relative_path)
+    with open(path, 'rb') as f:
+        data = f.read()
+    key = _key(salt, relative_path, data)
+    try:
+        with open(_cache_path(cache_dir, key), 'rb') as f:
+            result = f.read() or data
+        cached = True
+    except FileNotFoundError:
+        result = optimize_page(data.decode('utf-8'), path, output_dir, base_url, critical_elements).encode('utf-8')
+        _store(cache_dir, key, result if result != data else b'')
+        if result != data:
+            # Running the stage again over its own output finds it here
+            _store(cache_dir, _key(salt, relative_path, result), b'')
+        cached = False
+    if result != data:
+        with open(path, 'wb') as f:
+            f.write(result)
+    return cached, len(data), len(result)
+
+
+def optimize_chunk(output_dir, relative_paths, cache_dir, salt, base_url, critical_elements):
+    """Optimize relative_paths; returns {'pages', 'cached', 'bytes_before', 'bytes_after'}."""
+    stats = {'pages': 0, 'cached': 0, 'bytes_before': 0, 'bytes_after': 0}
+    for relative_path in relative_paths:
+        cached, before, after = optimize_file(output_dir, relative_path, cache_dir, salt, base_url, critical_elements)
+        stats['pages'] += 1
+        stats['cached'] += cached
+        stats['bytes_before'] += before
+        stats['bytes_after'] += after
+    return stats
+
+
+def optimize_pages(output_dir, relative_paths, cache_dir, base_url='', critical_elements=200, jobs=1):
+    """
+    Optimize the HTML files at relative_paths under output_dir, using up
+    to `jobs` worker processes. Returns totals as optimize_chunk() does.
+    """
+    output_dir = os.path.abspath(output_dir)
+    cache_dir = os.path.abspath(cache_dir)
+    salt = json.dumps([VERSION, base_url, critical_elements, stylesheet_digest(output_dir)])
+    args = (cache_dir, salt, base_url, critical_elements)
+    if jobs <= 1 or len(relative_paths) <= CHUNK_SIZE:
+        return optimize_chunk(output_dir, relative_paths, *args)
+
+    totals = {'pages': 0, 'cached': 0, 'bytes_before': 0, 'bytes_after': 0}
+    chunks = [relative_paths[start:start + CHUNK_SIZE] for start in range(0, len(relative_paths), CHUNK_SIZE)]
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as executor:
+        for stats in executor.map(optimize_chunk, [output_dir] * len(chunks), chunks, *([arg] * len(chunks) for arg in args)):
+            for name, value in stats.items():
+                totals[name] += value
+    return totals
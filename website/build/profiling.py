@@ -0,0 +1,185 @@
+"""
+Build Profiling
+
+Opt-in profiling of page rendering (build_site --profile). For every URL
+it records the SQL query count and time, the time spent in each template
+and {% block %}, and the bytes written. Frames nest, so queries run
+lazily from a template are charged to that template.
+
+write_report() saves three files:
+
+    pages.csv       one row per URL
+    templates.csv   one row per URL and template/block
+    profile.folded  'frame;frame;frame microseconds' lines (folded stacks),
+                    which flamegraph.pl, inferno and speedscope read as is
+"""
+import csv
+import re
+import time
+from collections import defaultdict
+
+from django.db import connection
+from django.template.base import Template
+from django.template.loader_tags import BlockNode
+
+TABLE_PATTERN = re.compile(r'\bFROM\s+"?(\w+)', re.IGNORECASE)
+
+PAGE_COLUMNS = ('uri', 'view', 'seconds', 'queries', 'query_seconds', 'bytes')
+TEMPLATE_COLUMNS = ('uri', 'view', 'frame', 'calls', 'seconds', 'self_seconds')
+SORT_KEYS = ('seconds', 'queries', 'query_seconds', 'bytes')
+
+
+def template_label(template):
+    origin = template.origin
+    return (origin.template_name or origin.name) if origin else str(template.name)
+
+
+def query_label(sql):
+    match = TABLE_PATTERN.search(sql)
+    return f'SQL {match.group(1)}' if match else 'SQL'
+
+
+class PageProfiler:
+    """
+    Context manager that profiles one page render by timing template
+    rendering, {% block %} rendering and queries on the default database.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.stack = []
+        # folded stack -> self seconds, frame label -> [calls, seconds, self seconds]
+        self.stacks = defaultdict(float)
+        self.frames = {}
+        self.queries = 0
+        self.query_seconds = 0.0
+        self._original_render = None
+        self._original_block_render = None
+        self._execute_wrapper = None
+
+    def push(self, label):
+        self.stack.append([label, time.perf_counter(), 0.0])
+
+    def pop(self):
+        path = ';'.join(frame[0] for frame in self.stack)
+        label, started, children = self.stack.pop()
+        elapsed = time.perf_counter() - started
+        self.stacks[path] += elapsed - children
+        if self.stack:
+            self.stack[-1][2] += elapsed
+        stats = self.frames.setdefault(label, [0, 0.0, 0.0])
+        stats[0] += 1
+        # Only the outermost of recursive frames counts towards inclusive time
+        if not any(frame[0] == label for frame in self.stack):
+            stats[1] += elapsed
+        stats[2] += elapsed - children
+        return elapsed
+
+    def _execute(self, execute, sql, params, many, context):
+        self.push(query_label(sql))
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_seconds += self.pop()
+
+    def __enter__(self):
+        original_render = self._original_render = Template._render
+        original_block_render = self._original_block_render = BlockNode.render
+        profiler = self
+
+        def profiling_render(template, context):
+            profiler.push(template_label(template))
+            try:
+                return original_render(template, context)
+            finally:
+                profiler.pop()
+
+        def profiling_block_render(node, context):
+            profiler.push(f'block {node.name}')
+            try:
+                return original_block_render(node, context)
+            finally:
+                profiler.pop()
+
+        Template._render = profiling_render
+        BlockNode.render = profiling_block_render
+        self._execute_wrapper = connection.execute_wrapper(self._execute)
+        self._execute_wrapper.__enter__()
+        self.push(self.view)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = self.pop()
+        self._execute_wrapper.__exit__(*exc_info)
+        Template._render = self._original_render
+        BlockNode.render = self._original_block_render
+
+    def record(self, uri, written):
+        """Picklable results for one page, to send back from a worker process."""
+        return {
+            'uri': uri,
+            'view': self.view,
+            'seconds': self.seconds,
+            'queries': self.queries,
+            'query_seconds': self.query_seconds,
+            'bytes': written,
+            'frames': {label: stats for label, stats in self.frames.items() if label != self.view},
+            'stacks': dict(self.stacks),
+        }
+
+
+def sort_records(records, key='seconds'):
+    return sorted(records, key=lambda record: record[key], reverse=True)
+
+
+def frame_totals(records):
+    """{frame label: [calls, pages, seconds, self seconds]} summed over every page."""
+    totals = {}
+    for record in records:
+        for label, (calls, seconds, self_seconds) in record['frames'].items():
+            total = totals.setdefault(label, [0, 0, 0.0, 0.0])
+            total[0] += calls
+            total[1] += 1
+            total[2] += seconds
+            total[3] += self_seconds
+    return totals
+
+
+def write_report(records, output_dir, sort='seconds'):
+    """Write the CSV reports and folded stacks for records into output_dir. Returns their paths."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    records = sort_records(records, sort)
+    paths = [output_dir / 'pages.csv', output_dir / 'templates.csv', output_dir / 'profile.folded']
+
+    with open(paths[0], 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(PAGE_COLUMNS)
+        for record in records:
+            writer.writerow([
+                record['uri'], record['view'], f"{record['seconds']:.6f}", record['queries'],
+                f"{record['query_seconds']:.6f}", record['bytes'],
+            ])
+
+    with open(paths[1], 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(TEMPLATE_COLUMNS)
+        for record in records:
+            frames = sorted(record['frames'].items(), key=lambda item: item[1][1], reverse=True)
+            for label, (calls, seconds, self_seconds) in frames:
+                writer.writerow([
+                    record['uri'], record['view'], label, calls, f'{seconds:.6f}', f'{self_seconds:.6f}',
+                ])
+
+    # Pages of the same view share a root frame, so the flamegraph shows
+    # where each view spends its time across the whole build
+    stacks = defaultdict(float)
+    for record in records:
+        for path, seconds in record['stacks'].items():
+            stacks[path] += seconds
+    with open(paths[2], 'w', encoding='utf-8') as f:
+        for path, seconds in sorted(stacks.items()):
+            microseconds = round(seconds * 1e6)
+            if microseconds:
+                f.write(f'{path} {microseconds}\n')
+    return paths
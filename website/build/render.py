@@ -0,0 +1,207 @@
+"""
+Page Rendering
+
+Renders distilled pages to an output directory, either in-process or
+split across a pool of worker processes. Every worker sets up Django on
+its own, so it gets its own database connection and template engine,
+and renders pages through the same request path as `distill-local`
+(reusing one WSGI handler per process), so the output is byte-identical
+to a serial build.
+"""
+import contextlib
+import functools
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.utils.translation import activate as activate_lang
+from django_distill.errors import DistillRenderError
+from django_distill.renderer import DistillRenderer, write_file
+from django_distill.request import generate_filename, generate_uri, get_static_filepath
+from django_distill.urls import get_distilled_url_by_name
+from django_distill.utils import Path, get_langs
+
+from jaqman_chemicals import sqlite
+
+from .. import related
+from . import fragments, worker
+from .deps import DependencyRecorder
+from .profiling import PageProfiler
+
+# Upper bound on pages handed to a worker at once. Small enough to keep
+# workers balanced, large enough to amortise the pickling round trip.
+MAX_CHUNK_SIZE = 64
+
+
+def get_pages():
+    """
+    Return every page to render as (name, namespace, param_set, uri).
+    Runs each distill_func generator once, in the calling process.
+    """
+    with DistillRenderer() as renderer:
+        return [
+            (pattern.name, pattern.distill_namespace, param_set, uri)
+            for pattern, param_set, uri in renderer.get_urls_to_render()
+        ]
+
+
+@functools.cache
+def get_application():
+    """
+    One WSGI handler per process. django-distill builds a new one for every
+    page, which reloads all middleware and makes WhiteNoise rescan
+    STATIC_ROOT each time.
+    """
+    return get_wsgi_application()
+
+
+def render_uri(uri, status_codes):
+    """Same request as django-distill's render_uri, through the shared handler."""
+    env = {
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': 80,
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': uri,
+        'wsgi.input': BytesIO(),
+    }
+    statuses, headers, body = [], [], []
+
+    def start_response(status, response_headers):
+        statuses.append(status)
+        headers.extend(response_headers)
+        return body.append
+
+    body.extend(chunk for chunk in get_application()(env, start_response) if chunk)
+    status_code = int(statuses[0].split(' ', 1)[0])
+    if status_code not in status_codes:
+        raise DistillRenderError(f'Unexpected HTTP status: {statuses[0]} for URI: {uri}')
+    return status_code, headers, b''.join(body)
+
+
+def render_pattern(pattern, param_set, language_code):
+    """django-distill's render_pattern, using render_uri above."""
+    if language_code:
+        activate_lang(language_code)
+    uri = generate_uri(pattern.distill_namespace, pattern.name, param_set)
+    status, headers, body = render_uri(uri, pattern.distill_status_codes)
+    filename = generate_filename(pattern.distill_file, uri, param_set)
+    return uri, filename, status, headers, body
+
+
+def render_page(output_dir, page):
+    """
+    Render one page into output_dir.
+    Returns (bytes written, output paths relative to output_dir).
+    """
+    name, namespace, param_set, _uri = page
+    pattern = get_distilled_url_by_name(name, namespace=namespace)
+    written = 0
+    files = []
+    for lang in get_langs():
+        uri, filename, _status, _headers, body = render_pattern(pattern, param_set, lang)
+        full_path, _local_uri = get_static_filepath(output_dir, filename, uri)
+        write_file(Path(full_path), body)
+        written += len(body)
+        files.append(Path(full_path).relative_to(output_dir).as_posix())
+    return written, files
+
+
+def render_chunk(output_dir, pages, profile=False):
+    """
+    Render a list of pages, profiling each one if profile is set.
+    Returns (throughput stats and page profiles for this process,
+    {uri: dependencies}, fragment cache entries added while rendering).
+    """
+    output_dir = Path(output_dir)
+    started = time.perf_counter()
+    written = 0
+    page_deps = {}
+    profiles = []
+    for page in pages:
+        with DependencyRecorder() as recorder:
+            with PageProfiler(page[0]) if profile else contextlib.nullcontext() as profiler:
+                page_bytes, files = render_page(output_dir, page)
+        if profile:
+            profiles.append(profiler.record(page[3], page_bytes))
+        written += page_bytes
+        page_deps[page[3]] = {
+            'files': files,
+            'templates': sorted(recorder.templates),
+            'rows': sorted(recorder.rows),
+            'inputs': sorted(recorder.inputs),
+        }
+    stats = {
+        'pid': os.getpid(),
+        'pages': len(pages),
+        'bytes': written,
+        'seconds': time.perf_counter() - started,
+        'fragments': fragments.take_stats(),
+        'profile': profiles,
+    }
+    return stats, page_deps, fragments.take_new_entries()
+
+
+def _chunks(pages, jobs):
+    size = max(1, min(MAX_CHUNK_SIZE, -(-len(pages) // (jobs * 4))))
+    for start in range(0, len(pages), size):
+        yield pages[start:start + size]
+
+
+def _merge_stats(per_worker, stats):
+    totals = per_worker.setdefault(stats['pid'], {
+        'pid': stats['pid'], 'pages': 0, 'bytes': 0, 'seconds': 0.0,
+        'fragments': {'hits': 0, 'misses': 0}, 'profile': [],
+    })
+    totals['pages'] += stats['pages']
+    totals['bytes'] += stats['bytes']
+    totals['seconds'] += stats['seconds']
+    for name, count in stats['fragments'].items():
+        totals['fragments'][name] += count
+    totals['profile'].extend(stats['profile'])
+
+
+def render_pages(output_dir, pages, jobs=1, profile=False):
+    """
+    Render pages into output_dir using up to `jobs` worker processes.
+    Returns (per-worker stats dicts, {uri: dependencies} for every page).
+    With profile, each worker's stats include a profile of every page it
+    rendered (see profiling.py).
+    """
+    per_worker = {}
+    page_deps = {}
+    if jobs <= 1 or len(pages) <= 1:
+        if settings.FRAGMENT_CACHE_PERSIST:
+            fragments.load()
+        with DistillRenderer():
+            stats, page_deps, _entries = render_chunk(output_dir, pages, profile)
+        _merge_stats(per_worker, stats)
+        if settings.FRAGMENT_CACHE_PERSIST:
+            fragments.save()
+        return list(per_worker.values()), page_deps
+
+    # Spawn rather than fork so no worker inherits the parent's SQLite
+    # connection or template caches.
+    context = multiprocessing.get_context('spawn')
+    if settings.BUILD_SQLITE_PROFILE == 'immutable':
+        # Immutable connections don't read the WAL
+        sqlite.checkpoint(connection)
+    # Built here once (an incremental build already has it from snapshot())
+    # rather than in every worker
+    initargs = (str(settings.DATABASE_PATH), settings.BUILD_SQLITE_PROFILE, pickle.dumps(related.table_state()))
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context, initializer=worker.init, initargs=initargs) as executor:
+        futures = [executor.submit(worker.render_chunk, str(output_dir), chunk, profile) for chunk in _chunks(pages, jobs)]
+        for future in futures:
+            stats, chunk_deps, entries = future.result()
+            _merge_stats(per_worker, stats)
+            page_deps.update(chunk_deps)
+            fragments.merge(entries)
+    if settings.FRAGMENT_CACHE_PERSIST:
+        fragments.load()
+        fragments.save()
+    return list(per_worker.values()), page_deps
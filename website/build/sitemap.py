@@ -0,0 +1,130 @@
+"""
+Sitemap and robots.txt
+
+Writes sitemap.xml, a sitemap index, and the sitemap-N.xml shards it
+lists (at most SHARD_SIZE URLs each), plus robots.txt, into the output
+directory. URLs come straight from the distill_path registrations and
+their generators, one at a time, and are written as they come, so
+memory use doesn't grow with the catalogue. Product pages get their
+lastmod from Product.updated_at; listing pages get the newest
+updated_at of any product.
+
+Sitemap URLs must be absolute, so the sitemap is only written when
+settings.SITE_ORIGIN is set. robots.txt is written either way.
+"""
+from xml.sax.saxutils import escape
+
+from django.db.models import Max
+from django_distill.renderer import DistillRenderer, get_uri_values
+from django_distill.request import generate_uri
+
+from ..distill import product_rows
+from ..models import Product
+from ..seo import site_url
+
+# URLs per shard (the sitemap protocol allows 50,000)
+SHARD_SIZE = 50000
+
+SITEMAP_NAME = 'sitemap.xml'
+SHARD_NAME = 'sitemap-{}.xml'
+ROBOTS_NAME = 'robots.txt'
+
+# Pages that list products, so change whenever any product does
+LISTING_PAGES = {
+    'home', 'products', 'products_page', 'industry_products', 'industry_products_page',
+    'application_products', 'application_products_page',
+}
+
+XMLNS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def lastmod(value):
+    return value.strftime('%Y-%m-%dT%H:%M:%S+00:00') if value else None
+
+
+def page_urls():
+    """Yield (path, lastmod or None) for every HTML page of the site."""
+    latest = lastmod(Product.objects.aggregate(latest=Max('updated_at'))['latest'])
+    for pattern in DistillRenderer().urls_to_render:
+        if pattern.name == 'product_detail':
+            # The rows behind get_all_products(), with their updated_at
+            for slug, updated_at in product_rows():
+                yield generate_uri(pattern.distill_namespace, pattern.name, {'slug': slug}), lastmod(updated_at)
+            continue
+        for param_set in get_uri_values(pattern.distill_func, pattern.name):
+            uri = generate_uri(pattern.distill_namespace, pattern.name, param_set or ())
+            # Pages only: skip files such as search-index.json
+            if uri.endswith('/'):
+                yield uri, latest if pattern.name in LISTING_PAGES else None
+
+
+def url_entry(path, modified):
+    entry = f'<url><loc>{escape(site_url(path))}</loc>'
+    if modified:
+        entry += f'<lastmod>{modified}</lastmod>'
+    return entry + '</url>\n'
+
+
+def write_shards(output_dir, urls):
+    """Write urls into sitemap-N.xml shards. Returns (shard names, URL count)."""
+    shards = []
+    count = 0
+    shard = None
+    try:
+        for path, modified in urls:
+            if count % SHARD_SIZE == 0:
+                if shard:
+                    shard.write('</urlset>\n')
+                    shard.close()
+                shards.append(SHARD_NAME.format(len(shards) + 1))
+                shard = open(output_dir / shards[-1], 'w', encoding='utf-8')
+                shard.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{XMLNS}">\n')
+            shard.write(url_entry(path, modified))
+            count += 1
+        if shard:
+            shard.write('</urlset>\n')
+    finally:
+        if shard:
+            shard.close()
+    return shards, count
+
+
+def write_index(output_dir, shards):
+    with open(output_dir / SITEMAP_NAME, 'w', encoding='utf-8') as f:
+        f.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{XMLNS}">\n')
+        for name in shards:
+            f.write(f'<sitemap><loc>{escape(site_url("/" + name))}</loc></sitemap>\n')
+        f.write('</sitemapindex>\n')
+
+
+def remove_old_shards(output_dir, shards):
+    """Delete shards left from an earlier, longer sitemap."""
+    for path in output_dir.glob(SHARD_NAME.format('*')):
+        if path.name not in shards:
+            path.unlink()
+
+
+def write_robots(output_dir, sitemap_url):
+    lines = ['User-agent: *', 'Allow: /']
+    if sitemap_url:
+        lines.append(f'Sitemap: {sitemap_url}')
+    (output_dir / ROBOTS_NAME).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def write(output_dir):
+    """
+    Write the sitemap (if SITE_ORIGIN is set) and robots.txt into output_dir.
+    Returns (URL count, shard count), or None without a sitemap.
+    """
+    sitemap_url = site_url('/' + SITEMAP_NAME)
+    result = None
+    shards = []
+    if sitemap_url:
+        shards, count = write_shards(output_dir, page_urls())
+        write_index(output_dir, shards)
+        result = (count, len(shards))
+    else:
+        (output_dir / SITEMAP_NAME).unlink(missing_ok=True)
+    remove_old_shards(output_dir, shards)
+    write_robots(output_dir, sitemap_url)
+    return result
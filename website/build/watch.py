@@ -0,0 +1,259 @@
+"""
+Watch Mode
+
+Keeps a built site up to date while it is being edited, and serves it
+for previewing (`python manage.py watch_site`). The watcher polls:
+
+- the template directories: pages that used a changed template are
+  re-rendered
+- the static source directories (STATICFILES_DIRS): collectstatic runs
+  again, and pages re-render if the hashed names they link to changed
+- the catalogue stamp (see serving.py), which signals.py touches once a
+  Product, Industry, FAQ or other catalogue row is saved or deleted,
+  whichever process made the change (usually the admin)
+
+Every change runs an incremental build (see incremental.py) in this
+process, so only the pages whose inputs changed are rendered, and the
+template engine and database connection are already warm. The site is
+served over HTTP with a small script added to every HTML response (not
+to the files) that reloads the page once a build has written new
+output.
+"""
+import functools
+import json
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import parse_qs, urlsplit
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import close_old_connections
+from django.template.autoreload import get_template_directories, reset_loaders
+from django_distill.utils import Path
+
+from .. import serving
+from . import incremental, optimize, sitemap
+from .render import get_pages, render_pages
+
+# Kinds of change
+TEMPLATES = 'templates'
+STATIC = 'static'
+CONTENT = 'content'
+EVERYTHING = frozenset((TEMPLATES, STATIC, CONTENT))
+
+# Rebuilds of more pages than this are spread over worker processes;
+# smaller ones render in this process, which is already set up
+PARALLEL_PAGES = 100
+
+RELOAD_PATH = '/__reload'
+# Seconds a live reload request waits for a build before it is answered
+RELOAD_TIMEOUT = 25
+RELOAD_SCRIPT = (
+    '<script>(function(){{var generation={generation};function poll(){{'
+    "fetch('{path}?generation='+generation,{{cache:'no-store'}})"
+    '.then(function(r){{return r.json()}})'
+    '.then(function(d){{if(d.generation!==generation){{location.reload()}}else{{poll()}}}},'
+    'function(){{setTimeout(poll,1000)}})}}poll()}})();</script>'
+)
+
+
+# Change detection
+
+def static_directories():
+    return [Path(entry[1] if isinstance(entry, (list, tuple)) else entry) for entry in settings.STATICFILES_DIRS]
+
+
+def scan(directories):
+    """{path: mtime_ns} of every file under directories."""
+    files = {}
+    for directory in directories:
+        for dirpath, _dirnames, filenames in os.walk(directory):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    files[path] = os.stat(path).st_mtime_ns
+                except FileNotFoundError:
+                    pass
+    return files
+
+
+def file_states():
+    """What the watcher compares between polls, by kind of change."""
+    try:
+        stamp = os.stat(serving.stamp_path()).st_mtime_ns
+    except FileNotFoundError:
+        stamp = None
+    return {
+        TEMPLATES: scan(sorted(get_template_directories())),
+        STATIC: scan(static_directories()),
+        CONTENT: stamp,
+    }
+
+
+def changes(old, new):
+    """The kinds of change between two file_states()."""
+    return {kind for kind in new if new[kind] != old.get(kind)}
+
+
+# Rebuilding
+
+def rebuild(output_dir, changed, jobs=1, optimize_pages=False, log=print):
+    """
+    Bring the site in output_dir up to date after the changes in changed
+    (TEMPLATES, STATIC, CONTENT). Returns {'pages', 'rendered', 'removed',
+    'written'}, where written says whether any output changed.
+    """
+    close_old_connections()
+    if STATIC in changed:
+        call_command('collectstatic', interactive=False, verbosity=0)
+        # Unhashed stylesheet names (DEBUG) stay the same when they change
+        optimize.load_stylesheet.cache_clear()
+        optimize.critical_css.cache_clear()
+    if TEMPLATES in changed:
+        reset_loaders()
+
+    state = incremental.snapshot()
+    pages = get_pages()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = incremental.load_manifest(output_dir)
+    to_render, stale = incremental.plan(pages, output_dir, manifest, state)
+    if stale:
+        incremental.remove_stale_pages(manifest, output_dir, stale)
+    try:
+        _workers, page_deps = render_pages(
+            output_dir, to_render, jobs=jobs if len(to_render) > PARALLEL_PAGES else 1,
+        )
+    except Exception:
+        # Some pages may have been written before the error (say, a
+        # template syntax error), so render all of them again next time
+        if manifest is not None:
+            for page in to_render:
+                manifest['pages'].pop(page[3], None)
+            incremental.save_manifest(manifest)
+        raise
+    manifest = incremental.update_manifest(manifest, output_dir, state, page_deps, stale)
+    incremental.save_manifest(manifest)
+
+    if CONTENT in changed:
+        sitemap.write(output_dir)
+    incremental.sync_static_and_media_files(output_dir)
+
+    if optimize_pages:
+        # Critical CSS depends on the stylesheets, so a static change
+        # affects every page
+        entries = manifest['pages'].values() if STATIC in changed else page_deps.values()
+        paths = sorted(path for entry in entries for path in entry['files'] if path.endswith('.html'))
+        optimize.optimize_pages(
+            output_dir, paths, Path(settings.BUILD_CACHE_DIR) / 'optimize', base_url=settings.SITE_BASE_URL,
+            critical_elements=settings.CRITICAL_CSS_ELEMENTS, jobs=jobs if len(paths) > PARALLEL_PAGES else 1,
+        )
+
+    return {
+        'pages': len(pages),
+        'rendered': len(to_render),
+        'removed': len(stale),
+        'written': bool(to_render or stale or STATIC in changed),
+    }
+
+
+# Serving
+
+class Reloader:
+    """Build counter that live reload requests wait on."""
+
+    def __init__(self):
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def bump(self):
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, generation, timeout):
+        """The current generation, once it differs from generation or timeout seconds have passed."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+def inject_reload_script(page, generation):
+    script = RELOAD_SCRIPT.format(generation=generation, path=RELOAD_PATH).encode()
+    index = page.rfind(b'</body>')
+    if index == -1:
+        return page + script
+    return page[:index] + script + page[index:]
+
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    """
+    Serves the output directory at / and at SITE_BASE_URL/, as GitHub
+    Pages does, with live reload added to every page and caching off.
+    """
+
+    def __init__(self, *args, reloader, base_url='', **kwargs):
+        self.reloader = reloader
+        self.base_url = base_url
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == RELOAD_PATH:
+            self.send_reload_status(parse_qs(url.query).get('generation', [''])[0])
+            return
+        super().do_GET()
+
+    def send_reload_status(self, generation):
+        try:
+            generation = int(generation)
+        except ValueError:
+            generation = -1
+        body = json.dumps({'generation': self.reloader.wait(generation, RELOAD_TIMEOUT)}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def translate_path(self, path):
+        path = urlsplit(path).path
+        if self.base_url and (path == self.base_url or path.startswith(self.base_url + '/')):
+            path = path[len(self.base_url):] or '/'
+        return super().translate_path(path)
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and urlsplit(self.path).path.endswith('/'):
+            path = os.path.join(path, 'index.html')
+        if path.endswith('.html') and os.path.isfile(path):
+            return self.send_page(path, 200)
+        not_found = os.path.join(self.directory, '404.html')
+        if not os.path.exists(path) and os.path.isfile(not_found):
+            return self.send_page(not_found, 404)
+        return super().send_head()
+
+    def send_page(self, path, status):
+        with open(path, 'rb') as f:
+            body = inject_reload_script(f.read(), self.reloader.generation)
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        return BytesIO(body)
+
+    def end_headers(self):
+        self.send_header('Cache-Control', 'no-store')
+        super().end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(output_dir, address, port, reloader, base_url=''):
+    """Serve output_dir from a background thread. Returns the server."""
+    handler = functools.partial(PreviewHandler, directory=str(output_dir), reloader=reloader, base_url=base_url)
+    server = ThreadingHTTPServer((address, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,42 @@
+"""
+Build Workers
+
+Entry points for the spawned processes that render pages in parallel.
+A spawned process imports the modules holding its initializer and task
+before Django is set up, so this module must not import models (directly
+or through render.py) at import time.
+"""
+import pickle
+
+
+def init(database_path, sqlite_profile, related_table=None):
+    """
+    Set up Django in a freshly spawned worker process, connecting to the
+    parent's database with the given connection profile. related_table is
+    the parent's related-products table (related.table_state()), pickled
+    so that its products are only unpickled once the models are loaded;
+    the workers then don't each build it again.
+    """
+    import django
+    from django.conf import settings
+
+    from jaqman_chemicals import sqlite
+
+    settings.DATABASES['default'] = sqlite.database(database_path, sqlite_profile)
+    django.setup()
+
+    from .. import related
+    from . import fragments
+
+    if related_table is not None:
+        related.load_table(pickle.loads(related_table))
+    # Same as DistillRenderer: ignore hostnames while generating
+    settings.ALLOWED_HOSTS = ['*']
+    if settings.FRAGMENT_CACHE_PERSIST:
+        fragments.load()
+
+
+def render_chunk(output_dir, pages, profile=False):
+    """render.render_chunk, imported once Django is ready."""
+    from .render import render_chunk
+    return render_chunk(output_dir, pages, profile)
@@ -11,3 +11,19 @@ def contact_info(request):
         'WEB3FORMS_ACCESS_KEY': os.environ.get('WEB3FORMS_ACCESS_KEY', ''),
         'SITE_BASE_URL': getattr(settings, 'SITE_BASE_URL', ''),
     }
+
+
+def portable_urls(request):
+    """
+    In portable mode, point SITE_BASE_URL at the site root relative to the
+    page being rendered ('.', '..', '../..'), and expose the matching
+    prefix for the static/media tags.
+    """
+    if not settings.PORTABLE_URLS:
+        return {}
+    depth = request.path.count('/') - 1
+    prefix = '../' * depth if depth > 0 else './'
+    return {
+        'SITE_BASE_URL': prefix.rstrip('/'),
+        'PORTABLE_PREFIX': prefix,
+    }
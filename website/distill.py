@@ -4,13 +4,52 @@ Django Distill URL Generators
 These functions generate all possible URL parameters for dynamic routes,
 allowing django-distill to create static HTML pages for each item.
 """
-from .models import Product
+from . import listings
+from .models import Application, Industry, Product
+
+
+def product_rows():
+    """(slug, updated_at) of every product, streamed in chunks."""
+    return Product.objects.values_list('slug', 'updated_at').iterator(chunk_size=2000)
 
 
 def get_all_products():
     """
     Generator for all product detail pages.
-    Yields dict with 'slug' key for each product.
+    Yields dict with 'slug' key for each product. Only slugs and dates are
+    loaded; the pages get their products from build/catalogue.py.
     """
-    for product in Product.objects.all():
-        yield {'slug': product.slug}
+    for slug, _updated_at in product_rows():
+        yield {'slug': slug}
+
+
+def get_product_pages():
+    """Pages 2 onwards of the product list (page 1 is /products/)."""
+    for page in range(2, listings.page_count(listings.ALL) + 1):
+        yield {'page': page}
+
+
+def get_industries():
+    """First page of every listed industry's products."""
+    for slug in Industry.objects.filter(listed=True).values_list('slug', flat=True):
+        yield {'slug': slug}
+
+
+def get_industry_pages():
+    """Later pages of every listed industry's products."""
+    for pk, slug in Industry.objects.filter(listed=True).values_list('pk', 'slug'):
+        for page in range(2, listings.page_count((listings.INDUSTRY, pk)) + 1):
+            yield {'slug': slug, 'page': page}
+
+
+def get_applications():
+    """First page of every application's products."""
+    for slug in Application.objects.values_list('slug', flat=True):
+        yield {'slug': slug}
+
+
+def get_application_pages():
+    """Later pages of every application's products."""
+    for pk, slug in Application.objects.values_list('pk', 'slug'):
+        for page in range(2, listings.page_count((listings.APPLICATION, pk)) + 1):
+            yield {'slug': slug, 'page': page}
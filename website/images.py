@@ -0,0 +1,204 @@
+"""
+Responsive Image Derivatives
+
+Generates resized WebP/AVIF variants of uploaded images (Product.image,
+Industry.image) with Pillow. Variants are content-addressed: they are
+named after a hash of the source file and stored under
+MEDIA_ROOT/derivatives/, and a manifest maps each upload to its variants.
+An image is only re-encoded when its source hash changes.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+
+from .models import Industry, Product
+
+DERIVATIVES_DIR = 'derivatives'
+MANIFEST_NAME = 'manifest.json'
+
+# Encoder settings per output format
+FORMATS = {
+    'avif': {'format': 'AVIF', 'quality': 50},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+}
+
+_manifest_cache = {'mtime': None, 'data': {}}
+
+
+def manifest_path():
+    return settings.MEDIA_ROOT / DERIVATIVES_DIR / MANIFEST_NAME
+
+
+def load_manifest():
+    """Read the derivative manifest, re-reading it only when the file changes."""
+    path = manifest_path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if _manifest_cache['mtime'] != mtime:
+        with open(path, encoding='utf-8') as f:
+            _manifest_cache['data'] = json.load(f)
+        _manifest_cache['mtime'] = mtime
+    return _manifest_cache['data']
+
+
+def save_manifest(manifest):
+    path = manifest_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    tmp_path.replace(path)
+
+
+def enabled_formats():
+    """Configured formats that this Pillow build can encode."""
+    from PIL import features
+
+    return [fmt for fmt in settings.IMAGE_DERIVATIVE_FORMATS if fmt in FORMATS and features.check(fmt)]
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:20]
+
+
+def derivative_name(source_hash, width, fmt):
+    """Storage name (relative to MEDIA_ROOT) of one variant."""
+    return f'{DERIVATIVES_DIR}/{source_hash[:2]}/{source_hash}-{width}w.{fmt}'
+
+
+def generate(name, media_root, source_hash, widths, formats):
+    """
+    Encode every variant of one uploaded image that does not exist yet.
+    Runs in a worker process, so it only takes plain arguments.
+    """
+    # Imported here: rendering pages only reads the manifest
+    from PIL import Image, ImageOps
+
+    with Image.open(os.path.join(media_root, name)) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        source_width, source_height = image.size
+        # Never upscale; the largest variant is the source width
+        targets = sorted({w for w in widths if w < source_width} | {min(source_width, max(widths))})
+        for width in targets:
+            resized = None
+            for fmt in formats:
+                target = os.path.join(media_root, derivative_name(source_hash, width, fmt))
+                if os.path.exists(target):
+                    continue
+                if resized is None:
+                    height = round(source_height * width / source_width)
+                    resized = image.resize((width, height), Image.LANCZOS) if width != source_width else image
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                resized.save(target + '.tmp', **FORMATS[fmt])
+                os.replace(target + '.tmp', target)
+    return {
+        'hash': source_hash,
+        'width': source_width,
+        'height': source_height,
+        'widths': targets,
+        'formats': list(formats),
+    }
+
+
+def uploaded_images():
+    """Names of every uploaded Product and Industry image."""
+    names = set()
+    for model in (Product, Industry):
+        names.update(model.objects.exclude(image='').exclude(image__isnull=True).values_list('image', flat=True))
+    return sorted(names)
+
+
+def is_current(entry, stat, widths, formats):
+    return (
+        entry is not None
+        and entry.get('size') == stat.st_size
+        and entry.get('mtime') == stat.st_mtime_ns
+        and entry.get('formats') == list(formats)
+        and entry.get('requested_widths') == list(widths)
+    )
+
+
+def build_derivatives(names=None, jobs=None):
+    """
+    Bring the variants of the given uploads (default: all of them) up to
+    date, encoding in a process pool. Returns (generated, up-to-date)
+    counts; uploads whose file is missing count as neither.
+    """
+    media_root = str(settings.MEDIA_ROOT)
+    widths = list(settings.IMAGE_DERIVATIVE_WIDTHS)
+    formats = enabled_formats()
+    manifest = dict(load_manifest())
+    names = uploaded_images() if names is None else names
+    changed = False
+    current = 0
+
+    pending = {}
+    for name in names:
+        path = os.path.join(media_root, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            changed |= manifest.pop(name, None) is not None
+            continue
+        entry = manifest.get(name)
+        if is_current(entry, stat, widths, formats):
+            current += 1
+            continue
+        source_hash = file_hash(path)
+        if entry and entry['hash'] == source_hash and entry.get('formats') == formats \
+                and entry.get('requested_widths') == widths:
+            # Touched but not modified: just refresh the stat fingerprint
+            manifest[name] = dict(entry, size=stat.st_size, mtime=stat.st_mtime_ns)
+            changed = True
+            current += 1
+            continue
+        pending[name] = (source_hash, stat)
+
+    if pending:
+        if len(pending) == 1 or jobs == 1:
+            results = {name: generate(name, media_root, h, widths, formats) for name, (h, _) in pending.items()}
+        else:
+            with ProcessPoolExecutor(max_workers=jobs or None) as executor:
+                futures = {
+                    name: executor.submit(generate, name, media_root, h, widths, formats)
+                    for name, (h, _) in pending.items()
+                }
+                results = {name: future.result() for name, future in futures.items()}
+        for name, entry in results.items():
+            stat = pending[name][1]
+            entry.update(size=stat.st_size, mtime=stat.st_mtime_ns, requested_widths=widths)
+            manifest[name] = entry
+
+    if pending or changed:
+        save_manifest(manifest)
+    return len(pending), current
+
+
+def get_variants(name):
+    """Manifest entry for an uploaded image, or None if it has no variants yet."""
+    return load_manifest().get(name)
+
+
+def input_key(name):
+    """Build-dependency key for the variants of one upload."""
+    return f'image:{name}'
+
+
+def input_fingerprints():
+    """Fingerprint of every upload's variant set, for incremental builds."""
+    return {
+        input_key(name): f"{entry['hash']}:{','.join(map(str, entry['widths']))}:{','.join(entry['formats'])}"
+        for name, entry in load_manifest().items()
+    }
@@ -0,0 +1,182 @@
+"""
+Contact Inquiries
+
+Full-text search, export and import of contact inquiries.
+
+Search is backed by an SQLite FTS5 index (website_contactinquiry_fts,
+created in migration 0006 if SQLite has FTS5; without the index the
+admin falls back to its own search). The index is an external-content table over
+website_contactinquiry that triggers keep in sync with every insert,
+update and delete, so a search looks up its terms in the index instead
+of scanning every inquiry with LIKE '%...%'. Each word of a search
+matches as a prefix in any indexed field, and all words must match, as
+with the admin's own search. Results are ranked by bm25, with matches
+in the name and company weighted above the product and the message.
+
+Note: Django's SQLite backend alters a table by rebuilding it, which
+drops its triggers. A migration that alters ContactInquiry must create
+them again (see 0006_contactinquiry_search).
+
+Exports stream CSV or JSON Lines (one object per line) from a chunked
+database iterator in created_at order, so memory use doesn't grow with
+the number of inquiries. import_rows() reads either format back with
+bulk_create, in batches.
+"""
+import csv
+import json
+import re
+from datetime import datetime, time, timedelta
+
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ContactInquiry
+
+FTS_TABLE = 'website_contactinquiry_fts'
+
+# Indexed columns and their bm25 weights, in index column order
+FIELDS = (('name', 4.0), ('company', 4.0), ('product', 2.0), ('message', 1.0))
+
+WORD_PATTERN = re.compile(r'\w+')
+
+# Exported columns, in order
+EXPORT_FIELDS = (
+    'id', 'created_at', 'name', 'company', 'country', 'product', 'quantity',
+    'payment_terms', 'email', 'phone', 'message',
+)
+FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'jsonl': 'application/x-ndjson; charset=utf-8'}
+
+# Rows fetched per round trip while exporting, and inserted per query while importing
+CHUNK_SIZE = 2000
+BATCH_SIZE = 1000
+
+
+def is_available(using='default'):
+    """
+    True if the database has the FTS5 index: SQLite, built with FTS5, with
+    migration 0006 applied.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        return FTS_TABLE in connection.introspection.table_names(cursor)
+
+
+def match_expression(search_term):
+    """
+    FTS5 query matching every word of search_term as a prefix, e.g.
+    'acme tol' -> '"acme"* "tol"*'. Words are quoted so that FTS5
+    syntax in the input is searched for rather than interpreted.
+    Returns '' if search_term has no words.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD_PATTERN.findall(search_term))
+
+
+def search(queryset, search_term, rank=True):
+    """
+    Inquiries in queryset matching search_term, best match first if rank
+    is set (otherwise in queryset's order).
+    """
+    expression = match_expression(search_term)
+    if not expression:
+        return queryset.none()
+    table = queryset.model._meta.db_table
+    weights = ', '.join(str(weight) for _field, weight in FIELDS)
+    # A join on the index: the ORM can't express one to a table without a model
+    queryset = queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = {table}.id', f'{FTS_TABLE} MATCH %s'],
+        params=[expression],
+        select={'search_rank': f'bm25({FTS_TABLE}, {weights})'},
+    )
+    if rank:
+        # bm25 scores better matches lower
+        queryset = queryset.order_by('search_rank', '-pk')
+    return queryset
+
+
+def filter_inquiries(queryset, since=None, until=None, countries=()):
+    """
+    Inquiries in queryset made on or after the date `since` and on or
+    before the date `until` (both in the current time zone), from any of
+    `countries`. Compares created_at itself, so the range uses its index.
+    """
+    if since:
+        queryset = queryset.filter(created_at__gte=timezone.make_aware(datetime.combine(since, time.min)))
+    if until:
+        queryset = queryset.filter(
+            created_at__lt=timezone.make_aware(datetime.combine(until + timedelta(days=1), time.min)),
+        )
+    if countries:
+        queryset = queryset.filter(country__in=countries)
+    return queryset
+
+
+class Echo:
+    """File-like object whose write() returns what it was given, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_lines(queryset, fmt):
+    """Yield queryset as lines of CSV (with a header) or JSON Lines, oldest first."""
+    rows = queryset.order_by('created_at', 'pk').values_list(*EXPORT_FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    if fmt == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for row in rows:
+            yield writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+    elif fmt == 'jsonl':
+        for row in rows:
+            yield json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False, default=datetime.isoformat) + '\n'
+    else:
+        raise ValueError(f'Unknown export format {fmt!r}, expected one of {", ".join(FORMATS)}')
+
+
+def read_rows(lines, fmt):
+    """Yield {field: value} for every record in lines of CSV or JSON Lines."""
+    if fmt == 'csv':
+        yield from csv.DictReader(lines)
+    elif fmt == 'jsonl':
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError(f'Unknown import format {fmt!r}, expected one of {", ".join(FORMATS)}')
+
+
+def make_inquiry(row):
+    """A ContactInquiry from an exported row. Missing fields are left empty; an id is kept."""
+    fields = {name: row[name] for name in EXPORT_FIELDS if row.get(name) not in (None, '')}
+    created_at = fields.pop('created_at', None)
+    inquiry = ContactInquiry(**{name: value for name, value in fields.items() if name != 'id'})
+    if 'id' in fields:
+        inquiry.pk = int(fields['id'])
+    inquiry.created_at = parse_datetime(created_at) if created_at else timezone.now()
+    if timezone.is_naive(inquiry.created_at):
+        inquiry.created_at = timezone.make_aware(inquiry.created_at)
+    return inquiry
+
+
+def import_rows(rows, batch_size=BATCH_SIZE):
+    """
+    Insert inquiries from exported rows with bulk_create, batch_size at a
+    time, keeping their created_at. Rows whose id is already taken are
+    skipped, so importing the same export twice adds nothing. Returns the
+    number of rows read.
+    """
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(make_inquiry(row))
+        count += 1
+        if len(batch) >= batch_size:
+            ContactInquiry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        ContactInquiry.objects.bulk_create(batch, ignore_conflicts=True)
+    return count
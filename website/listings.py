@@ -0,0 +1,117 @@
+"""
+Product Listings
+
+Splits the product list, and the products of each industry and
+application, into pages of settings.PRODUCTS_PER_PAGE in name order.
+Pages are fetched by keyset rather than offset: each page starts after
+the (name, pk) of the last product on the previous page, so rendering
+any page is one bounded query on the (name, id) index, however long the
+catalogue is.
+
+The page boundaries come from one pass over (name, pk) pairs per kind
+of listing, made once per process on first use and dropped whenever the
+catalogue changes (see signals.py), or an edit in another process
+touches the catalogue stamp (see serving.py).
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
+from django.urls import reverse
+
+from .models import Product, ProductApplication, ProductIndustry
+from .serving import catalogue_version
+
+# Listing keys: the whole catalogue, or one industry/application by pk
+ALL = 'all'
+INDUSTRY = 'industry'
+APPLICATION = 'application'
+
+# Page numbers shown either side of the current page
+PAGE_LINK_RADIUS = 2
+
+_cache = {'boundaries': None, 'version': None}
+
+
+def page_starts(rows, per_page):
+    """
+    {listing: [None, (name, pk), ...]} from (listing, name, pk) rows sorted
+    by listing, name and pk. Entry i is the key page i + 1 starts after.
+    """
+    starts = {}
+    counts = defaultdict(int)
+    previous = {}
+    for listing, name, pk in rows:
+        listing_starts = starts.setdefault(listing, [None])
+        if counts[listing] and counts[listing] % per_page == 0:
+            listing_starts.append(previous[listing])
+        counts[listing] += 1
+        previous[listing] = (name, pk)
+    return starts
+
+
+def get_boundaries():
+    """Page boundaries of every listing, worked out on first use and after every change."""
+    version = catalogue_version()
+    if _cache['boundaries'] is None or _cache['version'] != version:
+        per_page = settings.PRODUCTS_PER_PAGE
+        products = Product.objects.order_by('name', 'pk').values_list('name', 'pk')
+        industries = ProductIndustry.objects.order_by('industry_id', 'product__name', 'product_id').values_list(
+            'industry_id', 'product__name', 'product_id',
+        )
+        applications = ProductApplication.objects.order_by(
+            'application_id', 'product__name', 'product_id',
+        ).values_list('application_id', 'product__name', 'product_id')
+        boundaries = page_starts(((ALL, name, pk) for name, pk in products.iterator()), per_page)
+        for kind, rows in ((INDUSTRY, industries), (APPLICATION, applications)):
+            boundaries.update(page_starts((((kind, facet), name, pk) for facet, name, pk in rows.iterator()), per_page))
+        _cache['boundaries'], _cache['version'] = boundaries, version
+    return _cache['boundaries']
+
+
+def invalidate(**kwargs):
+    _cache['boundaries'] = None
+
+
+def page_count(listing):
+    """Number of pages in a listing (an empty listing still has one)."""
+    return len(get_boundaries().get(listing, [None]))
+
+
+def get_page(listing, queryset, number):
+    """Products on page `number` of a listing of queryset. Raises Http404 past the last page."""
+    starts = get_boundaries().get(listing, [None])
+    if not 1 <= number <= len(starts):
+        raise Http404(f'No page {number}')
+    queryset = queryset.order_by('name', 'pk')
+    after = starts[number - 1]
+    if after is not None:
+        name, pk = after
+        queryset = queryset.filter(Q(name__gt=name) | Q(name=name, pk__gt=pk))
+    return list(queryset[:settings.PRODUCTS_PER_PAGE])
+
+
+def page_links(number, count, url_name, args=()):
+    """
+    Pagination for the template: {'previous', 'next', 'pages'}, where pages
+    lists (number, url) for the first, last and nearby pages, with
+    (None, None) marking a gap. Page 1 is url_name itself; later pages are
+    url_name + '_page'.
+    """
+    def url(page):
+        if page == 1:
+            return reverse(url_name, args=args)
+        return reverse(f'{url_name}_page', args=[*args, page])
+
+    shown = sorted({1, count, *range(max(1, number - PAGE_LINK_RADIUS), min(count, number + PAGE_LINK_RADIUS) + 1)})
+    pages = []
+    for page in shown:
+        if pages and page > pages[-1][0] + 1:
+            pages.append((None, None))
+        pages.append((page, url(page)))
+    return {
+        'previous': url(number - 1) if number > 1 else None,
+        'next': url(number + 1) if number < count else None,
+        'pages': pages,
+    }
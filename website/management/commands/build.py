@@ -0,0 +1,63 @@
+"""
+Run every stage of a site build in one process: collectstatic,
+build_images and build_site. Django starts once instead of once per
+stage; with the lean build settings it also skips the admin.
+
+Usage: DJANGO_SETTINGS_MODULE=jaqman_chemicals.settings_build python manage.py build _site --force --jobs 0
+       python manage.py build _site --incremental --optimize --precompress --skip-images
+"""
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Collect static files, encode images and generate the static site in one process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', nargs='?', type=str)
+        parser.add_argument('--jobs', type=int, default=0,
+                            help='Number of worker processes for images and pages (0 = one per CPU)')
+        parser.add_argument('--force', action='store_true',
+                            help='Recreate the output directory without asking')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only re-render pages that changed since the last build')
+        parser.add_argument('--optimize', action='store_true',
+                            help='Minify pages and inline the critical CSS of their stylesheets')
+        parser.add_argument('--precompress', action='store_true',
+                            help='Write .gz/.br siblings for HTML, CSS, JS and JSON files')
+        parser.add_argument('--skip-images', action='store_true',
+                            help='Do not encode responsive image variants')
+
+    def handle(self, *args, **options):
+        stages = [
+            ('collectstatic', lambda: call_command(
+                'collectstatic', interactive=False, verbosity=options['verbosity'],
+                stdout=self.stdout, stderr=self.stderr,
+            )),
+            ('build_images', lambda: call_command(
+                'build_images', jobs=options['jobs'], stdout=self.stdout, stderr=self.stderr,
+            )),
+            ('build_site', lambda: call_command(
+                'build_site', *[options['output_dir']] if options['output_dir'] else [],
+                jobs=options['jobs'], force=options['force'], incremental=options['incremental'],
+                optimize=options['optimize'], precompress=options['precompress'],
+                stdout=self.stdout, stderr=self.stderr,
+            )),
+        ]
+        if options['skip_images']:
+            stages = [stage for stage in stages if stage[0] != 'build_images']
+
+        timings = []
+        started = time.perf_counter()
+        for name, run in stages:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name}:'))
+            stage_started = time.perf_counter()
+            run()
+            timings.append((name, time.perf_counter() - stage_started))
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Stages:'))
+        for name, seconds in timings:
+            self.stdout.write(f'  {name:<14} {seconds:8.2f}s')
+        self.stdout.write(self.style.SUCCESS(f'Build finished in {time.perf_counter() - started:.2f}s'))
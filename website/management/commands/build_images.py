@@ -0,0 +1,28 @@
+"""
+Encode responsive WebP/AVIF variants of every uploaded image.
+
+Usage: python manage.py build_images --jobs 4
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from website.images import build_derivatives, enabled_formats
+
+
+class Command(BaseCommand):
+    help = 'Generate resized WebP/AVIF variants of Product and Industry images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=0,
+                            help='Number of worker processes (0 = one per CPU)')
+
+    def handle(self, *args, **options):
+        jobs = options['jobs'] or os.cpu_count() or 1
+        started = time.perf_counter()
+        generated, skipped = build_derivatives(jobs=jobs)
+        self.stdout.write(
+            f'Encoded {generated} images ({", ".join(enabled_formats())}), '
+            f'{skipped} already up to date, in {time.perf_counter() - started:.2f}s'
+        )
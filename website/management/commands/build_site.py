@@ -0,0 +1,163 @@
+"""
+Build the static site, optionally rendering pages across worker processes.
+
+Usage: python manage.py build_site _site --force --jobs 4
+       python manage.py build_site _site --incremental --optimize --precompress
+       python manage.py build_site _site --force --profile --profile-sort queries
+"""
+import os
+import time
+from shutil import rmtree
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django_distill.errors import DistillError
+from django_distill.static import copy_static_and_media_files
+from django_distill.utils import Path
+
+from website.build import incremental, optimize, profiling, sitemap
+from website.build.compress import precompress
+from website.build.render import get_pages, render_pages
+
+
+class Command(BaseCommand):
+    help = 'Generate the static site into a local directory, in parallel with --jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', nargs='?', type=str)
+        parser.add_argument('--jobs', type=int, default=1,
+                            help='Number of worker processes (0 = one per CPU)')
+        parser.add_argument('--force', action='store_true',
+                            help='Recreate the output directory without asking')
+        parser.add_argument('--exclude-staticfiles', action='store_true',
+                            help='Do not copy static and media files')
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only re-render pages whose templates or model rows changed since the last build')
+        parser.add_argument('--optimize', action='store_true',
+                            help='Minify pages and inline the critical CSS of their stylesheets')
+        parser.add_argument('--precompress', action='store_true',
+                            help='Write .gz/.br siblings for HTML, CSS, JS and JSON files')
+        parser.add_argument('--profile', nargs='?', const='', metavar='DIR',
+                            help='Profile queries, templates and bytes per URL, and write the report '
+                                 'to DIR (default: BUILD_CACHE_DIR/profile)')
+        parser.add_argument('--profile-sort', choices=profiling.SORT_KEYS, default='seconds',
+                            help='Order of the profile report (default: seconds)')
+
+    def handle(self, *args, **options):
+        output_dir = Path(options['output_dir'] or settings.DISTILL_DIR).resolve()
+        jobs = options['jobs'] or os.cpu_count() or 1
+        profile = options['profile'] is not None
+        if not options['exclude_staticfiles'] and not Path(settings.STATIC_ROOT).is_dir():
+            raise CommandError(
+                f'Static source directory "{settings.STATIC_ROOT}" does not exist, run collectstatic'
+            )
+
+        started = time.perf_counter()
+        try:
+            state = incremental.snapshot()
+            pages = get_pages()
+            if options['incremental']:
+                output_dir.mkdir(parents=True, exist_ok=True)
+                manifest = incremental.load_manifest(output_dir)
+                to_render, stale = incremental.plan(pages, output_dir, manifest, state)
+                if stale:
+                    incremental.remove_stale_pages(manifest, output_dir, stale)
+                self.stdout.write(
+                    f'Incremental build: {len(to_render)} of {len(pages)} pages changed, {len(stale)} removed'
+                )
+            else:
+                self.prepare_output_dir(output_dir, options['force'])
+                manifest, to_render, stale = None, pages, []
+
+            self.stdout.write(f'Rendering {len(to_render)} pages with {jobs} worker(s) into {output_dir}')
+            workers, page_deps = render_pages(output_dir, to_render, jobs=jobs, profile=profile)
+            manifest = incremental.update_manifest(manifest, output_dir, state, page_deps, stale)
+            incremental.save_manifest(manifest)
+
+            written = sitemap.write(output_dir)
+            if written:
+                self.stdout.write(f'Sitemap: {written[0]} URLs in {written[1]} shard(s)')
+            else:
+                self.stdout.write(self.style.WARNING('SITE_ORIGIN is not set, so no sitemap was written'))
+
+            if options['incremental'] and not options['exclude_staticfiles']:
+                incremental.sync_static_and_media_files(output_dir)
+            elif not options['exclude_staticfiles']:
+                copy_static_and_media_files(output_dir)
+
+            if options['optimize']:
+                # After copying static files: critical CSS comes from the copied stylesheets
+                self.optimize(output_dir, manifest, jobs)
+
+            if options['precompress']:
+                compressed, skipped = precompress(output_dir, jobs=jobs)
+                self.stdout.write(f'Precompressed {compressed} files ({skipped} already up to date)')
+        except DistillError as e:
+            raise CommandError(str(e)) from e
+        elapsed = time.perf_counter() - started
+
+        self.report(workers, elapsed)
+        if profile:
+            profile_dir = Path(options['profile'] or Path(settings.BUILD_CACHE_DIR) / 'profile')
+            self.report_profile(workers, profile_dir, options['profile_sort'])
+
+    def optimize(self, output_dir, manifest, jobs):
+        """Minify every page of the site and inline its critical CSS."""
+        paths = sorted(
+            path for entry in manifest['pages'].values() for path in entry['files'] if path.endswith('.html')
+        )
+        stats = optimize.optimize_pages(
+            output_dir, paths, Path(settings.BUILD_CACHE_DIR) / 'optimize', base_url=settings.SITE_BASE_URL,
+            critical_elements=settings.CRITICAL_CSS_ELEMENTS, jobs=jobs,
+        )
+        self.stdout.write(
+            f"Optimized {stats['pages']} pages ({stats['cached']} from cache): "
+            f"{stats['bytes_before'] / 1024:.1f} KB -> {stats['bytes_after'] / 1024:.1f} KB"
+        )
+
+    def prepare_output_dir(self, output_dir, force):
+        """Empty (or create) the output directory, as distill-local does."""
+        if output_dir.is_dir():
+            if not force:
+                answer = input(f'Delete and recreate {output_dir}? Type "yes" to continue: ')
+                if answer.lower() != 'yes':
+                    raise CommandError('Static site generation cancelled.')
+            rmtree(output_dir)
+        output_dir.mkdir(parents=True)
+
+    def report(self, workers, elapsed):
+        """Print per-worker and total throughput."""
+        total_pages = sum(w['pages'] for w in workers)
+        total_bytes = sum(w['bytes'] for w in workers)
+        for w in sorted(workers, key=lambda w: w['pid']):
+            rate = w['pages'] / w['seconds'] if w['seconds'] else 0
+            self.stdout.write(
+                f"  worker {w['pid']}: {w['pages']} pages, {w['bytes'] / 1024:.1f} KB "
+                f"in {w['seconds']:.2f}s ({rate:.1f} pages/s)"
+            )
+        hits = sum(w['fragments']['hits'] for w in workers)
+        misses = sum(w['fragments']['misses'] for w in workers)
+        if hits or misses:
+            self.stdout.write(f'  fragment cache: {hits} hits, {misses} misses')
+        rate = total_pages / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Built {total_pages} pages ({total_bytes / 1024:.1f} KB) in {elapsed:.2f}s ({rate:.1f} pages/s)'
+        ))
+
+    def report_profile(self, workers, profile_dir, sort, limit=10):
+        """Write the profile report and print the costliest pages and templates."""
+        records = [record for w in workers for record in w['profile']]
+        paths = profiling.write_report(records, profile_dir, sort)
+        self.stdout.write(f'Slowest pages by {sort}:')
+        for record in profiling.sort_records(records, sort)[:limit]:
+            self.stdout.write(
+                f"  {record['uri']:<50} {record['seconds'] * 1000:8.1f} ms  {record['queries']:>4} queries "
+                f"({record['query_seconds'] * 1000:.1f} ms)  {record['bytes'] / 1024:8.1f} KB"
+            )
+        self.stdout.write('Templates and blocks by self time:')
+        totals = sorted(profiling.frame_totals(records).items(), key=lambda item: item[1][3], reverse=True)
+        for label, (calls, pages, seconds, self_seconds) in totals[:limit]:
+            self.stdout.write(
+                f'  {label:<50} {self_seconds:8.3f}s self  {seconds:8.3f}s total  {calls} calls on {pages} pages'
+            )
+        self.stdout.write('Profile written to ' + ', '.join(str(path) for path in paths))
@@ -0,0 +1,89 @@
+"""
+Check a built site for broken links, missing assets and orphan pages.
+
+Exits with an error if any link or asset is broken (and, with --strict,
+if any page is orphaned), so it can gate a deploy.
+
+Usage: python manage.py check_site _site --jobs 0
+       python manage.py check_site _site --strict --limit 0
+"""
+import os
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django_distill.utils import Path
+
+from website.build import linkcheck
+
+
+class Command(BaseCommand):
+    help = 'Check every page of the built site for broken links, missing assets and orphan pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', nargs='?', type=str)
+        parser.add_argument('--jobs', type=int, default=0,
+                            help='Number of worker processes (0 = one per CPU)')
+        parser.add_argument('--strict', action='store_true',
+                            help='Fail on orphan pages too')
+        parser.add_argument('--limit', type=int, default=20,
+                            help='Problems listed per kind (0 = all)')
+
+    def handle(self, *args, **options):
+        output_dir = Path(options['output_dir'] or settings.DISTILL_DIR).resolve()
+        if not output_dir.is_dir():
+            raise CommandError(f'Output directory "{output_dir}" does not exist, run build_site first')
+        jobs = options['jobs'] or os.cpu_count() or 1
+
+        started = time.perf_counter()
+        report = linkcheck.check_site(
+            output_dir, Path(settings.BUILD_CACHE_DIR) / 'linkcheck', base_url=settings.SITE_BASE_URL, jobs=jobs,
+        )
+        elapsed = time.perf_counter() - started
+
+        self.list_problems('Broken links', report['broken_links'], options['limit'])
+        self.list_problems('Missing assets', report['missing_assets'], options['limit'])
+        if report['orphans']:
+            self.stdout.write(self.style.WARNING(
+                f"Orphan pages (not reachable from index.html): {len(report['orphans'])}"
+            ))
+            for page in report['orphans'][:options['limit'] or None]:
+                self.stdout.write(f'  {page}')
+        self.stdout.write(
+            f"Checked {report['references']} references in {report['pages']} pages and "
+            f"{report['stylesheets']} stylesheets ({report['cached']} files from cache) in {elapsed:.2f}s"
+        )
+
+        failures = len(report['broken_links']) + len(report['missing_assets'])
+        if options['strict']:
+            failures += len(report['orphans'])
+        if failures:
+            raise CommandError(
+                f"{len(report['broken_links'])} broken links, {len(report['missing_assets'])} missing assets, "
+                f"{len(report['orphans'])} orphan pages"
+            )
+        self.stdout.write(self.style.SUCCESS('No broken links or missing assets'))
+
+    def list_problems(self, title, problems, limit):
+        """Print problems grouped by the file they point to, most common first."""
+        if not problems:
+            return
+        self.stdout.write(self.style.WARNING(f'{title}: {len(problems)}'))
+        # A broken reference usually comes from a shared template, so it
+        # shows up on many pages, with a different relative URL on each level
+        counts = Counter()
+        examples = {}
+        for source, url, target in problems:
+            key = url if target == '..' else '/' + target
+            counts[key] += 1
+            examples.setdefault(key, (source, url))
+        lines = []
+        for key, count in counts.most_common():
+            source, url = examples[key]
+            where = f'{count} files, e.g. {source}' if count > 1 else source
+            lines.append(f'  {key}  ({where}: {url})')
+        for line in lines[:limit or None]:
+            self.stdout.write(line)
+        if limit and len(lines) > limit:
+            self.stdout.write(f'  ... and {len(lines) - limit} more')
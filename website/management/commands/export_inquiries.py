@@ -0,0 +1,58 @@
+"""
+Export contact inquiries as CSV or JSON Lines, oldest first.
+
+Usage: python manage.py export_inquiries --since 2026-01-01 --until 2026-03-31 --output q1.csv
+       python manage.py export_inquiries --format jsonl --country UAE Oman > gulf.jsonl
+"""
+import argparse
+import sys
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from website import inquiries
+from website.models import ContactInquiry
+
+
+def date_argument(value):
+    try:
+        date = parse_date(value)
+    except ValueError:
+        date = None
+    if date is None:
+        raise argparse.ArgumentTypeError(f'invalid date {value!r}, expected YYYY-MM-DD')
+    return date
+
+
+class Command(BaseCommand):
+    help = 'Stream contact inquiries to a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=inquiries.FORMATS,
+                            help='Output format (default: from the --output extension, else csv)')
+        parser.add_argument('--since', type=date_argument, help='First day to include (YYYY-MM-DD)')
+        parser.add_argument('--until', type=date_argument, help='Last day to include (YYYY-MM-DD)')
+        parser.add_argument('--country', nargs='+', default=[], help='Only inquiries from these countries')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['format'] or ('jsonl' if output and output.endswith('.jsonl') else 'csv')
+        queryset = inquiries.filter_inquiries(
+            ContactInquiry.objects.all(), options['since'], options['until'], options['country'],
+        )
+
+        lines = inquiries.export_lines(queryset, fmt)
+        count = 0
+        out = open(output, 'w', encoding='utf-8', newline='') if output else sys.stdout
+        try:
+            if fmt == 'csv':
+                out.write(next(lines))  # header
+            for line in lines:
+                out.write(line)
+                count += 1
+        finally:
+            if output:
+                out.close()
+        if output:
+            self.stdout.write(f'Exported {count} inquiries to {output}')
@@ -0,0 +1,43 @@
+"""
+Import contact inquiries from a CSV or JSON Lines export.
+
+Inquiries keep their id and created_at; ones whose id already exists
+are skipped, so importing an export twice adds nothing.
+
+Usage: python manage.py import_inquiries q1.csv
+       python manage.py import_inquiries gulf.jsonl --batch-size 5000
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from website import inquiries
+from website.models import ContactInquiry
+
+
+class Command(BaseCommand):
+    help = 'Bulk-insert contact inquiries from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File written by export_inquiries')
+        parser.add_argument('--format', choices=inquiries.FORMATS,
+                            help='Input format (default: from the file extension)')
+        parser.add_argument('--batch-size', type=int, default=inquiries.BATCH_SIZE,
+                            help=f'Inquiries per bulk insert (default: {inquiries.BATCH_SIZE})')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith('.jsonl') else 'csv')
+        started = time.perf_counter()
+        before = ContactInquiry.objects.count()
+        try:
+            with open(path, encoding='utf-8', newline='') as f, transaction.atomic():
+                read = inquiries.import_rows(inquiries.read_rows(f, fmt), options['batch_size'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise CommandError(f'Could not import {path}: {e}') from e
+        added = ContactInquiry.objects.count() - before
+        self.stdout.write(self.style.SUCCESS(
+            f'Read {read} inquiries, added {added} ({read - added} already present) '
+            f'in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,47 @@
+"""
+Download the third-party front-end libraries into website/static/vendor.
+
+Needs network access; builds afterwards don't. Commit the downloaded
+files together with website/vendor.lock.json, and point the templates
+and website.assets.BUNDLES at them in the same commit.
+
+Usage: python manage.py vendor_assets
+       python manage.py vendor_assets --upgrade
+       python manage.py vendor_assets --check
+"""
+from urllib.error import URLError
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from website import assets
+
+
+class Command(BaseCommand):
+    help = 'Vendor the third-party scripts, stylesheets and images the site uses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--upgrade', action='store_true',
+                            help='Fetch every file again from its source URL and rewrite the lock file')
+        parser.add_argument('--check', action='store_true',
+                            help='Only report vendored files that are missing (no downloads)')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            if not assets.load_lock():
+                self.stdout.write(f'Nothing is vendored yet (no {assets.LOCK_FILE.name})')
+                return
+            missing = assets.missing_vendored_files()
+            for path in missing:
+                self.stdout.write(f'  missing {path}')
+            if missing:
+                raise CommandError(f'{len(missing)} vendored files missing, run vendor_assets')
+            self.stdout.write(self.style.SUCCESS('All vendored files present'))
+            return
+        try:
+            written = assets.vendor(upgrade=options['upgrade'], log=self.stdout.write)
+        except (URLError, ImproperlyConfigured) as e:
+            raise CommandError(str(e)) from e
+        self.stdout.write(self.style.SUCCESS(
+            f'Vendored {written} files ({len(assets.load_lock())} in {assets.LOCK_FILE.name})'
+        ))
@@ -0,0 +1,102 @@
+"""
+Build the static site, then keep it up to date and serve it for
+previewing while templates, static files and the catalogue are edited.
+
+Pages are rendered with PORTABLE_URLS, as deploy.py builds them, and
+reload in the browser after every rebuild. Edits made in the admin
+(or any other process using the models) are picked up through the
+catalogue stamp signals.py touches; after editing the database by other
+means, touch BUILD_CACHE_DIR/catalogue.stamp.
+
+Usage: python manage.py watch_site _site --port 8001
+       python manage.py watch_site _site --optimize --jobs 0
+"""
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import autoreload
+from django_distill.utils import Path
+
+from website.build import watch
+
+
+class Command(BaseCommand):
+    help = 'Rebuild changed pages of the static site as it is edited, and serve it with live reload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', nargs='?', type=str)
+        parser.add_argument('--bind', default='127.0.0.1',
+                            help='Address to serve the site on (default: 127.0.0.1)')
+        parser.add_argument('--port', type=int, default=8001,
+                            help='Port to serve the site on (default: 8001, next to runserver)')
+        parser.add_argument('--jobs', type=int, default=1,
+                            help=f'Worker processes for rebuilds of more than {watch.PARALLEL_PAGES} pages '
+                                 '(0 = one per CPU)')
+        parser.add_argument('--optimize', action='store_true',
+                            help='Minify pages and inline their critical CSS, as deploys do')
+        parser.add_argument('--interval', type=float, default=0.2,
+                            help='Seconds between checks for changes (default: 0.2)')
+        parser.add_argument('--noreload', action='store_true',
+                            help='Do not restart when Python code changes')
+
+    def handle(self, *args, **options):
+        # Preview the relative links that ship; the environment variable
+        # carries the setting into render workers
+        settings.PORTABLE_URLS = True
+        os.environ['PORTABLE_URLS'] = 'True'
+        if options['noreload']:
+            self.inner_run(**options)
+        else:
+            autoreload.run_with_reloader(self.inner_run, **options)
+
+    def inner_run(self, **options):
+        output_dir = Path(options['output_dir'] or settings.DISTILL_DIR).resolve()
+        jobs = options['jobs'] or os.cpu_count() or 1
+        reloader = watch.Reloader()
+
+        base_url = settings.SITE_BASE_URL.rstrip('/')
+        try:
+            server = watch.serve(output_dir, options['bind'], options['port'], reloader, base_url)
+        except OSError as e:
+            self.stderr.write(f"Error: can't serve on {options['bind']}:{options['port']}: {e.strerror}")
+            # As in runserver: sys.exit() doesn't work in the reloader's thread
+            os._exit(1)
+
+        states = watch.file_states()
+        self.build(output_dir, watch.EVERYTHING, jobs, options['optimize'], reloader, 'Initial build')
+        self.stdout.write(
+            f"Serving {output_dir} at http://{options['bind']}:{options['port']}{base_url}/\n"
+            'Watching templates, static files and the catalogue. Quit with CONTROL-C.'
+        )
+        try:
+            while True:
+                time.sleep(options['interval'])
+                new_states = watch.file_states()
+                changed = watch.changes(states, new_states)
+                if changed:
+                    states = new_states
+                    label = ', '.join(sorted(changed)).capitalize() + ' changed'
+                    self.build(output_dir, changed, jobs, options['optimize'], reloader, label)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+
+    def build(self, output_dir, changed, jobs, optimize_pages, reloader, label):
+        """Rebuild after changed, reporting (rather than raising) errors so watching goes on."""
+        started = time.perf_counter()
+        try:
+            result = watch.rebuild(output_dir, changed, jobs=jobs, optimize_pages=optimize_pages)
+        except Exception as e:
+            self.stderr.write(f'{label}: build failed: {type(e).__name__}: {e}')
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(
+            f"[{time.strftime('%H:%M:%S')}] {label}: "
+            f"rendered {result['rendered']} of {result['pages']} pages, removed {result['removed']} "
+            f"in {elapsed:.0f} ms"
+        )
+        if result['written']:
+            reloader.bump()
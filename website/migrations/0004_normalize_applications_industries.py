@@ -0,0 +1,166 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def split_list(value):
+    """Parse a comma-separated field the way get_*_list() used to, dropping blanks and repeats."""
+    items = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if item and item not in items:
+            items.append(item)
+    return items
+
+
+def find_industry(name, industries):
+    """
+    Match a product's industry string to an Industry, by name or by the part
+    of the name before ' & ' ('Plastics' -> 'Plastics & Polymers').
+    """
+    key = name.casefold()
+    if key in industries:
+        return industries[key]
+    for industry_name, industry in industries.items():
+        if industry_name.split(' & ')[0] == key:
+            return industry
+    return None
+
+
+def link_products(apps, schema_editor):
+    Product = apps.get_model('website', 'Product')
+    Application = apps.get_model('website', 'Application')
+    Industry = apps.get_model('website', 'Industry')
+    ProductApplication = apps.get_model('website', 'ProductApplication')
+    ProductIndustry = apps.get_model('website', 'ProductIndustry')
+
+    industries = {industry.name.casefold(): industry for industry in Industry.objects.all()}
+    applications = {}
+    application_links = []
+    industry_links = []
+    for product in Product.objects.all():
+        for position, name in enumerate(split_list(product.applications)):
+            if name.casefold() not in applications:
+                applications[name.casefold()] = Application.objects.get_or_create(name=name)[0]
+            application_links.append(ProductApplication(
+                product=product, application=applications[name.casefold()], position=position,
+            ))
+        seen = set()
+        for position, name in enumerate(split_list(product.industries)):
+            industry = find_industry(name, industries)
+            if industry is None:
+                # Industries without a page of their own are kept off the site
+                industry = industries[name.casefold()] = Industry.objects.create(
+                    name=name, description='', listed=False,
+                )
+            if industry.pk not in seen:
+                seen.add(industry.pk)
+                industry_links.append(ProductIndustry(product=product, industry=industry, position=position))
+
+    ProductApplication.objects.bulk_create(application_links)
+    ProductIndustry.objects.bulk_create(industry_links)
+
+
+def unlink_products(apps, schema_editor):
+    Product = apps.get_model('website', 'Product')
+    Industry = apps.get_model('website', 'Industry')
+    ProductApplication = apps.get_model('website', 'ProductApplication')
+    ProductIndustry = apps.get_model('website', 'ProductIndustry')
+
+    for product in Product.objects.all():
+        links = ProductApplication.objects.filter(product=product).order_by('position')
+        product.applications = ', '.join(link.application.name for link in links.select_related('application'))
+        links = ProductIndustry.objects.filter(product=product).order_by('position')
+        product.industries = ', '.join(link.industry.name for link in links.select_related('industry'))
+        product.save(update_fields=['applications', 'industries'])
+    # The placeholders link_products created
+    Industry.objects.filter(listed=False).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0003_alter_faq_active_alter_industry_active_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Application',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductApplication',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_links', to='website.application')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='application_links', to='website.product')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductIndustry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('industry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='product_links', to='website.industry')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='industry_links', to='website.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Product industries',
+                'ordering': ['position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='productapplication',
+            constraint=models.UniqueConstraint(fields=('product', 'application'), name='unique_product_application'),
+        ),
+        migrations.AddConstraint(
+            model_name='productindustry',
+            constraint=models.UniqueConstraint(fields=('product', 'industry'), name='unique_product_industry'),
+        ),
+        migrations.AddField(
+            model_name='industry',
+            name='listed',
+            field=models.BooleanField(db_index=True, default=True, help_text='Shown on the site. Off for industries only named by products (no page of their own yet)'),
+        ),
+        migrations.RunPython(link_products, unlink_products),
+        # A default lets the text fields be re-added when migrating backwards
+        migrations.AlterField(
+            model_name='product',
+            name='applications',
+            field=models.TextField(default='', help_text='Comma-separated applications'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='industries',
+            field=models.TextField(default='', help_text='Comma-separated industries served'),
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='applications',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='industries',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='applications',
+            field=models.ManyToManyField(related_name='products', through='website.ProductApplication', to='website.application'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='industries',
+            field=models.ManyToManyField(related_name='products', through='website.ProductIndustry', to='website.industry'),
+        ),
+    ]
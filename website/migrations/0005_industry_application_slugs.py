@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:05
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+# The same fallbacks as Industry.save() and Application.save()
+FALLBACKS = {'Industry': 'industry', 'Application': 'application'}
+
+
+def unique_slug(name, taken, fallback, max_length=200):
+    """
+    slugify(name) (or fallback), with a numeric suffix if it is in taken.
+    A copy of website.slugs.unique_slug as it was when this migration was
+    written, so later changes there don't change what the migration does.
+    """
+    base = slugify(name) or fallback
+    slug, number = base[:max_length], 2
+    while slug in taken:
+        suffix = f'-{number}'
+        slug = base[:max_length - len(suffix)] + suffix
+        number += 1
+    taken.add(slug)
+    return slug
+
+
+def populate_slugs(apps, schema_editor):
+    for model_name, fallback in FALLBACKS.items():
+        model = apps.get_model('website', model_name)
+        taken = set()
+        rows = list(model.objects.order_by('pk'))
+        for row in rows:
+            row.slug = unique_slug(row.name, taken, fallback)
+        model.objects.bulk_update(rows, ['slug'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0004_normalize_applications_industries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=200, default=''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='industry',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=200, default=''),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_slugs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='application',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=200, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='industry',
+            name='slug',
+            field=models.SlugField(blank=True, max_length=200, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['name', 'id'], name='product_name_id_idx'),
+        ),
+    ]
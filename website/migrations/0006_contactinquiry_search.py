@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:40
+
+from django.db import migrations
+
+# FTS5 index over the searchable ContactInquiry fields (see website/inquiries.py).
+# External content: the index stores no copy of the text, and triggers
+# keep it in step with website_contactinquiry.
+CREATE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE website_contactinquiry_fts USING fts5(
+        name, company, product, message,
+        content='website_contactinquiry', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER website_contactinquiry_fts_insert AFTER INSERT ON website_contactinquiry BEGIN
+        INSERT INTO website_contactinquiry_fts(rowid, name, company, product, message)
+        VALUES (new.id, new.name, new.company, new.product, new.message);
+    END
+    """,
+    """
+    CREATE TRIGGER website_contactinquiry_fts_delete AFTER DELETE ON website_contactinquiry BEGIN
+        INSERT INTO website_contactinquiry_fts(website_contactinquiry_fts, rowid, name, company, product, message)
+        VALUES ('delete', old.id, old.name, old.company, old.product, old.message);
+    END
+    """,
+    """
+    CREATE TRIGGER website_contactinquiry_fts_update AFTER UPDATE ON website_contactinquiry BEGIN
+        INSERT INTO website_contactinquiry_fts(website_contactinquiry_fts, rowid, name, company, product, message)
+        VALUES ('delete', old.id, old.name, old.company, old.product, old.message);
+        INSERT INTO website_contactinquiry_fts(rowid, name, company, product, message)
+        VALUES (new.id, new.name, new.company, new.product, new.message);
+    END
+    """,
+    # Index the inquiries already there
+    "INSERT INTO website_contactinquiry_fts(website_contactinquiry_fts) VALUES ('rebuild')",
+]
+
+DROP_INDEX = [
+    'DROP TRIGGER IF EXISTS website_contactinquiry_fts_insert',
+    'DROP TRIGGER IF EXISTS website_contactinquiry_fts_delete',
+    'DROP TRIGGER IF EXISTS website_contactinquiry_fts_update',
+    'DROP TABLE IF EXISTS website_contactinquiry_fts',
+]
+
+
+def has_fts5(connection):
+    """True on SQLite built with FTS5; elsewhere the admin falls back to its own search."""
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        return ('ENABLE_FTS5',) in cursor.fetchall()
+
+
+def create_index(apps, schema_editor):
+    if has_fts5(schema_editor.connection):
+        for statement in CREATE_INDEX:
+            schema_editor.execute(statement)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in DROP_INDEX:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0005_industry_application_slugs'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
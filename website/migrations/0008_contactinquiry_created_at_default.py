@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:13
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0007_contactinquiry_created_at_indexes'),
+    ]
+
+    operations = [
+        # The column doesn't change, and altering it would rebuild the
+        # table on SQLite and drop the search index triggers (see 0006)
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='contactinquiry',
+                    name='created_at',
+                    field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+                ),
+            ],
+        ),
+    ]
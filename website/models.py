@@ -1,6 +1,9 @@
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 
+from .slugs import slug_for
+
 
 class Product(models.Model):
     name = models.CharField(max_length=200)
@@ -8,8 +11,8 @@ class Product(models.Model):
     description = models.TextField()
     purity = models.CharField(max_length=100, blank=True)
     specifications = models.JSONField(default=dict, help_text="Product specifications as key-value pairs")
-    applications = models.TextField(help_text="Comma-separated applications")
-    industries = models.TextField(help_text="Comma-separated industries served")
+    applications = models.ManyToManyField('Application', through='ProductApplication', related_name='products')
+    industries = models.ManyToManyField('Industry', through='ProductIndustry', related_name='products')
     packaging = models.CharField(max_length=200)
     hs_code = models.CharField(max_length=50, blank=True)
     image = models.ImageField(upload_to='products/', blank=True, null=True)
@@ -19,6 +22,10 @@ class Product(models.Model):
     
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Keyset pagination of product listings (see listings.py)
+            models.Index(fields=['name', 'id'], name='product_name_id_idx'),
+        ]
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -29,14 +36,49 @@ class Product(models.Model):
         return self.name
     
     def get_applications_list(self):
-        return [app.strip() for app in self.applications.split(',')]
+        # Prefetch 'application_links__application' when listing many products
+        return [link.application.name for link in self.application_links.all()]
     
     def get_industries_list(self):
-        return [ind.strip() for ind in self.industries.split(',')]
+        # Prefetch 'industry_links__industry' when listing many products
+        return [link.industry.name for link in self.industry_links.all()]
+
+
+class Application(models.Model):
+    name = models.CharField(max_length=200, unique=True)
+    slug = models.SlugField(max_length=200, unique=True, blank=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slug_for(self, fallback='application')
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return self.name
+
+
+class ProductApplication(models.Model):
+    """A product's application, in the order it is listed on the product page."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='application_links')
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='product_links')
+    position = models.PositiveSmallIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['position']
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'application'], name='unique_product_application'),
+        ]
+    
+    def __str__(self):
+        return f"{self.product} - {self.application}"
 
 
 class Industry(models.Model):
     name = models.CharField(max_length=200)
+    slug = models.SlugField(max_length=200, unique=True, blank=True)
     description = models.TextField()
     icon = models.CharField(max_length=100, blank=True, help_text="Emoji or icon class")
     image = models.ImageField(upload_to='industries/', blank=True, null=True, help_text="Industry card image")
@@ -45,15 +87,41 @@ class Industry(models.Model):
     stat_badge_icon = models.CharField(max_length=20, default="⚡", help_text="Emoji for badge, e.g., ⚡, ✓")
     order = models.IntegerField(default=0, db_index=True)
     active = models.BooleanField(default=True, db_index=True)
+    listed = models.BooleanField(
+        default=True, db_index=True,
+        help_text="Shown on the site. Off for industries only named by products (no page of their own yet)",
+    )
     
     class Meta:
         ordering = ['order', 'name']
         verbose_name_plural = "Industries"
     
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slug_for(self, fallback='industry')
+        super().save(*args, **kwargs)
+    
     def __str__(self):
         return self.name
 
 
+class ProductIndustry(models.Model):
+    """An industry a product serves, in the order it is listed."""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='industry_links')
+    industry = models.ForeignKey(Industry, on_delete=models.CASCADE, related_name='product_links')
+    position = models.PositiveSmallIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['position']
+        verbose_name_plural = "Product industries"
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'industry'], name='unique_product_industry'),
+        ]
+    
+    def __str__(self):
+        return f"{self.product} - {self.industry}"
+
+
 class FAQ(models.Model):
     question = models.CharField(max_length=500)
     answer = models.TextField()
@@ -79,11 +147,16 @@ class ContactInquiry(models.Model):
     message = models.TextField()
     email = models.EmailField(blank=True)
     phone = models.CharField(max_length=50, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # A default rather than auto_now_add, so imports can keep the original time
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Contact Inquiries"
+        indexes = [
+            models.Index(fields=['created_at'], name='inquiry_created_idx'),
+            models.Index(fields=['country', 'created_at'], name='inquiry_country_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.company} ({self.created_at.strftime('%Y-%m-%d')})"
@@ -0,0 +1,136 @@
+"""
+Related Products
+
+Scores every pair of products by what they share (industries,
+applications and specification keys) and keeps the best few for each
+product in a lookup table, built once per process on first use and
+dropped whenever a product or one of its links is saved or deleted (see
+signals.py), or an edit in another process touches the catalogue stamp
+(see serving.py). Product pages then look their related products up
+instead of querying for them. A parallel build makes the table once and
+hands it to its render workers (table_state(), load_table()).
+"""
+import hashlib
+import heapq
+from collections import Counter, defaultdict
+
+from .build.deps import not_recording, record_input, record_rows
+from .models import Product, ProductApplication, ProductIndustry
+from .serving import catalogue_version
+
+RELATED_COUNT = 4
+
+# Score for each shared feature
+INDUSTRY_WEIGHT = 3
+APPLICATION_WEIGHT = 2
+SPECIFICATION_WEIGHT = 1
+
+# Features shared by more products than this and by over a quarter of the
+# catalogue don't tell products apart, and are skipped when scoring
+COMMON_FEATURE_MIN = 100
+# Features shared by more products than this are skipped whatever the
+# size of the catalogue, so scoring stays linear in it
+COMMON_FEATURE_MAX = 500
+
+_cache = {'table': None, 'products': None, 'version': None}
+
+
+def product_features(products):
+    """{product pk: [(feature, weight), ...]} for every product."""
+    features = defaultdict(list)
+    for product in products:
+        if isinstance(product.specifications, dict):
+            for key in product.specifications:
+                features[product.pk].append((('specification', key.casefold()), SPECIFICATION_WEIGHT))
+    for product_id, industry_id in ProductIndustry.objects.values_list('product_id', 'industry_id'):
+        features[product_id].append((('industry', industry_id), INDUSTRY_WEIGHT))
+    for product_id, application_id in ProductApplication.objects.values_list('product_id', 'application_id'):
+        features[product_id].append((('application', application_id), APPLICATION_WEIGHT))
+    return features
+
+
+def build_table(products, features, count=RELATED_COUNT):
+    """
+    {product pk: (related pks, best first)} for products in their default
+    order. Ties, and products with too few matches, are filled in that
+    order.
+    """
+    order = {product.pk: position for position, product in enumerate(products)}
+    members = defaultdict(list)
+    for pk, weighted_features in features.items():
+        for feature, _weight in weighted_features:
+            members[feature].append(pk)
+    common = min(max(len(order) // 4, COMMON_FEATURE_MIN), COMMON_FEATURE_MAX)
+
+    table = {}
+    for pk in order:
+        scores = Counter()
+        for feature, weight in features.get(pk, ()):
+            shared = members[feature]
+            if len(shared) <= common:
+                # One (C-level) count of the list repeated weight times
+                scores.update(shared * weight if weight > 1 else shared)
+        scores.pop(pk, None)
+        candidates = list(scores)
+        if len(candidates) > count:
+            cutoff = heapq.nlargest(count, scores.values())[-1]
+            candidates = [other for other, score in scores.items() if score >= cutoff]
+        related = sorted(candidates, key=lambda other: (-scores[other], order[other]))[:count]
+        for other in order:
+            if len(related) >= count:
+                break
+            if other != pk and other not in related:
+                related.append(other)
+        table[pk] = tuple(related)
+    return table
+
+
+def get_table():
+    """The related-products table and the products it refers to, built on first use and after every change."""
+    version = catalogue_version()
+    if _cache['table'] is None or _cache['version'] != version:
+        # get_related_products() records the rows each page uses
+        with not_recording():
+            products = list(Product.objects.only('name', 'slug', 'image', 'purity', 'specifications', 'updated_at'))
+            _cache['table'] = build_table(products, product_features(products))
+        _cache['products'] = {product.pk: product for product in products}
+        _cache['version'] = version
+    return _cache['table'], _cache['products']
+
+
+def table_state():
+    """(table, products, version) from get_table(), for load_table() in another process."""
+    table, products = get_table()
+    return table, products, _cache['version']
+
+
+def load_table(state):
+    """Use a table from table_state(); it is still rebuilt here once the catalogue changes."""
+    _cache['table'], _cache['products'], _cache['version'] = state
+
+
+def invalidate(**kwargs):
+    _cache['table'] = _cache['products'] = None
+
+
+def input_key(pk):
+    """Build-dependency key for one product's related products."""
+    return f'related:{pk}'
+
+
+def input_fingerprints():
+    """Fingerprint of every product's related products, for incremental builds."""
+    table, _products = get_table()
+    return {
+        input_key(pk): hashlib.sha1(repr(related).encode()).hexdigest()
+        for pk, related in table.items()
+    }
+
+
+def get_related_products(product):
+    """The products related to product, best first."""
+    table, products = get_table()
+    related = table.get(product.pk, ())
+    record_input(input_key(product.pk))
+    record_rows(Product, related)
+    return [products[pk] for pk in related]
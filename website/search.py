@@ -0,0 +1,85 @@
+"""
+Product Search Index
+
+Builds the inverted index that the products page searches on the client,
+published as a static JSON file (see views.search_index). Layout:
+
+    {
+      "docs": [[name, path, summary], ...],
+      "terms": ["acetone", "acid", ...],      # sorted, for prefix search
+      "postings": [[doc * 4 + weight, ...], ...],
+      "stop_words": [...]
+    }
+
+postings[i] lists the documents containing terms[i]. The low two bits
+of each entry hold the weight of the best field the term appeared in
+(3 = name, 2 = applications/industries, 1 = description/specifications),
+so results can be ranked without shipping per-field postings. Paths are
+relative to the site root.
+"""
+import re
+import unicodedata
+
+from django.urls import reverse
+from django.utils.text import Truncator
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Field weights stored in the low bits of each posting
+NAME_WEIGHT = 3
+TAG_WEIGHT = 2
+TEXT_WEIGHT = 1
+
+SUMMARY_WORDS = 25
+
+STOP_WORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is',
+    'it', 'of', 'on', 'or', 'that', 'the', 'to', 'with',
+))
+
+
+def tokenize(text):
+    """
+    Lowercase, strip accents and split text into alphanumeric tokens.
+    Must match tokenize() in the products page script.
+    """
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode('ascii')
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def product_fields(product):
+    """(weight, text) pairs indexed for one product."""
+    specifications = product.specifications or {}
+    if isinstance(specifications, dict):
+        specifications = ' '.join(f'{key} {value}' for key, value in specifications.items())
+    return (
+        (NAME_WEIGHT, product.name),
+        (TAG_WEIGHT, ' '.join(product.get_applications_list())),
+        (TAG_WEIGHT, ' '.join(product.get_industries_list())),
+        (TEXT_WEIGHT, product.description),
+        (TEXT_WEIGHT, specifications),
+    )
+
+
+def build_index(products):
+    """Return the search index (a JSON-serialisable dict) for products."""
+    docs = []
+    weights = {}
+    for doc_id, product in enumerate(products):
+        docs.append([
+            product.name,
+            reverse('product_detail', args=[product.slug]).lstrip('/'),
+            Truncator(product.description).words(SUMMARY_WORDS),
+        ])
+        for weight, text in product_fields(product):
+            for token in tokenize(text):
+                doc_weights = weights.setdefault(token, {})
+                if doc_weights.get(doc_id, 0) < weight:
+                    doc_weights[doc_id] = weight
+
+    terms = sorted(weights)
+    postings = [
+        [doc_id * 4 + weight for doc_id, weight in sorted(weights[term].items())]
+        for term in terms
+    ]
+    return {'docs': docs, 'terms': terms, 'postings': postings, 'stop_words': sorted(STOP_WORDS)}
@@ -0,0 +1,59 @@
+"""
+Search Engine Data
+
+Absolute URLs of published pages, and the schema.org JSON-LD embedded in
+product pages. Absolute URLs need settings.SITE_ORIGIN (the scheme and
+host the site is published at); without it they are None, and pages
+leave them out.
+"""
+import json
+
+from django.conf import settings
+from django.utils.safestring import mark_safe
+
+ORGANIZATION = 'Jaqman Chemicals'
+
+# Characters that could end the <script> element or open a comment
+SCRIPT_ESCAPES = {ord('<'): '\\u003C', ord('>'): '\\u003E', ord('&'): '\\u0026'}
+
+
+def site_url(path):
+    """Absolute URL of a path on the published site (e.g. '/products/'), or None."""
+    if not settings.SITE_ORIGIN:
+        return None
+    return f'{settings.SITE_ORIGIN.rstrip("/")}{settings.SITE_BASE_URL}{path}'
+
+
+def property_value(name, value):
+    return {'@type': 'PropertyValue', 'name': name, 'value': value}
+
+
+def product_json_ld(product, applications, path):
+    """
+    schema.org Product data for a product page at path, as JSON safe to
+    put inside <script type="application/ld+json">. Specifications, the
+    purity and the HS code become additionalProperty values.
+    """
+    properties = [property_value(name, value) for name, value in product.specifications.items()]
+    if product.purity and 'Purity' not in product.specifications:
+        properties.append(property_value('Purity', product.purity))
+    if product.hs_code:
+        properties.append({**property_value('HS Code', product.hs_code), 'propertyID': 'HS'})
+
+    data = {
+        '@context': 'https://schema.org',
+        '@type': 'Product',
+        'name': product.name,
+        'description': product.description,
+        'brand': {'@type': 'Brand', 'name': ORGANIZATION},
+    }
+    url = site_url(path)
+    if url:
+        data['url'] = url
+    if product.image and url:
+        data['image'] = site_url(product.image.url)
+    if applications:
+        data['category'] = ', '.join(application.name for application in applications)
+    if properties:
+        data['additionalProperty'] = properties
+    return mark_safe(json.dumps(data, ensure_ascii=False).translate(SCRIPT_ESCAPES))
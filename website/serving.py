@@ -0,0 +1,187 @@
+"""
+Live Serving
+
+Page cache for running the site as a Django app (settings.PAGE_CACHE)
+rather than from the static build. Views wrapped in @cached_page render
+once; afterwards each request costs a stat() and a cache read. Entries
+hold the rendered page with gzip and brotli variants, and are served
+with conditional GET support (weak ETag of the content, Last-Modified)
+and Accept-Encoding negotiation.
+
+Entries are keyed on a stamp file touched whenever a change to the
+catalogue is committed (see signals.py) and on the templates and static
+manifest, so an edit in the admin or a deploy retires every cached page
+at once, in every worker process sharing the cache. The stamp is kept
+whether or not the page cache is on: the in-process caches pages are
+rendered from (listing page boundaries, the related-products table) are
+keyed on it too (catalogue_version()), so a worker that didn't make the
+edit rebuilds them before it renders again. Requests carrying a session
+or messages cookie (admin users) bypass the cache.
+"""
+import functools
+import gzip
+import hashlib
+import os
+import re
+import time
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.db.models import Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .build.deps import is_recording
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CACHE_ALIAS = 'pages'
+
+# Responses smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 256
+
+ENCODING_PATTERN = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+_versions = {}
+
+
+def stamp_path():
+    return settings.BUILD_CACHE_DIR / 'catalogue.stamp'
+
+
+def touch_stamp(timestamp=None):
+    """Record timestamp (default now) as the time of the last catalogue change, retiring every cached page."""
+    path = stamp_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    if timestamp is not None:
+        os.utime(path, (timestamp, timestamp))
+
+
+def last_change():
+    """
+    mtime_ns of the stamp file. A new stamp starts at the newest
+    Product.updated_at, so a fresh cache doesn't report every page as
+    changed just now.
+    """
+    try:
+        return os.stat(stamp_path()).st_mtime_ns
+    except FileNotFoundError:
+        from .models import Product
+
+        latest = Product.objects.aggregate(latest=Max('updated_at'))['latest']
+        touch_stamp(latest.timestamp() if latest else None)
+        return os.stat(stamp_path()).st_mtime_ns
+
+
+def catalogue_version():
+    """Version of the catalogue that in-process caches of it are keyed on."""
+    return last_change()
+
+
+def code_version():
+    """
+    (fingerprint, newest mtime) of the templates and static manifest,
+    worked out once per process: a deploy changes them and restarts it.
+    """
+    if not _versions:
+        from .build.incremental import static_manifest_fingerprint
+
+        newest = 0
+        digest = hashlib.sha1(repr(static_manifest_fingerprint()).encode())
+        template_dir = settings.BASE_DIR / 'website' / 'templates'
+        for dirpath, _dirnames, filenames in sorted(os.walk(template_dir)):
+            for filename in sorted(filenames):
+                mtime = os.stat(os.path.join(dirpath, filename)).st_mtime_ns
+                newest = max(newest, mtime)
+                digest.update(f'{filename}:{mtime}'.encode())
+        _versions.update(fingerprint=digest.hexdigest()[:16], mtime=newest)
+    return _versions['fingerprint'], _versions['mtime']
+
+
+def accepted_encodings(header):
+    """Content codings the client accepts (q > 0), from an Accept-Encoding header."""
+    accepted = set()
+    for item in (header or '').split(','):
+        match = ENCODING_PATTERN.match(item)
+        if match and float(match.group(2) or 1) > 0:
+            accepted.add(match.group(1).lower())
+    return accepted
+
+
+def compress(body):
+    """{content coding: body} for every coding that makes body smaller."""
+    variants = {'identity': body}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        compressed = gzip.compress(body, compresslevel=6, mtime=0)
+        if len(compressed) < len(body):
+            variants['gzip'] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(body)
+            if len(compressed) < len(body):
+                variants['br'] = compressed
+    return variants
+
+
+def make_entry(response, last_modified):
+    body = response.content
+    return {
+        'content_type': response['Content-Type'],
+        'etag': 'W/"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest(),
+        'last_modified': last_modified,
+        'bodies': compress(body),
+    }
+
+
+def serve_entry(request, entry):
+    """A response for a cached entry, honouring conditional and Accept-Encoding headers."""
+    accepted = accepted_encodings(request.headers.get('Accept-Encoding'))
+    encoding = next((coding for coding in ('br', 'gzip') if coding in entry['bodies'] and coding in accepted), None)
+    response = HttpResponse(entry['bodies'][encoding or 'identity'], content_type=entry['content_type'])
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['ETag'] = entry['etag']
+    response['Last-Modified'] = http_date(entry['last_modified'])
+    patch_vary_headers(response, ['Accept-Encoding'])
+    # Always revalidate: a changed catalogue must show up straight away
+    patch_cache_control(response, no_cache=True)
+    return get_conditional_response(
+        request, etag=entry['etag'], last_modified=entry['last_modified'], response=response,
+    )
+
+
+def is_cacheable(request):
+    if not settings.PAGE_CACHE or is_recording() or request.method not in ('GET', 'HEAD'):
+        return False
+    cookies = request.COOKIES
+    return settings.SESSION_COOKIE_NAME not in cookies and CookieStorage.cookie_name not in cookies
+
+
+def cached_page(view):
+    """Serve view from the page cache when settings.PAGE_CACHE is on."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not is_cacheable(request):
+            return view(request, *args, **kwargs)
+
+        changed = last_change()
+        fingerprint, templates_changed = code_version()
+        # Pages can embed their absolute URL (e.g. share links)
+        url = f'{request.scheme}://{request.get_host()}{request.path}'
+        key = hashlib.sha1(f'{changed}:{fingerprint}:{url}'.encode()).hexdigest()
+        cache = caches[CACHE_ALIAS]
+        entry = cache.get(key)
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming or response.cookies:
+                return response
+            last_modified = max(changed, templates_changed) // 1_000_000_000
+            entry = make_entry(response, min(last_modified, int(time.time())))
+            cache.set(key, entry)
+        return serve_entry(request, entry)
+    return wrapper
@@ -0,0 +1,80 @@
+"""
+Model Signals
+
+Keeps the responsive variants of uploaded images up to date when a
+Product or Industry is saved. When the catalogue changes, drops the
+related-products table, the listing page boundaries and the build's copy
+of the catalogue, and touches the catalogue stamp (see serving.py) that
+retires the live page cache and those caches in other processes, and
+that a running watch_site polls.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import listings, related, serving
+from .build import catalogue
+from .images import build_derivatives
+from .models import FAQ, Application, Industry, Product, ProductApplication, ProductIndustry
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Industry)
+def build_image_derivatives(sender, instance, raw=False, **kwargs):
+    """Encode the variants of a newly saved image (no-op if unchanged)."""
+    if raw or not settings.IMAGE_DERIVATIVES_ON_SAVE or not instance.image:
+        return
+    build_derivatives([instance.image.name], jobs=1)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductApplication)
+@receiver(post_delete, sender=ProductApplication)
+@receiver(post_save, sender=ProductIndustry)
+@receiver(post_delete, sender=ProductIndustry)
+def invalidate_related_products(sender, **kwargs):
+    related.invalidate()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductApplication)
+@receiver(post_delete, sender=ProductApplication)
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def invalidate_catalogue(sender, **kwargs):
+    catalogue.invalidate()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductApplication)
+@receiver(post_delete, sender=ProductApplication)
+@receiver(post_save, sender=ProductIndustry)
+@receiver(post_delete, sender=ProductIndustry)
+def invalidate_listings(sender, **kwargs):
+    listings.invalidate()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Industry)
+@receiver(post_delete, sender=Industry)
+@receiver(post_save, sender=FAQ)
+@receiver(post_delete, sender=FAQ)
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+@receiver(post_save, sender=ProductApplication)
+@receiver(post_delete, sender=ProductApplication)
+@receiver(post_save, sender=ProductIndustry)
+@receiver(post_delete, sender=ProductIndustry)
+def touch_catalogue_stamp(sender, raw=False, **kwargs):
+    """
+    Touch the catalogue stamp once the change is committed, so no request
+    can re-cache the old data, and other processes drop their copies of it.
+    """
+    if not raw:
+        transaction.on_commit(serving.touch_stamp)
+
@@ -0,0 +1,34 @@
+"""
+Slugs
+
+URL slugs for rows named by editors. slugify() can give two names the
+same slug ("Oil & Gas", "Oil Gas") or none at all ("—"), so slugs get a
+numeric suffix when theirs is taken and a fallback when they are empty.
+"""
+from django.utils.text import slugify
+
+# Room left for a numeric suffix when a slug is cut to the field's length
+SUFFIX_ROOM = 10
+
+
+def unique_slug(name, taken, fallback, max_length=200):
+    """slugify(name) (or fallback), with a numeric suffix if it is in taken. Adds the slug to taken."""
+    base = slugify(name) or fallback
+    slug, number = base[:max_length], 2
+    while slug in taken:
+        suffix = f'-{number}'
+        slug = base[:max_length - len(suffix)] + suffix
+        number += 1
+    taken.add(slug)
+    return slug
+
+
+def slug_for(instance, fallback):
+    """A slug for instance from its name that no other row of its model has."""
+    model = type(instance)
+    max_length = model._meta.get_field('slug').max_length
+    prefix = (slugify(instance.name) or fallback)[:max_length - SUFFIX_ROOM]
+    taken = set(
+        model.objects.filter(slug__startswith=prefix).exclude(pk=instance.pk).values_list('slug', flat=True)
+    )
+    return unique_slug(instance.name, taken, fallback, max_length)
@@ -0,0 +1,26 @@
+console.log("hero-animation");
+console.log("2");
+console.log("4");
+console.log("6");
+console.log("8");
+console.log("10");
+console.log("12");
+console.log("14");
+console.log("16");
+console.log("18");
+console.log("20");
+console.log("22");
+console.log("24");
+console.log("26");
+console.log("28");
+console.log("30");
+console.log("32");
+console.log("34");
+console.log("36");
+console.log("38");
+console.log("40");
+console.log("42");
+console.log("44");
+console.log("46");
+console.log("48");
+console.log("50");
@@ -0,0 +1,53 @@
+"""
+Fragment Cache Template Tags
+
+{% load fragments %} provides a build-time fragment cache:
+
+    {% fragment 'product-card' product %} ... {% endfragment %}
+
+While the site is being built, the body is rendered once for each
+distinct name, vary-on values (here, the product as of its last change)
+and page link prefix, and reused on every other page (see
+build/fragments.py). Outside a build it renders normally.
+"""
+from django import template
+from django.conf import settings
+from django.utils.safestring import mark_safe
+
+from ..build import fragments
+from ..build.deps import Dependencies, is_recording
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        if not is_recording() or not settings.FRAGMENT_CACHE_SIZE:
+            return self.nodelist.render(context)
+        prefix = f"{context.get('PORTABLE_PREFIX', '')}|{context.get('SITE_BASE_URL', '')}"
+        key = fragments.fragment_key(
+            self.name.resolve(context), self.origin.name, prefix,
+            [value.resolve(context) for value in self.vary_on],
+        )
+        html = fragments.get(key)
+        if html is None:
+            with Dependencies() as dependencies:
+                html = self.nodelist.render(context)
+            fragments.put(key, html, dependencies)
+        return mark_safe(html)
+
+
+@register.tag('fragment')
+def do_fragment(parser, token):
+    """{% fragment name [vary_on ...] %} ... {% endfragment %}"""
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a fragment name.")
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]])
@@ -0,0 +1,40 @@
+"""
+Responsive Image Template Tags
+
+{% load images %} provides {% responsive_image %}, which renders an
+uploaded image as a <picture> with AVIF/WebP srcsets of the variants
+built by website/images.py, falling back to the original upload for
+browsers without <picture> support and for images with no variants yet.
+"""
+from django import template
+from django.core.files.storage import default_storage
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from .portable import make_relative
+from .. import images
+from ..build.deps import record_input
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def responsive_image(context, field_file, sizes='100vw', **attrs):
+    """
+    {% responsive_image product.image sizes="(max-width: 768px) 100vw, 300px" alt=product.name class="card" %}
+    Keyword arguments other than sizes become attributes of the <img>.
+    """
+    record_input(images.input_key(field_file.name))
+    entry = images.get_variants(field_file.name)
+    img = format_html('<img src="{}"{}>', make_relative(field_file.url, context), flatatt(attrs))
+    if not entry:
+        return img
+
+    sources = format_html_join('', '<source type="image/{}" srcset="{}" sizes="{}">', (
+        (fmt, ', '.join(
+            f'{make_relative(default_storage.url(images.derivative_name(entry["hash"], width, fmt)), context)} {width}w'
+            for width in entry['widths']
+        ), sizes)
+        for fmt in entry['formats']
+    ))
+    return format_html('<picture>{}{}</picture>', sources, img)
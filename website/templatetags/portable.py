@@ -0,0 +1,40 @@
+"""
+Portable URL Template Tags
+
+Drop-in replacement for Django's `static` library: `{% load portable %}`
+provides the same tags plus {% media %}. In portable mode
+(settings.PORTABLE_URLS) static and media URLs are written relative to
+the page being rendered, so the static build needs no post-processing.
+Outside portable mode the tags behave exactly like Django's.
+"""
+from django import template
+from django.templatetags.static import StaticNode, get_media_prefix, get_static_prefix
+
+register = template.Library()
+register.tag('get_static_prefix', get_static_prefix)
+register.tag('get_media_prefix', get_media_prefix)
+
+
+def make_relative(url, context):
+    """Turn a site-absolute URL into one relative to the current page."""
+    prefix = context.get('PORTABLE_PREFIX')
+    if prefix and url.startswith('/') and not url.startswith('//'):
+        return prefix + url[1:]
+    return url
+
+
+class PortableStaticNode(StaticNode):
+    def url(self, context):
+        return make_relative(super().url(context), context)
+
+
+@register.tag('static')
+def do_static(parser, token):
+    """Same syntax as Django's {% static %}: {% static 'css/main.css' [as var] %}"""
+    return PortableStaticNode.handle_token(parser, token)
+
+
+@register.simple_tag(takes_context=True)
+def media(context, field_file):
+    """URL of an uploaded file, e.g. {% media product.image %}."""
+    return make_relative(field_file.url, context)
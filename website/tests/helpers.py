@@ -0,0 +1,57 @@
+"""Shared set-up for the website tests."""
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.test import override_settings
+from django.utils.text import slugify
+
+from website.models import FAQ, Industry, Product, ProductIndustry
+
+# Tests don't run collectstatic, so static URLs aren't looked up in a manifest
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
+
+def temporary_directory(test_case):
+    """A directory removed when test_case finishes."""
+    path = Path(tempfile.mkdtemp())
+    test_case.addCleanup(shutil.rmtree, path, ignore_errors=True)
+    return path
+
+
+def override(test_case, **settings):
+    """override_settings for the rest of test_case (from setUp)."""
+    overridden = override_settings(**settings)
+    overridden.enable()
+    test_case.addCleanup(overridden.disable)
+
+
+def use_build_cache(test_case):
+    """Point BUILD_CACHE_DIR (manifests, the catalogue stamp) at a temporary directory."""
+    path = temporary_directory(test_case)
+    override(test_case, BUILD_CACHE_DIR=path)
+    return path
+
+
+def make_product(name, industries=(), **fields):
+    fields = {'slug': slugify(name), 'description': f'About {name}.', 'packaging': 'Drums', **fields}
+    product = Product.objects.create(name=name, **fields)
+    for position, industry in enumerate(industries):
+        ProductIndustry.objects.create(product=product, industry=industry, position=position)
+    return product
+
+
+def make_catalogue():
+    """A small catalogue: two industries, three products and an FAQ."""
+    paints = Industry.objects.create(name='Paints & Coatings', description='Solvents for paints.')
+    inks = Industry.objects.create(name='Printing & Inks', description='Solvents for inks.')
+    products = [
+        make_product('Acetone', [paints], specifications={'Purity': '99%'}),
+        make_product('Toluene', [paints, inks]),
+        make_product('Xylene', [inks]),
+    ]
+    FAQ.objects.create(question='Do you ship worldwide?', answer='Yes.')
+    return products
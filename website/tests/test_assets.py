@@ -0,0 +1,101 @@
+import json
+from unittest import mock
+
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+
+from website import assets
+
+from .helpers import temporary_directory, use_build_cache
+
+CDN = 'https://cdn.example.com/lib@1.0/dist/'
+
+FILES = {
+    CDN + 'lib.js': b'var lib = 1;\n//# sourceMappingURL=lib.js.map\n',
+    CDN + 'lib.css': b'.a { background: url("img/a.png?v=2"); } .b { background: url(data:image/gif;base64,R0) }',
+    CDN + 'img/a.png': b'PNG',
+}
+
+
+class CssDependencyTests(SimpleTestCase):
+    def test_relative_urls(self):
+        css = b'''.a { background: url(../img/a.png#x) } .b { background: url( 'b.svg' ) }
+                  .c { background: url(/root.png) } .d { background: url(https://x.test/d.png) }'''
+        self.assertEqual(assets.css_dependencies('vendor/lib/css/lib.css', CDN + 'css/lib.css', css), {
+            'vendor/lib/img/a.png': CDN + 'img/a.png',
+            'vendor/lib/css/b.svg': CDN + 'css/b.svg',
+        })
+
+
+class VendorTests(SimpleTestCase):
+    def setUp(self):
+        self.root = temporary_directory(self)
+        self.files = dict(FILES)
+        for name, value in [
+            ('VENDOR_DIR', self.root),
+            ('LOCK_FILE', self.root / 'vendor.lock.json'),
+            ('VENDOR', {'vendor/lib/lib.js': CDN + 'lib.js', 'vendor/lib/lib.css': CDN + 'lib.css'}),
+            ('fetch', lambda url: (self.files[url], url)),
+        ]:
+            patcher = mock.patch.object(assets, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_vendor(self):
+        self.assertEqual(assets.missing_vendored_files(), [])
+        self.assertEqual(assets.vendor(log=lambda message: None), 3)
+        self.assertEqual((self.root / 'vendor/lib/lib.js').read_bytes(), b'var lib = 1;\n\n')
+        self.assertEqual((self.root / 'vendor/lib/img/a.png').read_bytes(), b'PNG')
+        lock = json.loads(assets.LOCK_FILE.read_text())
+        self.assertEqual(sorted(lock), ['vendor/lib/img/a.png', 'vendor/lib/lib.css', 'vendor/lib/lib.js'])
+        self.assertEqual(lock['vendor/lib/img/a.png']['url'], CDN + 'img/a.png')
+
+        # Files matching the lock aren't fetched again
+        self.files.clear()
+        self.assertEqual(assets.vendor(log=lambda message: None), 0)
+
+    def test_locked_content(self):
+        assets.vendor(log=lambda message: None)
+        (self.root / 'vendor/lib/lib.js').unlink()
+        self.assertEqual(assets.missing_vendored_files(), ['vendor/lib/lib.js'])
+        self.files[CDN + 'lib.js'] = b'var lib = 2;\n'
+        with self.assertRaisesMessage(ImproperlyConfigured, 'no longer matches vendor.lock.json'):
+            assets.vendor(log=lambda message: None)
+        self.assertEqual(assets.vendor(upgrade=True, log=lambda message: None), 3)
+        self.assertEqual((self.root / 'vendor/lib/lib.js').read_bytes(), b'var lib = 2;\n')
+
+
+class BundleTests(SimpleTestCase):
+    def setUp(self):
+        use_build_cache(self)
+        self.finder = assets.BundleFinder()
+
+    def test_bundle(self):
+        path = self.finder.find('bundles/home.js')
+        content = open(path, 'rb').read()
+        sources = [finders.find(source) for source in assets.BUNDLES['home']]
+        self.assertEqual(content, b''.join(
+            b'/* ' + source.encode() + b' */\n' + open(found, 'rb').read().rstrip() + b'\n;\n'
+            for source, found in zip(assets.BUNDLES['home'], sources)
+        ))
+        self.assertEqual(self.finder.find('bundles/home.js', find_all=True), [path])
+
+    def test_unknown_bundle(self):
+        self.assertEqual(self.finder.find('bundles/contact.js'), [])
+        self.assertEqual(self.finder.find('js/main.js'), [])
+
+    def test_list(self):
+        listed = sorted(path for path, _storage in self.finder.list(ignore_patterns=[]))
+        self.assertEqual(listed, sorted(f'bundles/{name}.js' for name in assets.BUNDLES))
+
+    def test_missing_source(self):
+        with mock.patch.dict(assets.BUNDLES, {'broken': ['vendor/missing.js']}):
+            with self.assertRaisesMessage(ImproperlyConfigured, 'run "python manage.py vendor_assets"'):
+                assets.build_bundle('broken')
+
+    def test_check(self):
+        with mock.patch.object(assets, 'missing_vendored_files', return_value=[]):
+            self.assertEqual(self.finder.check(), [])
+        with mock.patch.object(assets, 'missing_vendored_files', return_value=['vendor/aos/aos.js']):
+            self.assertEqual([warning.id for warning in self.finder.check()], ['website.W001'])
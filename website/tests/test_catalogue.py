@@ -0,0 +1,62 @@
+from django.http import Http404
+from django.test import TransactionTestCase
+
+from website.build import catalogue
+from website.build.deps import Dependencies, row_key
+from website.models import Application, Product, ProductApplication
+
+from .helpers import make_catalogue
+
+
+class CatalogueTests(TransactionTestCase):
+    def setUp(self):
+        catalogue.invalidate()
+        self.addCleanup(catalogue.invalidate)
+        self.acetone, self.toluene, _xylene = make_catalogue()
+        self.cleaning = Application.objects.create(name='Cleaning')
+        self.thinning = Application.objects.create(name='Thinning')
+        self.link = ProductApplication.objects.create(product=self.acetone, application=self.thinning, position=0)
+        self.other_link = ProductApplication.objects.create(product=self.acetone, application=self.cleaning, position=1)
+
+    def test_loaded_once_per_build(self):
+        with Dependencies():
+            with self.assertNumQueries(2):
+                product, applications = catalogue.get_product('acetone')
+            with self.assertNumQueries(0):
+                catalogue.get_product('toluene')
+        self.assertEqual(product, self.acetone)
+        self.assertEqual([application.name for application in applications], ['Thinning', 'Cleaning'])
+
+    def test_records_the_rows_used(self):
+        with Dependencies() as dependencies:
+            catalogue.get_product('acetone')
+        self.assertEqual(dependencies.rows, {
+            row_key(Product, self.acetone.pk),
+            row_key(ProductApplication, self.link.pk),
+            row_key(ProductApplication, self.other_link.pk),
+            row_key(Application, self.cleaning.pk),
+            row_key(Application, self.thinning.pk),
+        })
+
+    def test_missing_product(self):
+        with Dependencies(), self.assertRaises(Http404):
+            catalogue.get_product('benzene')
+        with self.assertRaises(Http404):
+            catalogue.get_product('benzene')
+
+    def test_reloaded_after_a_save(self):
+        with Dependencies():
+            catalogue.get_product('acetone')
+            self.thinning.name = 'Thinning Paints'
+            self.thinning.save()
+            self.toluene.purity = '99.5%'
+            self.toluene.save()
+            _product, applications = catalogue.get_product('acetone')
+            self.assertEqual(applications[0].name, 'Thinning Paints')
+            self.assertEqual(catalogue.get_product('toluene')[0].purity, '99.5%')
+
+    def test_queries_outside_builds(self):
+        with Dependencies():
+            catalogue.get_product('acetone')
+        Product.objects.filter(pk=self.acetone.pk).update(purity='98%')
+        self.assertEqual(catalogue.get_product('acetone')[0].purity, '98%')
@@ -0,0 +1,62 @@
+from django.test import TransactionTestCase
+
+from website.build import incremental
+from website.build.render import get_pages, render_pages
+from website.models import FAQ, Product
+
+from .helpers import STORAGES, make_catalogue, override, temporary_directory, use_build_cache
+
+
+class IncrementalBuildTests(TransactionTestCase):
+    """Builds as build_site --incremental makes them, in this process."""
+
+    def setUp(self):
+        override(self, STORAGES=STORAGES)
+        use_build_cache(self)
+        self.output_dir = temporary_directory(self)
+        self.acetone, self.toluene, self.xylene = make_catalogue()
+
+    def build(self):
+        """URIs of the pages the build rendered, and of those it removed."""
+        state = incremental.snapshot()
+        pages = get_pages()
+        manifest = incremental.load_manifest(self.output_dir)
+        to_render, stale = incremental.plan(pages, self.output_dir, manifest, state)
+        if stale:
+            incremental.remove_stale_pages(manifest, self.output_dir, stale)
+        _workers, page_deps = render_pages(self.output_dir, to_render)
+        incremental.save_manifest(incremental.update_manifest(manifest, self.output_dir, state, page_deps, stale))
+        return {page[3] for page in to_render}, set(stale)
+
+    def test_first_build_renders_every_page(self):
+        rendered, _stale = self.build()
+        self.assertEqual(rendered, {page[3] for page in get_pages()})
+        self.assertTrue((self.output_dir / 'products' / 'acetone' / 'index.html').is_file())
+
+    def test_unchanged_catalogue_renders_nothing(self):
+        self.build()
+        self.assertEqual(self.build(), (set(), set()))
+
+    def test_faq_edit_renders_the_page_listing_faqs(self):
+        self.build()
+        FAQ.objects.update(answer='Yes, from Mumbai.')
+        rendered, _stale = self.build()
+        self.assertEqual(rendered, {'/resources/'})
+
+    def test_product_edit_renders_only_pages_that_read_it(self):
+        self.build()
+        self.xylene.description = 'Mixed xylenes.'
+        self.xylene.save()
+        rendered, _stale = self.build()
+        self.assertIn('/products/xylene/', rendered)
+        self.assertIn('Mixed xylenes.', (self.output_dir / 'products' / 'xylene' / 'index.html').read_text())
+        self.assertIn('/products/', rendered)
+        for uri in ('/about/', '/contact/', '/industries/', '/resources/'):
+            self.assertNotIn(uri, rendered)
+
+    def test_deleted_product_page_is_removed(self):
+        self.build()
+        Product.objects.filter(pk=self.xylene.pk).delete()
+        _rendered, stale = self.build()
+        self.assertEqual(stale, {'/products/xylene/'})
+        self.assertFalse((self.output_dir / 'products' / 'xylene').exists())
@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+
+from website import inquiries
+from website.models import ContactInquiry
+
+
+class MatchExpressionTests(SimpleTestCase):
+    def test_words_are_quoted_prefixes(self):
+        self.assertEqual(inquiries.match_expression('acme tol'), '"acme"* "tol"*')
+
+    def test_fts_syntax_is_not_passed_through(self):
+        cases = {
+            '"acme': '"acme"*',
+            'tol*': '"tol"*',
+            '-acme +tol': '"acme"* "tol"*',
+            'acme OR tol NOT x': '"acme"* "OR"* "tol"* "NOT"* "x"*',
+            'NEAR(acme tol, 2)': '"NEAR"* "acme"* "tol"* "2"*',
+            'name:acme ^tol': '"name"* "acme"* "tol"*',
+        }
+        for term, expression in cases.items():
+            with self.subTest(term=term):
+                self.assertEqual(inquiries.match_expression(term), expression)
+
+    def test_no_words(self):
+        for term in ('', '   ', '"*()-:^'):
+            with self.subTest(term=term):
+                self.assertEqual(inquiries.match_expression(term), '')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'The search index is SQLite FTS5')
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fields = {'country': 'Kenya', 'quantity': '1 t', 'payment_terms': 'LC'}
+        cls.acme = ContactInquiry.objects.create(
+            name='Jo Smith', company='Acme (East) Ltd', product='Toluene', message='Price "per drum"?', **fields,
+        )
+        cls.other = ContactInquiry.objects.create(
+            name='Ann Lee', company='Borealis', product='Acetone', message='Need tol-grade NEAR: OR AND', **fields,
+        )
+
+    def search(self, term):
+        return list(inquiries.search(ContactInquiry.objects.all(), term))
+
+    def test_prefix_match(self):
+        self.assertEqual(self.search('acm'), [self.acme])
+        self.assertEqual(self.search('ac'), [self.acme, self.other])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.search('acme tol'), [self.acme])
+
+    def test_fts_syntax_in_the_term(self):
+        self.assertEqual(self.search('Acme (East'), [self.acme])
+        self.assertEqual(self.search('"per drum"*'), [self.acme])
+        self.assertEqual(self.search('tol-grade'), [self.other])
+        self.assertEqual(self.search('NEAR: OR AND'), [self.other])
+        self.assertEqual(self.search('company:borealis'), [])
+
+    def test_no_words_matches_nothing(self):
+        self.assertEqual(self.search('"*()'), [])
+        self.assertEqual(self.search(''), [])
+
+    def test_index_follows_edits(self):
+        self.acme.company = 'Zenith'
+        self.acme.save()
+        self.assertEqual(self.search('acme'), [])
+        self.assertEqual(self.search('zenith'), [self.acme])
+
+    def test_without_the_index(self):
+        self.assertTrue(inquiries.is_available())
+        with connection.cursor() as cursor:
+            for trigger in ('insert', 'delete', 'update'):
+                cursor.execute(f'DROP TRIGGER {inquiries.FTS_TABLE}_{trigger}')
+            cursor.execute(f'DROP TABLE {inquiries.FTS_TABLE}')
+        self.assertFalse(inquiries.is_available())
+
+
+class ImportTests(TestCase):
+    row = {
+        'id': '7', 'created_at': '2024-03-01T09:30:00+00:00', 'name': 'Jo Smith', 'company': 'Acme',
+        'country': 'Kenya', 'product': 'Toluene', 'quantity': '1 t', 'payment_terms': 'LC', 'message': 'Hi',
+    }
+
+    def test_created_at_is_kept(self):
+        self.assertEqual(inquiries.import_rows([self.row]), 1)
+        inquiry = ContactInquiry.objects.get(pk=7)
+        self.assertEqual(inquiry.created_at, datetime(2024, 3, 1, 9, 30, tzinfo=timezone.utc))
+        self.assertEqual(inquiry.company, 'Acme')
+
+    def test_same_export_twice_adds_nothing(self):
+        inquiries.import_rows([self.row])
+        inquiries.import_rows([{**self.row, 'created_at': '2025-01-01T00:00:00+00:00'}])
+        self.assertEqual(ContactInquiry.objects.count(), 1)
+        self.assertEqual(ContactInquiry.objects.get().created_at.year, 2024)
+
+    def test_new_inquiries_get_the_current_time(self):
+        inquiry = ContactInquiry.objects.create(name='Ann', company='B', country='C', product='D',
+                                                quantity='1', payment_terms='LC', message='-')
+        self.assertLess(abs((datetime.now(timezone.utc) - inquiry.created_at).total_seconds()), 60)
@@ -0,0 +1,77 @@
+from django.test import SimpleTestCase
+
+from website.build import linkcheck
+
+from .helpers import temporary_directory
+
+PAGES = {
+    'index.html': '''<link rel="stylesheet" href="static/css/style.css">
+        <link rel="preconnect" href="https://fonts.example.com">
+        <a href="about/">About</a> <a href="products/">Products</a> <a href="#top">Top</a>
+        <a href="mailto:sales@example.com">Mail</a> <a href="https://example.com/">Partner</a>''',
+    'about/index.html': '''<a href="../">Home</a> <a href="../contact/">Contact</a>
+        <img src="../media/team.webp" srcset="../media/team-320w.webp 320w, ../media/team-640w.webp 640w">''',
+    'products/index.html': '''<a href="/products/acetone/?ref=list#specs">Acetone</a>
+        <div style="background: url('/media/hero.jpg')"></div>
+        <!-- <a href="/drafts/">Drafts</a> -->
+        <script>var link = '<a href="/nowhere/">';</script>''',
+    'products/acetone/index.html': '<a href="../../../outside/">Up</a> <a href="../">Products</a>',
+    'products/old/index.html': '<a href="../">Products</a>',
+    '404.html': '<a href="/">Home</a>',
+}
+FILES = {
+    'static/css/style.css': 'body { background: url("../img/bg.png") } .logo { background: url(../img/logo.svg) }',
+    'static/img/bg.png': '',
+    'media/team.webp': '',
+    'media/team-320w.webp': '',
+    'media/hero.jpg': '',
+}
+
+
+class ResolveTests(SimpleTestCase):
+    def test_resolve(self):
+        self.assertEqual(linkcheck.resolve('../contact/', 'about/index.html'), 'contact/')
+        self.assertEqual(linkcheck.resolve('/products/?page=2', 'index.html'), 'products/')
+        self.assertEqual(linkcheck.resolve('./', 'index.html'), '')
+        self.assertEqual(linkcheck.resolve('../../x.png', 'about/index.html'), '..')
+        self.assertEqual(linkcheck.resolve('/jaqman/about/', 'index.html', base_url='/jaqman'), 'about/')
+        self.assertIsNone(linkcheck.resolve('#top', 'index.html'))
+        self.assertIsNone(linkcheck.resolve('//cdn.example.com/a.js', 'index.html'))
+
+    def test_target_file(self):
+        files = {'index.html', 'about/index.html', 'robots.txt'}
+        self.assertEqual(linkcheck.target_file('', files), 'index.html')
+        self.assertEqual(linkcheck.target_file('about', files), 'about/index.html')
+        self.assertEqual(linkcheck.target_file('robots.txt', files), 'robots.txt')
+        self.assertIsNone(linkcheck.target_file('contact/', files))
+
+
+class CheckSiteTests(SimpleTestCase):
+    def setUp(self):
+        self.output_dir = temporary_directory(self)
+        self.cache_dir = temporary_directory(self)
+        for path, content in {**PAGES, **FILES}.items():
+            (self.output_dir / path).parent.mkdir(parents=True, exist_ok=True)
+            (self.output_dir / path).write_text(content)
+
+    def test_report(self):
+        report = linkcheck.check_site(self.output_dir, self.cache_dir)
+        self.assertEqual(report['broken_links'], [
+            ('about/index.html', '../contact/', 'contact/'),
+            ('products/acetone/index.html', '../../../outside/', '..'),
+        ])
+        self.assertEqual(report['missing_assets'], [
+            ('about/index.html', '../media/team-640w.webp', 'media/team-640w.webp'),
+            ('static/css/style.css', '../img/logo.svg', 'static/img/logo.svg'),
+        ])
+        self.assertEqual(report['orphans'], ['products/old/index.html'])
+        self.assertEqual(report['pages'], 6)
+        self.assertEqual(report['stylesheets'], 1)
+        self.assertEqual(report['cached'], 0)
+
+    def test_cached_scans(self):
+        linkcheck.check_site(self.output_dir, self.cache_dir)
+        (self.output_dir / 'about' / 'index.html').write_text('<a href="../">Home</a>')
+        report = linkcheck.check_site(self.output_dir, self.cache_dir)
+        self.assertEqual(report['cached'], 6)
+        self.assertEqual(report['broken_links'], [('products/acetone/index.html', '../../../outside/', '..')])
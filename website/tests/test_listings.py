@@ -0,0 +1,72 @@
+import tempfile
+import time
+from pathlib import Path
+
+from django.http import Http404
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from website import listings, serving
+from website.models import Product
+
+
+class PageStartsTests(SimpleTestCase):
+    def test_pages_start_after_the_last_key_of_the_previous_page(self):
+        rows = [('all', name, pk) for pk, name in enumerate('abcde', 1)]
+        self.assertEqual(listings.page_starts(rows, 2), {'all': [None, ('b', 2), ('d', 4)]})
+
+    def test_exact_multiple_has_no_empty_last_page(self):
+        rows = [('all', name, pk) for pk, name in enumerate('abcd', 1)]
+        self.assertEqual(listings.page_starts(rows, 2), {'all': [None, ('b', 2)]})
+
+    def test_listings_are_paged_separately(self):
+        rows = [('x', 'a', 1), ('x', 'b', 2), ('x', 'c', 3), ('y', 'a', 1)]
+        self.assertEqual(listings.page_starts(rows, 2), {'x': [None, ('b', 2)], 'y': [None]})
+
+    def test_no_rows(self):
+        self.assertEqual(listings.page_starts([], 2), {})
+
+
+@override_settings(PRODUCTS_PER_PAGE=2)
+class GetPageTests(TestCase):
+    def setUp(self):
+        build_cache = tempfile.TemporaryDirectory()
+        self.addCleanup(build_cache.cleanup)
+        cache_settings = override_settings(BUILD_CACHE_DIR=Path(build_cache.name))
+        cache_settings.enable()
+        self.addCleanup(cache_settings.disable)
+        Product.objects.all().delete()
+        # Equal names, so the pk decides the order between them
+        for index, name in enumerate(('Acid', 'Base', 'Base', 'Salt')):
+            Product.objects.create(name=name, slug=f'product-{index}', description='-', packaging='-')
+        listings.invalidate()
+        self.addCleanup(listings.invalidate)
+
+    def names(self, number):
+        return [product.name for product in listings.get_page(listings.ALL, Product.objects.all(), number)]
+
+    def test_pages(self):
+        self.assertEqual(listings.page_count(listings.ALL), 2)
+        self.assertEqual(self.names(1), ['Acid', 'Base'])
+        self.assertEqual(self.names(2), ['Base', 'Salt'])
+
+    def test_past_the_last_page(self):
+        for number in (0, 3):
+            with self.assertRaises(Http404):
+                listings.get_page(listings.ALL, Product.objects.all(), number)
+
+    def test_empty_listing_has_one_empty_page(self):
+        listing = (listings.INDUSTRY, 0)
+        self.assertEqual(listings.page_count(listing), 1)
+        self.assertEqual(listings.get_page(listing, Product.objects.none(), 1), [])
+        with self.assertRaises(Http404):
+            listings.get_page(listing, Product.objects.none(), 2)
+
+    def test_edit_in_another_process(self):
+        self.assertEqual(listings.page_count(listings.ALL), 2)
+        # bulk_create sends no signals, as if another process had saved it
+        Product.objects.bulk_create([Product(name='Wax', slug='wax', description='-', packaging='-')])
+        self.assertEqual(listings.page_count(listings.ALL), 2)
+        # What signals.py does in that process once its change is committed
+        serving.touch_stamp(time.time() + 1)
+        self.assertEqual(listings.page_count(listings.ALL), 3)
+        self.assertEqual(self.names(3), ['Wax'])
@@ -0,0 +1,68 @@
+from django.test import SimpleTestCase
+
+from scripts import make_portable
+
+from .helpers import temporary_directory
+
+
+class RewriteLinksTests(SimpleTestCase):
+    def rewrite(self, content, prefix='../'):
+        return make_portable.rewrite_links(content, prefix)
+
+    def test_pages(self):
+        self.assertEqual(self.rewrite('<a href="/">Home</a>'), '<a href="../">Home</a>')
+        self.assertEqual(self.rewrite('<a href="/about/">About</a>'), '<a href="../about/">About</a>')
+        self.assertEqual(self.rewrite('<a href="/products/acetone/">'), '<a href="../products/acetone/">')
+        self.assertEqual(self.rewrite('<a href="/products/?q=acid">'), '<a href="../products/?q=acid">')
+
+    def test_static_and_media(self):
+        self.assertEqual(
+            self.rewrite('<link href="/static/css/main.css"><img src="/media/products/a.webp">'),
+            '<link href="../static/css/main.css"><img src="../media/products/a.webp">',
+        )
+        self.assertEqual(
+            self.rewrite('<div style="background: url(\'/media/a.jpg\')"></div><i style=\'b: url("/static/b.png")\'>'),
+            '<div style="background: url(\'../media/a.jpg\')"></div><i style=\'b: url("../static/b.png")\'>',
+        )
+
+    def test_srcset(self):
+        self.assertEqual(
+            self.rewrite('<img srcset="/media/a-320w.webp 320w, /media/a-640w.webp 640w,/static/b.webp 2x">'),
+            '<img srcset="../media/a-320w.webp 320w, ../media/a-640w.webp 640w,../static/b.webp 2x">',
+        )
+
+    def test_base_path(self):
+        self.assertEqual(self.rewrite('<a href="/jaqman-chemicals/about/">', './'), '<a href="./about/">')
+
+    def test_other_links_are_kept(self):
+        for content in (
+            '<a href="https://example.com/about/">',
+            '<a href="//cdn.example.com/x.js">',
+            '<a href="/admin/">',
+            '<script src="/other.js"></script>',
+            '<a href="#top">',
+            '<p>/about/ "/static/x"</p>',
+        ):
+            with self.subTest(content=content):
+                self.assertEqual(self.rewrite(content), content)
+
+
+class MakePortableTests(SimpleTestCase):
+    def setUp(self):
+        self.site_dir = temporary_directory(self)
+        (self.site_dir / 'about').mkdir()
+        (self.site_dir / 'index.html').write_text('<a href="/about/"><img src="/static/logo.png">')
+        (self.site_dir / 'about' / 'index.html').write_text('<a href="/">Home</a>')
+
+    def test_links_are_relative_to_each_page(self):
+        make_portable.make_portable(self.site_dir, jobs=1)
+        self.assertEqual((self.site_dir / 'index.html').read_text(), '<a href="./about/"><img src="./static/logo.png">')
+        self.assertEqual((self.site_dir / 'about' / 'index.html').read_text(), '<a href="../">Home</a>')
+
+    def test_unchanged_files_are_skipped(self):
+        processed, skipped, cache = make_portable.make_portable(self.site_dir, jobs=1)
+        self.assertEqual((processed, skipped), (2, 0))
+        (self.site_dir / 'about' / 'index.html').write_text('<a href="/products/">Products</a>')
+        processed, skipped, cache = make_portable.make_portable(self.site_dir, jobs=1, cache=cache)
+        self.assertEqual((processed, skipped), (1, 1))
+        self.assertEqual((self.site_dir / 'about' / 'index.html').read_text(), '<a href="../products/">Products</a>')
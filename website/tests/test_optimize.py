@@ -0,0 +1,71 @@
+from django.test import SimpleTestCase
+
+from website.build.optimize import HTML_TOKEN, minify_css, minify_html, minify_js, parse_attributes
+
+
+class MinifyJsTests(SimpleTestCase):
+    def test_division_is_not_a_regex(self):
+        self.assertEqual(minify_js('a = b / c / d;  // half'), 'a = b / c / d;')
+        self.assertEqual(minify_js('x = (a) / 2 / (b)'), 'x = (a) / 2 / (b)')
+
+    def test_regex_literals_are_kept(self):
+        self.assertEqual(minify_js('x = /ab+c\\/ // not a comment/g.test(s)'), 'x = /ab+c\\/ // not a comment/g.test(s)')
+        self.assertEqual(minify_js('return /[/*]/.test(s)'), 'return /[/*]/.test(s)')
+        self.assertEqual(minify_js('f(/  a  /)'), 'f(/  a  /)')
+
+    def test_strings_and_template_literals_are_kept(self):
+        script = 'var s = "/* a */", t = `line\n    // b\n`;'
+        self.assertEqual(minify_js(script), script)
+
+    def test_comments_indentation_and_blank_lines_go(self):
+        script = '/* head */\nfunction f() {\n    // note\n    return 1;\n\n\n}\n'
+        self.assertEqual(minify_js(script), 'function f() {\nreturn 1;\n}')
+
+    def test_line_breaks_are_kept(self):
+        self.assertEqual(minify_js('a = 1\nb = 2'), 'a = 1\nb = 2')
+
+
+class MinifyHtmlTests(SimpleTestCase):
+    def test_whitespace_and_comments(self):
+        page = '<div>\n  <p>Hello,   <b>world</b>  </p>\n  <!-- note -->\n</div>'
+        self.assertEqual(minify_html(page), '<div><p>Hello, <b>world</b></p></div>')
+
+    def test_pre_and_textarea_are_preserved(self):
+        for page in ('<pre>  a\n\n    b  </pre>', '<textarea>\n  keep  me\n</textarea>'):
+            self.assertEqual(minify_html(page), page)
+
+    def test_pre_is_one_raw_token(self):
+        match = HTML_TOKEN.search('<PRE class="code"><b>  a  </b></PRE>')
+        self.assertEqual(match.group('raw_tag'), 'PRE')
+        self.assertEqual(match.group('raw_body'), '<b>  a  </b>')
+
+    def test_conditional_comments_are_kept(self):
+        page = '<!--[if IE]><p>Old</p><![endif]-->'
+        self.assertEqual(minify_html(page), page)
+
+    def test_inline_script_and_style(self):
+        page = '<script>\n  // hi\n  var a = b / c;\n</script><style>\n  p {  color: red; }\n</style>'
+        self.assertEqual(minify_html(page), '<script>var a = b / c;</script><style>p{color:red}</style>')
+
+    def test_non_javascript_script_is_not_minified(self):
+        page = '<script type="text/template">\n  <p>  {{ a }}  // b </p>\n</script>'
+        self.assertEqual(minify_html(page), '<script type="text/template"><p>  {{ a }}  // b </p></script>')
+
+    def test_replace_tag(self):
+        page = '<p><img  src="a.png" ></p>'
+        result = minify_html(page, lambda name, tag: tag.replace('>', ' loading="lazy">') if name == 'img' else tag)
+        self.assertEqual(result, '<p><img src="a.png" loading="lazy"></p>')
+
+
+class MinifyCssTests(SimpleTestCase):
+    def test_comments_and_space_go_but_strings_stay(self):
+        css = '/* x */\na  >  b {\n  content: "  /* y */  ";\n  color: red;\n}\n'
+        self.assertEqual(minify_css(css), 'a>b{content:"  /* y */  ";color:red}')
+
+
+class ParseAttributesTests(SimpleTestCase):
+    def test_values(self):
+        self.assertEqual(
+            parse_attributes('<a HREF="/x?a=1&amp;b=2" data-x=\'y\' hidden class=c>'),
+            {'href': '/x?a=1&b=2', 'data-x': 'y', 'hidden': '', 'class': 'c'},
+        )
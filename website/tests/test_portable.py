@@ -0,0 +1,49 @@
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+
+from scripts import make_portable
+from website.build.render import get_pages, render_pages
+from website.context_processors import portable_urls
+from website.models import Product
+
+from .helpers import STORAGES, make_catalogue, override, temporary_directory, use_build_cache
+
+
+class PortableUrlsTests(SimpleTestCase):
+    def context(self, path):
+        return portable_urls(RequestFactory().get(path))
+
+    @override_settings(PORTABLE_URLS=True)
+    def test_prefix_follows_page_depth(self):
+        self.assertEqual(self.context('/'), {'SITE_BASE_URL': '.', 'PORTABLE_PREFIX': './'})
+        self.assertEqual(self.context('/about/'), {'SITE_BASE_URL': '..', 'PORTABLE_PREFIX': '../'})
+        self.assertEqual(self.context('/products/acetone/')['PORTABLE_PREFIX'], '../../')
+
+    @override_settings(PORTABLE_URLS=False)
+    def test_off(self):
+        self.assertEqual(self.context('/about/'), {})
+
+
+class PortableBuildTests(TransactionTestCase):
+    def setUp(self):
+        override(self, STORAGES=STORAGES, MEDIA_ROOT=temporary_directory(self))
+        use_build_cache(self)
+        make_catalogue()
+        Product.objects.filter(slug='acetone').update(image='products/acetone.webp')
+
+    def build(self, portable):
+        output_dir = temporary_directory(self)
+        with override_settings(PORTABLE_URLS=portable):
+            render_pages(output_dir, get_pages())
+        return output_dir
+
+    def test_matches_make_portable(self):
+        portable = self.build(portable=True)
+        absolute = self.build(portable=False)
+        make_portable.make_portable(absolute, jobs=1)
+        pages = sorted(path.relative_to(absolute) for path in absolute.rglob('*.html'))
+        self.assertIn(make_portable.Path('products/acetone/index.html'), pages)
+        for page in pages:
+            with self.subTest(page=str(page)):
+                self.assertEqual((portable / page).read_text(), (absolute / page).read_text())
+        self.assertIn('src="../../media/products/acetone.webp"',
+                      (portable / 'products' / 'acetone' / 'index.html').read_text())
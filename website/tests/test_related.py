@@ -0,0 +1,79 @@
+import pickle
+import time
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase, TransactionTestCase
+
+from website import related, serving
+from website.models import Industry, Product, ProductIndustry
+
+from .helpers import make_catalogue, make_product, use_build_cache
+
+
+def products(count):
+    return [SimpleNamespace(pk=pk) for pk in range(1, count + 1)]
+
+
+class BuildTableTests(SimpleTestCase):
+    def test_scores_by_weight(self):
+        features = {
+            1: [('industry', 3), ('specification', 1)],
+            2: [('specification', 1)],
+            3: [('industry', 3)],
+            4: [('application', 2), ('specification', 1)],
+            5: [('application', 2)],
+        }
+        table = related.build_table(products(5), features, count=3)
+        self.assertEqual(table[1], (3, 2, 4))
+        self.assertEqual(table[4], (5, 1, 2))
+
+    def test_ties_and_padding_follow_product_order(self):
+        features = {1: [('industry', 3)], 2: [('industry', 3)], 3: [('industry', 3)]}
+        table = related.build_table(products(5), features, count=3)
+        self.assertEqual(table[3], (1, 2, 4))
+        self.assertEqual(table[5], (1, 2, 3))
+
+    def test_skips_common_features(self):
+        count = related.COMMON_FEATURE_MIN + 10
+        features = {pk: [('specification', 1)] for pk in range(1, count + 1)}
+        features[count].append(('industry', 3))
+        features[count - 1].append(('industry', 3))
+        table = related.build_table(products(count), features, count=2)
+        self.assertEqual(table[count], (count - 1, 1))
+
+
+class RelatedProductsTests(TransactionTestCase):
+    def setUp(self):
+        use_build_cache(self)
+        related.invalidate()
+        self.addCleanup(related.invalidate)
+        self.acetone, self.toluene, self.xylene = make_catalogue()
+
+    def names(self, product):
+        return [other.name for other in related.get_related_products(product)]
+
+    def test_related_products(self):
+        self.assertEqual(self.names(self.acetone), ['Toluene', 'Xylene'])
+        self.assertEqual(self.names(self.xylene), ['Toluene', 'Acetone'])
+
+    def test_rebuilt_after_a_save(self):
+        self.names(self.xylene)
+        ProductIndustry.objects.create(product=self.acetone, industry=Industry.objects.get(slug='printing-inks'))
+        self.assertEqual(self.names(self.xylene), ['Acetone', 'Toluene'])
+        make_product('Benzene', [Industry.objects.get(slug='printing-inks')])
+        self.assertEqual(self.names(self.xylene), ['Acetone', 'Benzene', 'Toluene'])
+
+    def test_rebuilt_after_an_edit_in_another_process(self):
+        self.names(self.acetone)
+        # Queryset updates send no signals; the stamp is what tells other processes
+        Product.objects.filter(pk=self.xylene.pk).update(name='Mixed Xylenes')
+        self.assertEqual(self.names(self.acetone), ['Toluene', 'Xylene'])
+        serving.touch_stamp(time.time() + 1)
+        self.assertEqual(self.names(self.acetone), ['Toluene', 'Mixed Xylenes'])
+
+    def test_table_state(self):
+        state = pickle.loads(pickle.dumps(related.table_state()))
+        related.invalidate()
+        related.load_table(state)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(self.toluene), ['Acetone', 'Xylene'])
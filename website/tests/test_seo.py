@@ -0,0 +1,100 @@
+import json
+import re
+from unittest import mock
+from xml.etree import ElementTree
+
+from django.test import TransactionTestCase
+
+from website.build import sitemap
+from website.models import Application, Product
+
+from .helpers import STORAGES, make_catalogue, override, temporary_directory
+
+ORIGIN = 'https://www.example.com'
+XMLNS = {'sitemap': sitemap.XMLNS}
+
+
+class JsonLdTests(TransactionTestCase):
+    def setUp(self):
+        override(self, STORAGES=STORAGES, SITE_ORIGIN=ORIGIN)
+        make_catalogue()
+        self.product = Product.objects.get(slug='acetone')
+
+    def structured_data(self):
+        content = self.client.get('/products/acetone/').content.decode()
+        return re.search(r'<script type="application/ld\+json">(.*?)</script>', content, re.S).group(1)
+
+    def test_product(self):
+        self.product.hs_code = '2914.11'
+        self.product.purity = '99.5%'
+        self.product.image = 'products/acetone.webp'
+        self.product.save()
+        data = json.loads(self.structured_data())
+        self.assertEqual(data['@type'], 'Product')
+        self.assertEqual(data['url'], f'{ORIGIN}/products/acetone/')
+        self.assertEqual(data['image'], f'{ORIGIN}/media/products/acetone.webp')
+        self.assertEqual(data['additionalProperty'], [
+            {'@type': 'PropertyValue', 'name': 'Purity', 'value': '99%'},
+            {'@type': 'PropertyValue', 'name': 'HS Code', 'value': '2914.11', 'propertyID': 'HS'},
+        ])
+
+    def test_escapes_markup(self):
+        self.product.name = 'Acetone </script><script>alert(1)</script>'
+        self.product.description = 'Solvent & <!-- cleaner -->'
+        self.product.save()
+        Application.objects.create(name='Thinning').product_links.create(product=self.product)
+        script = self.structured_data()
+        self.assertNotIn('<', script)
+        self.assertNotIn('&', script)
+        data = json.loads(script)
+        self.assertEqual(data['name'], self.product.name)
+        self.assertEqual(data['description'], self.product.description)
+        self.assertEqual(data['category'], 'Thinning')
+
+    def test_without_origin(self):
+        override(self, SITE_ORIGIN='')
+        data = json.loads(self.structured_data())
+        self.assertNotIn('url', data)
+        self.assertNotIn('image', data)
+
+
+class SitemapTests(TransactionTestCase):
+    def setUp(self):
+        override(self, SITE_ORIGIN=ORIGIN)
+        make_catalogue()
+        self.output_dir = temporary_directory(self)
+
+    def locations(self, name, tag):
+        root = ElementTree.parse(self.output_dir / name).getroot()
+        return [element.text for element in root.findall(f'sitemap:{tag}/sitemap:loc', XMLNS)]
+
+    def test_sitemap(self):
+        count, shards = sitemap.write(self.output_dir)
+        self.assertEqual(shards, 1)
+        self.assertEqual(self.locations('sitemap.xml', 'sitemap'), [f'{ORIGIN}/sitemap-1.xml'])
+        urls = self.locations('sitemap-1.xml', 'url')
+        self.assertEqual(len(urls), count)
+        self.assertIn(f'{ORIGIN}/products/acetone/', urls)
+        self.assertIn(f'{ORIGIN}/products/industry/paints-coatings/', urls)
+        self.assertNotIn(f'{ORIGIN}/search-index.json', urls)
+        self.assertIn(f'Sitemap: {ORIGIN}/sitemap.xml', (self.output_dir / 'robots.txt').read_text())
+
+    def test_shards(self):
+        count, _shards = sitemap.write(self.output_dir)
+        with mock.patch.object(sitemap, 'SHARD_SIZE', 2):
+            self.assertEqual(sitemap.write(self.output_dir), (count, (count + 1) // 2))
+        shard_urls = [
+            url for name in self.locations('sitemap.xml', 'sitemap')
+            for url in self.locations(name.rsplit('/', 1)[1], 'url')
+        ]
+        self.assertEqual(len(shard_urls), count)
+        # A shorter sitemap removes the shards it no longer lists
+        sitemap.write(self.output_dir)
+        self.assertEqual([path.name for path in self.output_dir.glob('sitemap-*.xml')], ['sitemap-1.xml'])
+
+    def test_without_origin(self):
+        sitemap.write(self.output_dir)
+        override(self, SITE_ORIGIN='')
+        self.assertIsNone(sitemap.write(self.output_dir))
+        self.assertEqual([path.name for path in self.output_dir.iterdir()], ['robots.txt'])
+        self.assertEqual((self.output_dir / 'robots.txt').read_text(), 'User-agent: *\nAllow: /\n')
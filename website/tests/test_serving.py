@@ -0,0 +1,79 @@
+import gzip
+
+from django.test import SimpleTestCase, TransactionTestCase
+
+from website import serving
+from website.models import Product
+
+from .helpers import STORAGES, make_catalogue, override, use_build_cache
+
+PAGE = '/products/acetone/'
+
+
+class EncodingTests(SimpleTestCase):
+    def test_accepted_encodings(self):
+        self.assertEqual(serving.accepted_encodings('gzip;q=0, BR , deflate;q=0.5'), {'br', 'deflate'})
+        self.assertEqual(serving.accepted_encodings('gzip, nonsense;q=x'), {'gzip'})
+        self.assertEqual(serving.accepted_encodings(None), set())
+
+    def test_compress(self):
+        self.assertEqual(serving.compress(b'short'), {'identity': b'short'})
+        body = b'<p>Acetone</p>' * 100
+        variants = serving.compress(body)
+        self.assertEqual(gzip.decompress(variants['gzip']), body)
+        self.assertLess(len(variants['gzip']), len(body))
+
+
+class PageCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache_dir = use_build_cache(self)
+        override(self, STORAGES=STORAGES, PAGE_CACHE=True, CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'pages': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': str(cache_dir)},
+        })
+        self.acetone = make_catalogue()[0]
+
+    def rename(self, name):
+        # A queryset update sends no signals, so it doesn't retire cached pages
+        Product.objects.filter(pk=self.acetone.pk).update(name=name)
+
+    def test_served_from_the_cache(self):
+        first = self.client.get(PAGE)
+        self.rename('Dimethyl Ketone')
+        second = self.client.get(PAGE)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertIn('no-cache', second['Cache-Control'])
+        self.assertIn('Accept-Encoding', second['Vary'])
+
+    def test_compressed_variants(self):
+        plain = self.client.get(PAGE)
+        compressed = self.client.get(PAGE, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+
+    def test_conditional_get(self):
+        etag = self.client.get(PAGE)['ETag']
+        self.assertEqual(self.client.get(PAGE, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(PAGE, HTTP_IF_NONE_MATCH='W/"other"').status_code, 200)
+
+    def test_saving_retires_cached_pages(self):
+        self.client.get(PAGE)
+        self.acetone.name = 'Dimethyl Ketone'
+        self.acetone.save()
+        self.assertContains(self.client.get(PAGE), 'Dimethyl Ketone')
+
+    def test_sessions_bypass_the_cache(self):
+        self.client.get(PAGE)
+        self.rename('Dimethyl Ketone')
+        self.client.cookies['sessionid'] = 'admin'
+        response = self.client.get(PAGE)
+        self.assertContains(response, 'Dimethyl Ketone')
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_off(self):
+        override(self, PAGE_CACHE=False)
+        self.client.get(PAGE)
+        self.rename('Dimethyl Ketone')
+        self.assertContains(self.client.get(PAGE), 'Dimethyl Ketone')
@@ -0,0 +1,64 @@
+import sqlite3
+
+from django.db import OperationalError
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+from jaqman_chemicals import sqlite
+
+from .helpers import temporary_directory
+
+
+class ProfileTests(SimpleTestCase):
+    def setUp(self):
+        self.path = temporary_directory(self) / 'db.sqlite3'
+        with sqlite3.connect(self.path) as connection:
+            connection.execute('CREATE TABLE product (name TEXT)')
+        connection.close()
+
+    def connect(self, profile):
+        # Filled in with Django's defaults, as DATABASES entries are
+        settings_dict = ConnectionHandler({'default': sqlite.database(self.path, profile)}).settings['default']
+        connection = DatabaseWrapper(settings_dict, alias='profile')
+        self.addCleanup(connection.close)
+        return connection
+
+    def pragma(self, connection, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_default_is_stock_django(self):
+        self.assertEqual(sqlite.database(self.path), {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': self.path,
+            'OPTIONS': {},
+            'CONN_MAX_AGE': 0,
+            'CONN_HEALTH_CHECKS': False,
+        })
+
+    def test_unknown_profile(self):
+        with self.assertRaisesMessage(ValueError, "Unknown SQLite profile 'fast'"):
+            sqlite.database(self.path, 'fast')
+
+    def test_serve(self):
+        connection = self.connect('serve')
+        self.assertEqual(self.pragma(connection, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(connection, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(connection, 'cache_size'), -32 * 1024)
+        self.assertEqual(connection.settings_dict['CONN_MAX_AGE'], 600)
+
+    def test_build_is_read_only(self):
+        connection = self.connect('build')
+        self.assertEqual(self.pragma(connection, 'cache_size'), -128 * 1024)
+        with self.assertRaises(OperationalError), connection.cursor() as cursor:
+            cursor.execute("INSERT INTO product VALUES ('Acetone')")
+
+    def test_immutable(self):
+        settings_dict = sqlite.database(self.path, 'immutable')
+        self.assertTrue(settings_dict['NAME'].endswith('?mode=ro&immutable=1'))
+        self.assertIsNone(settings_dict['CONN_MAX_AGE'])
+        with self.connect('immutable').cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM product')
+            self.assertEqual(cursor.fetchone(), (0,))
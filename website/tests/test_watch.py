@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from django.test import SimpleTestCase, TransactionTestCase
+
+from website import serving
+from website.build import watch
+from website.build.render import get_pages
+
+from .helpers import STORAGES, make_catalogue, override, temporary_directory, use_build_cache
+
+
+class ChangeTests(SimpleTestCase):
+    def setUp(self):
+        use_build_cache(self)
+        self.static_dir = temporary_directory(self)
+        override(self, STATICFILES_DIRS=[self.static_dir])
+
+    def test_changes(self):
+        old = {watch.TEMPLATES: {'a.html': 1}, watch.STATIC: {}, watch.CONTENT: None}
+        new = {watch.TEMPLATES: {'a.html': 2}, watch.STATIC: {}, watch.CONTENT: 5}
+        self.assertEqual(watch.changes(old, new), {watch.TEMPLATES, watch.CONTENT})
+        self.assertEqual(watch.changes(new, new), set())
+        self.assertEqual(watch.changes({}, new), watch.EVERYTHING)
+
+    def test_file_states(self):
+        states = watch.file_states()
+        self.assertIsNone(states[watch.CONTENT])
+        self.assertEqual(states[watch.STATIC], {})
+        (self.static_dir / 'main.js').write_text('')
+        serving.touch_stamp(time.time())
+        self.assertEqual(watch.changes(states, watch.file_states()), {watch.STATIC, watch.CONTENT})
+
+
+class ReloadTests(SimpleTestCase):
+    def test_inject_reload_script(self):
+        page = watch.inject_reload_script(b'<body><p>Hi</p></body></html>', 3)
+        self.assertTrue(page.startswith(b'<body><p>Hi</p><script>'))
+        self.assertTrue(page.endswith(b'</script></body></html>'))
+        self.assertIn(b"fetch('/__reload?generation='+generation", page)
+        self.assertIn(b'var generation=3;', page)
+        self.assertTrue(watch.inject_reload_script(b'<p>Hi</p>', 0).startswith(b'<p>Hi</p><script>'))
+
+    def test_reloader(self):
+        reloader = watch.Reloader()
+        self.assertEqual(reloader.wait(0, timeout=0), 0)
+        self.assertEqual(reloader.wait(-1, timeout=0), 0)
+        threading.Timer(0.05, reloader.bump).start()
+        self.assertEqual(reloader.wait(0, timeout=5), 1)
+
+
+class PreviewTests(SimpleTestCase):
+    def setUp(self):
+        output_dir = temporary_directory(self)
+        (output_dir / 'about').mkdir()
+        (output_dir / 'about' / 'index.html').write_text('<body>About</body>')
+        (output_dir / '404.html').write_text('<body>Not found</body>')
+        (output_dir / 'robots.txt').write_text('User-agent: *\n')
+        self.reloader = watch.Reloader()
+        server = watch.serve(output_dir, '127.0.0.1', 0, self.reloader, base_url='/jaqman')
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.url = f'http://127.0.0.1:{server.server_address[1]}'
+
+    def get(self, path):
+        with urlopen(self.url + path, timeout=10) as response:
+            return response.status, response.headers, response.read()
+
+    def test_pages(self):
+        for path in ('/about/', '/jaqman/about/'):
+            status, headers, body = self.get(path)
+            self.assertEqual(status, 200)
+            self.assertEqual(headers['Cache-Control'], 'no-store')
+            self.assertTrue(body.startswith(b'<body>About<script>'))
+        _status, _headers, body = self.get('/robots.txt')
+        self.assertEqual(body, b'User-agent: *\n')
+
+    def test_not_found(self):
+        with self.assertRaises(HTTPError) as raised:
+            self.get('/contact/')
+        self.assertEqual(raised.exception.code, 404)
+        self.assertIn(b'Not found<script>', raised.exception.read())
+
+    def test_reload_status(self):
+        self.reloader.bump()
+        _status, _headers, body = self.get('/__reload?generation=0')
+        self.assertEqual(json.loads(body), {'generation': 1})
+
+
+class RebuildTests(TransactionTestCase):
+    def setUp(self):
+        override(self, STORAGES=STORAGES, STATIC_ROOT=temporary_directory(self), MEDIA_ROOT=temporary_directory(self))
+        use_build_cache(self)
+        self.output_dir = temporary_directory(self)
+        self.acetone = make_catalogue()[0]
+
+    def rebuild(self, changed):
+        return watch.rebuild(self.output_dir, changed, log=lambda message: None)
+
+    def test_rebuild(self):
+        pages = len(get_pages())
+        self.assertEqual(self.rebuild({watch.TEMPLATES, watch.CONTENT}), {
+            'pages': pages, 'rendered': pages, 'removed': 0, 'written': True,
+        })
+        self.assertTrue((self.output_dir / 'robots.txt').is_file())
+        self.assertEqual(self.rebuild({watch.CONTENT}), {'pages': pages, 'rendered': 0, 'removed': 0, 'written': False})
+
+        self.acetone.description = 'A fast-drying solvent.'
+        self.acetone.save()
+        result = self.rebuild({watch.CONTENT})
+        self.assertTrue(result['written'])
+        self.assertLess(result['rendered'], pages)
+        page = (self.output_dir / 'products' / 'acetone' / 'index.html').read_text()
+        self.assertIn('A fast-drying solvent.', page)
@@ -1,7 +1,10 @@
 from django.urls import path
 from django_distill import distill_path
 from . import views
-from .distill import get_all_products
+from .distill import (
+    get_all_products, get_application_pages, get_applications, get_industries, get_industry_pages,
+    get_product_pages,
+)
 
 urlpatterns = [
     # Static pages (no generator needed)
@@ -11,8 +14,40 @@ urlpatterns = [
     distill_path('industries/', views.industries_view, name='industries'),
     distill_path('resources/', views.resources, name='resources'),
     distill_path('contact/', views.contact, name='contact'),
+    distill_path('search-index.json', views.search_index, name='search_index',
+                 distill_file='search-index.json'),
     
     # Dynamic pages (generator required)
+    distill_path(
+        'products/page/<int:page>/',
+        views.products_list,
+        name='products_page',
+        distill_func=get_product_pages,
+    ),
+    distill_path(
+        'products/industry/<slug:slug>/',
+        views.industry_products,
+        name='industry_products',
+        distill_func=get_industries,
+    ),
+    distill_path(
+        'products/industry/<slug:slug>/page/<int:page>/',
+        views.industry_products,
+        name='industry_products_page',
+        distill_func=get_industry_pages,
+    ),
+    distill_path(
+        'products/application/<slug:slug>/',
+        views.application_products,
+        name='application_products',
+        distill_func=get_applications,
+    ),
+    distill_path(
+        'products/application/<slug:slug>/page/<int:page>/',
+        views.application_products,
+        name='application_products_page',
+        distill_func=get_application_pages,
+    ),
     distill_path(
         'products/<slug:slug>/',
         views.product_detail,
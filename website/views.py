@@ -2,14 +2,21 @@
 Jaqman Chemicals - Views
 Clean views for static site generation with django-distill.
 """
+from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404
-from .models import Product, Industry, FAQ
+from . import listings, seo
+from .build import catalogue
+from .models import Product, Industry, FAQ, Application
+from .related import get_related_products
+from .search import build_index
+from .serving import cached_page
 
 
+@cached_page
 def home(request):
     """Homepage view with featured products and industries."""
     featured_products = Product.objects.filter(featured=True)[:6]
-    industries = Industry.objects.all()[:6]
+    industries = Industry.objects.filter(listed=True)[:6]
     context = {
         'featured_products': featured_products,
         'industries': industries,
@@ -17,40 +24,85 @@ def home(request):
     return render(request, 'home.html', context)
 
 
+@cached_page
 def about(request):
     """About page view."""
     return render(request, 'about.html')
 
 
-def products_list(request):
-    """List all products."""
-    products = Product.objects.all()
+def render_listing(request, listing, queryset, page, url_name, args=(), facet=None):
+    """One page of a product listing (see listings.py)."""
     context = {
-        'products': products,
+        'products': listings.get_page(listing, queryset, page),
+        'page': page,
+        'pagination': listings.page_links(page, listings.page_count(listing), url_name, args),
+        'facet': facet,
+        'filter_industries': Industry.objects.filter(listed=True),
     }
     return render(request, 'products.html', context)
 
 
+@cached_page
+def products_list(request, page=1):
+    """List all products, a page at a time."""
+    return render_listing(request, listings.ALL, Product.objects.all(), page, 'products')
+
+
+@cached_page
+def industry_products(request, slug, page=1):
+    """Products serving one industry, a page at a time."""
+    industry = get_object_or_404(Industry, slug=slug, listed=True)
+    return render_listing(
+        request, (listings.INDUSTRY, industry.pk), Product.objects.filter(industry_links__industry=industry),
+        page, 'industry_products', [slug], facet=industry,
+    )
+
+
+@cached_page
+def application_products(request, slug, page=1):
+    """Products for one application, a page at a time."""
+    application = get_object_or_404(Application, slug=slug)
+    return render_listing(
+        request, (listings.APPLICATION, application.pk),
+        Product.objects.filter(application_links__application=application),
+        page, 'application_products', [slug], facet=application,
+    )
+
+
+@cached_page
+def search_index(request):
+    """Prebuilt product search index, distilled to search-index.json."""
+    products = Product.objects.only('name', 'slug', 'description', 'specifications').prefetch_related(
+        'application_links__application', 'industry_links__industry',
+    )
+    return JsonResponse(build_index(products), json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False})
+
+
+@cached_page
 def product_detail(request, slug):
     """Product detail view."""
-    product = get_object_or_404(Product, slug=slug)
-    related_products = Product.objects.exclude(id=product.id)[:4]
+    product, applications = catalogue.get_product(slug)
+    related_products = get_related_products(product)
     context = {
         'product': product,
+        'applications': applications,
         'related_products': related_products,
+        'structured_data': seo.product_json_ld(product, applications, request.path),
     }
     return render(request, 'product_detail.html', context)
 
 
+@cached_page
 def industries_view(request):
     """Industries page view."""
-    industries = Industry.objects.all()
+    industries = Industry.objects.filter(listed=True)
     context = {
         'industries': industries,
     }
     return render(request, 'industries.html', context)
 
 
+@cached_page
 def resources(request):
     """Resources page with FAQs."""
     faqs = FAQ.objects.filter(active=True)
@@ -60,10 +112,7 @@ def resources(request):
     return render(request, 'resources.html', context)
 
 
+@cached_page
 def contact(request):
     """Contact page - form handled by Web3Forms (static site compatible)."""
-    products = Product.objects.all()
-    context = {
-        'products': products,
-    }
-    return render(request, 'contact.html', context)
+    return render(request, 'contact.html')